@@ -1,18 +1,136 @@
+import argparse
 import pandas as pd
 
-# Cargar el dataset original
-df = pd.read_csv("C:\\Users\\pc\\Downloads\\datos_abiertos_vigilancia_dengue_2000_2023.csv")
+RUTA_ORIGINAL = "C:\\Users\\pc\\Downloads\\datos_abiertos_vigilancia_dengue_2000_2023.csv"
+RUTA_FILTRADA = "C:\\Users\\pc\\Downloads\\datos_filtrados_2020_2023_00.csv"
+RUTA_AGRUPADA = "Trabajo_Predicciones/Procesamiento/casos_departamentos_2020_2023.csv"
+RUTA_AGRUPADA_SEMANA = "Trabajo_Predicciones/Procesamiento/casos_departamentos_semana_2020_2023.csv"
 
-# Filtrar solo las filas con 'año' entre 2020 y 2023
-df_filtrado = df[(df['ano'] >= 2020) & (df['ano'] <= 2023)]
+ANO_INICIO = 2020
+ANO_FIN = 2023
 
-# Guardar el nuevo archivo CSV con los datos filtrados (sin agrupar)
-df_filtrado.to_csv("C:\\Users\\pc\\Downloads\\datos_filtrados_2020_2023_00.csv", index=False, encoding='utf-8')
-print("Archivo guardado como 'datos_filtrados_2020_2023.csv'")
+# Columnas que usan los modelos y tipos compactos para leerlas (modo por bloques);
+# el resto de columnas se lee como texto y se copia tal cual al CSV filtrado
+COLUMNAS_TIPOS = {
+    'departamento': 'category',
+    'enfermedad': 'category',
+    'ano': 'int16',
+    'semana': 'int8',
+    'diagnostic': 'category',
+}
 
-# Agrupar por departamento y año, y contar los casos
-casos_por_departamento_ano = df_filtrado.groupby(['departamento', 'ano']).size().reset_index(name='total_casos')
 
-# Guardar a un nuevo CSV con casos agrupados
-casos_por_departamento_ano.to_csv("Trabajo_Predicciones\\Procesamiento\\casos_departamentos_2020_2023.csv", index=False)
-print("Archivo guardado como 'casos_por_departamento_ano_2020_2023.csv'")
+def filtrar_completo(ruta_entrada, ruta_filtrada, ruta_agrupada):
+    # Cargar el dataset original
+    df = pd.read_csv(ruta_entrada)
+
+    # Filtrar solo las filas con 'año' entre 2020 y 2023
+    df_filtrado = df[(df['ano'] >= ANO_INICIO) & (df['ano'] <= ANO_FIN)]
+
+    # Guardar el nuevo archivo CSV con los datos filtrados (sin agrupar)
+    df_filtrado.to_csv(ruta_filtrada, index=False, encoding='utf-8')
+    print(f"Archivo guardado como '{ruta_filtrada}'")
+
+    # Agrupar por departamento y año, y contar los casos
+    casos_por_departamento_ano = df_filtrado.groupby(['departamento', 'ano']).size().reset_index(name='total_casos')
+
+    # Guardar a un nuevo CSV con casos agrupados
+    casos_por_departamento_ano.to_csv(ruta_agrupada, index=False)
+    print(f"Archivo guardado como '{ruta_agrupada}'")
+
+
+def sumar_conteos(acumulado, conteo):
+    # Suma dos conteos agrupados alineando por índice (los bloques pueden traer grupos nuevos)
+    if acumulado is None:
+        return conteo
+    return acumulado.add(conteo, fill_value=0)
+
+
+def conteo_a_tabla(conteo, columnas):
+    # Las categorías cambian entre bloques: se pasa a texto y se ordena igual que groupby sobre el CSV completo
+    tabla = conteo.reset_index(name='total_casos')
+    tabla['departamento'] = tabla['departamento'].astype(str)
+    tabla['total_casos'] = tabla['total_casos'].astype('int64')
+    return tabla.sort_values(columnas).reset_index(drop=True)
+
+
+def filtrar_por_bloques(ruta_entrada, ruta_filtrada, ruta_agrupada, ruta_agrupada_semana, tamano_bloque=500_000):
+    # Leer por bloques, para que la memoria no dependa del tamaño del archivo. Si se guarda el CSV
+    # filtrado se conservan todas las columnas (las que no se agregan, como texto) para que sea igual
+    # al del modo completo; si no, se leen solo las columnas necesarias
+    if ruta_filtrada:
+        columnas = list(pd.read_csv(ruta_entrada, nrows=0).columns)
+    else:
+        columnas = list(COLUMNAS_TIPOS)
+    tipos = {columna: COLUMNAS_TIPOS.get(columna, str) for columna in columnas}
+    lector = pd.read_csv(
+        ruta_entrada,
+        usecols=columnas,
+        dtype=tipos,
+        chunksize=tamano_bloque,
+    )
+
+    casos_ano = None
+    casos_semana = None
+    filas_filtradas = 0
+    primer_bloque = True
+
+    for bloque in lector:
+        # Filtrar el rango de años en cada bloque
+        bloque = bloque[(bloque['ano'] >= ANO_INICIO) & (bloque['ano'] <= ANO_FIN)]
+        if bloque.empty:
+            continue
+        filas_filtradas += len(bloque)
+
+        # Guardar los datos filtrados agregando bloque a bloque
+        if ruta_filtrada:
+            bloque.to_csv(ruta_filtrada, mode='w' if primer_bloque else 'a', header=primer_bloque,
+                          index=False, encoding='utf-8')
+            primer_bloque = False
+
+        # Acumular los conteos departamento/año y departamento/año/semana
+        conteo_ano = bloque.groupby(['departamento', 'ano'], observed=True).size()
+        conteo_semana = bloque.groupby(['departamento', 'ano', 'semana'], observed=True).size()
+        casos_ano = sumar_conteos(casos_ano, conteo_ano)
+        casos_semana = sumar_conteos(casos_semana, conteo_semana)
+
+    # Sin filas en el rango se escriben los archivos solo con cabecera, como en el modo completo,
+    # para no dejar resultados de una ejecución anterior
+    if ruta_filtrada and primer_bloque:
+        pd.DataFrame(columns=columnas).to_csv(ruta_filtrada, index=False, encoding='utf-8')
+        print(f"Archivo guardado como '{ruta_filtrada}'")
+
+    if casos_ano is None:
+        print("No se encontraron filas en el rango de años indicado.")
+        pd.DataFrame(columns=['departamento', 'ano', 'total_casos']).to_csv(ruta_agrupada, index=False)
+        pd.DataFrame(columns=['departamento', 'ano', 'semana', 'total_casos']).to_csv(ruta_agrupada_semana,
+                                                                                      index=False)
+        return
+
+    # Mismo formato que el modo completo: ordenado por departamento y año, conteos enteros
+    casos_por_departamento_ano = conteo_a_tabla(casos_ano, ['departamento', 'ano'])
+    casos_por_departamento_ano.to_csv(ruta_agrupada, index=False)
+    print(f"Filas filtradas: {filas_filtradas}")
+    print(f"Archivo guardado como '{ruta_agrupada}'")
+
+    casos_por_departamento_semana = conteo_a_tabla(casos_semana, ['departamento', 'ano', 'semana'])
+    casos_por_departamento_semana.to_csv(ruta_agrupada_semana, index=False)
+    print(f"Archivo guardado como '{ruta_agrupada_semana}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtra los datos de dengue 2020-2023 y agrupa casos por departamento.")
+    parser.add_argument('--entrada', default=RUTA_ORIGINAL)
+    parser.add_argument('--filtrado', default=RUTA_FILTRADA,
+                        help="CSV con las filas filtradas (en modo por bloques, vacío para no guardarlo)")
+    parser.add_argument('--agrupado', default=RUTA_AGRUPADA)
+    parser.add_argument('--agrupado-semana', default=RUTA_AGRUPADA_SEMANA)
+    parser.add_argument('--por-bloques', action='store_true',
+                        help="Leer el archivo por bloques con memoria acotada")
+    parser.add_argument('--tamano-bloque', type=int, default=500_000)
+    args = parser.parse_args()
+
+    if args.por_bloques:
+        filtrar_por_bloques(args.entrada, args.filtrado, args.agrupado, args.agrupado_semana, args.tamano_bloque)
+    else:
+        filtrar_completo(args.entrada, args.filtrado, args.agrupado)
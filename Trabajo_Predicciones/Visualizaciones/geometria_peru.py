@@ -0,0 +1,62 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+
+RUTA_GEOJSON = "Trabajo_Predicciones/Visualizaciones/pe.json"
+CARPETA_CACHE = "Trabajo_Predicciones/cache/geometria"
+
+
+def normalizar_nombre(nombres):
+    # Clave común para unir el mapa con los CSV (sin espacios extremos, en minúsculas)
+    return nombres.str.strip().str.lower()
+
+
+def preparar_geometria(ruta=RUTA_GEOJSON, tolerancia=0.0):
+    """Lee el GeoJSON y agrega la clave normalizada y el punto de etiqueta de cada región.
+
+    tolerancia: simplificación de los polígonos en unidades del mapa (grados); 0 = sin simplificar.
+    El punto de etiqueta es un punto representativo (siempre dentro del polígono).
+    """
+    gdf = gpd.read_file(ruta)
+    gdf['clave'] = normalizar_nombre(gdf['name'])
+    if tolerancia > 0:
+        gdf['geometry'] = gdf.geometry.simplify(tolerancia, preserve_topology=True)
+    puntos = gdf.geometry.representative_point()
+    gdf['x_etiqueta'] = puntos.x
+    gdf['y_etiqueta'] = puntos.y
+    return gdf
+
+
+def cargar_geometria(ruta=RUTA_GEOJSON, tolerancia=0.0, carpeta_cache=CARPETA_CACHE):
+    """Devuelve la geometría preparada, leyéndola de la cache (GeoParquet) si el GeoJSON no cambió."""
+    os.makedirs(carpeta_cache, exist_ok=True)
+    nombre = f"{os.path.splitext(os.path.basename(ruta))[0]}_tol{tolerancia:g}"
+    ruta_cache = os.path.join(carpeta_cache, f"{nombre}.parquet")
+    ruta_meta = os.path.join(carpeta_cache, f"{nombre}.meta.json")
+
+    info = os.stat(ruta)
+    huella = {'fuente': os.path.abspath(ruta), 'tamano': info.st_size, 'mtime': info.st_mtime_ns}
+    if os.path.exists(ruta_cache) and os.path.exists(ruta_meta):
+        with open(ruta_meta, encoding='utf-8') as f:
+            if json.load(f) == huella:
+                return gpd.read_parquet(ruta_cache)
+
+    gdf = preparar_geometria(ruta, tolerancia)
+    gdf.to_parquet(ruta_cache)
+    with open(ruta_meta, 'w', encoding='utf-8') as f:
+        json.dump(huella, f)
+    return gdf
+
+
+def dibujar_circulos(ax, gdf, tamanos, **estilo):
+    # Todos los círculos proporcionales en una sola llamada a scatter
+    return ax.scatter(gdf['x_etiqueta'].values, gdf['y_etiqueta'].values, s=np.asarray(tamanos), **estilo)
+
+
+def dibujar_etiquetas(ax, gdf, textos, desplazamiento_y=0.0, **estilo):
+    # Etiquetas desde los arrays de coordenadas precalculados (sin recorrer filas ni calcular centroides)
+    xs = gdf['x_etiqueta'].values
+    ys = gdf['y_etiqueta'].values + desplazamiento_y
+    return [ax.text(x, y, texto, **estilo) for x, y, texto in zip(xs, ys, textos)]
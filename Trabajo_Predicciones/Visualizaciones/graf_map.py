@@ -1,20 +1,24 @@
-import geopandas as gpd
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
+from geometria_peru import cargar_geometria, normalizar_nombre, dibujar_circulos, dibujar_etiquetas
 
-# 1. Cargar el GeoJSON
-geo_path = "Trabajo_Predicciones/Visualizaciones/pe.json" 
-peru_map = gpd.read_file(geo_path)
+parser = argparse.ArgumentParser(description="Mapa de casos totales y graves por departamento.")
+parser.add_argument('--tolerancia', type=float, default=0.0,
+                    help="Simplificación de los polígonos (grados); 0 = geometría original")
+args = parser.parse_args()
+
+# 1. Cargar la geometría preparada (cache con clave normalizada y puntos de etiqueta)
+peru_map = cargar_geometria(tolerancia=args.tolerancia)
 
 # 2. Cargar los datos CSV
-df = pd.read_csv("Trabajo_Predicciones/models/casos_departamento.csv")
+df = pd.read_csv("Trabajo_Predicciones/Visualizaciones/casos_departamento.csv")
 
 # 3. Normalizar nombres
-df['Departamento'] = df['Departamento'].str.strip().str.lower()
-peru_map['name'] = peru_map['name'].str.strip().str.lower()
+df['Departamento'] = normalizar_nombre(df['Departamento'])
 
 # 4. Merge (left merge para mantener todos los departamentos)
-merged = peru_map.merge(df, how='left', left_on='name', right_on='Departamento')
+merged = peru_map.merge(df, how='left', left_on='clave', right_on='Departamento')
 
 # Rellenar NaN con 0
 merged['Total'] = merged['Total'].fillna(0)
@@ -34,43 +38,40 @@ merged.plot(
 )
 
 # 6. Agregar círculos proporcionales para casos graves + etiquetas
-for idx, row in merged.iterrows():
-    if row['geometry'].geom_type in ['Polygon', 'MultiPolygon']:
-        centroid = row['geometry'].centroid
-        # Dibuja el círculo proporcional
-        plt.scatter(
-            centroid.x, centroid.y,
-            s=row['Graves'] * 0.05, 
-            color='blue',
-            alpha=0.6,
-            edgecolor='k',
-            linewidth=0.5,
-            zorder=5
-        )
-        # Etiqueta con número de casos graves
-        plt.text(
-            centroid.x, centroid.y + 0.3,  
-            f"{int(row['Graves'])}",
-            fontsize=8,
-            ha='center',
-            va='bottom',
-            color='blue',
-            weight='bold',
-            zorder=6
-        )
+poligonos = merged[merged.geom_type.isin(['Polygon', 'MultiPolygon'])]
+# Dibuja los círculos proporcionales
+dibujar_circulos(
+    ax, poligonos,
+    poligonos['Graves'].values * 0.05,
+    color='blue',
+    alpha=0.6,
+    edgecolor='k',
+    linewidth=0.5,
+    zorder=5
+)
+# Etiqueta con número de casos graves
+dibujar_etiquetas(
+    ax, poligonos,
+    poligonos['Graves'].astype(int).astype(str),
+    desplazamiento_y=0.3,
+    fontsize=8,
+    ha='center',
+    va='bottom',
+    color='blue',
+    weight='bold',
+    zorder=6
+)
 
 # 7. Etiquetas de departamentos
-for idx, row in merged.iterrows():
-    centroid = row['geometry'].centroid
-    plt.text(
-        centroid.x, centroid.y,
-        row['name'].capitalize(),
-        fontsize=7,
-        ha='center',
-        va='center',
-        color='black',
-        alpha=0.7
-    )
+dibujar_etiquetas(
+    ax, merged,
+    merged['clave'].str.capitalize(),
+    fontsize=7,
+    ha='center',
+    va='center',
+    color='black',
+    alpha=0.7
+)
 
 plt.title("Casos Totales y Graves por Departamento en Perú", fontsize=15)
 plt.axis('off')
@@ -0,0 +1,135 @@
+import os
+import time
+import warnings
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_RESULTADO = ['departamento', 'prediccion', 'tiempo_ajuste_s', 'convergio', 'estado', 'error']
+
+
+def ajustar_departamento(departamento, y, orden=(1, 1, 1), pasos=1, min_observaciones=3):
+    """Ajusta un ARIMA a la serie de un departamento y devuelve un resultado estructurado.
+
+    Se ejecuta en un proceso aparte, por eso recibe la serie como array y no el DataFrame.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    resultado = {
+        'departamento': departamento,
+        'prediccion': np.nan,
+        'tiempo_ajuste_s': 0.0,
+        'convergio': False,
+        'estado': 'ok',
+        'error': '',
+    }
+    if len(y) < min_observaciones:
+        resultado['estado'] = 'datos_insuficientes'
+        resultado['error'] = f"{len(y)} observaciones (mínimo {min_observaciones})"
+        return resultado
+
+    inicio = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model_fit = ARIMA(y, order=orden).fit()
+        forecast = model_fit.forecast(steps=pasos)
+        resultado['prediccion'] = float(forecast[-1])
+        resultado['convergio'] = bool(model_fit.mle_retvals.get('converged', False))
+    except Exception as e:
+        resultado['estado'] = 'error'
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    resultado['tiempo_ajuste_s'] = time.perf_counter() - inicio
+    return resultado
+
+
+def resultado_fallido(departamento, estado, error, tiempo=0.0):
+    return {'departamento': departamento, 'prediccion': np.nan, 'tiempo_ajuste_s': tiempo,
+            'convergio': False, 'estado': estado, 'error': error}
+
+
+def ejecutar_ajuste(conexion, departamento, y, orden, pasos):
+    # Punto de entrada de cada proceso: envía el resultado por la tubería y termina
+    try:
+        resultado = ajustar_departamento(departamento, y, orden, pasos)
+    except Exception as e:
+        resultado = resultado_fallido(departamento, 'error', f"{type(e).__name__}: {e}")
+    conexion.send(resultado)
+    conexion.close()
+
+
+def ajustar_departamentos(series, orden=(1, 1, 1), pasos=1, workers=None, timeout=60):
+    """Ajusta todos los departamentos en paralelo (un proceso por ajuste).
+
+    series: dict departamento -> array con la serie ordenada en el tiempo.
+    workers: número de procesos simultáneos (por defecto os.cpu_count()); con 1 se ajusta en serie,
+    pero cada ajuste sigue en su propio proceso para poder cortarlo.
+    timeout: segundos que puede durar cada ajuste, contados desde que arranca su proceso;
+    si se supera, el proceso se termina y el departamento se marca como 'timeout'.
+    Con timeout=None no hay límite, y con workers=1 se ajusta en este mismo proceso.
+    El resultado sale siempre ordenado por departamento, sin importar el orden en que terminen.
+    """
+    departamentos = sorted(series)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 and timeout is None:
+        resultados = [ajustar_departamento(d, series[d], orden, pasos) for d in departamentos]
+        return pd.DataFrame(resultados, columns=COLUMNAS_RESULTADO)
+
+    # Importar statsmodels una vez aquí: con fork, cada proceso lo hereda ya cargado
+    import statsmodels.tsa.arima.model  # noqa: F401
+
+    pendientes = deque(departamentos)
+    # conexión de lectura -> (departamento, proceso, instante de inicio)
+    activos = {}
+    resultados = {}
+    try:
+        while pendientes or activos:
+            while pendientes and len(activos) < workers:
+                depto = pendientes.popleft()
+                lectura, escritura = multiprocessing.Pipe(duplex=False)
+                proceso = multiprocessing.Process(target=ejecutar_ajuste,
+                                                  args=(escritura, depto, series[depto], orden, pasos),
+                                                  daemon=True)
+                proceso.start()
+                escritura.close()
+                activos[lectura] = (depto, proceso, time.monotonic())
+
+            # Esperar hasta que termine algún ajuste o venza el plazo más próximo
+            espera = None
+            if timeout is not None:
+                vence = min(inicio for _, _, inicio in activos.values()) + timeout
+                espera = max(0.0, vence - time.monotonic())
+            for lectura in wait(list(activos), timeout=espera):
+                depto, proceso, _ = activos.pop(lectura)
+                try:
+                    resultados[depto] = lectura.recv()
+                except EOFError:
+                    # El proceso terminó sin enviar resultado (por ejemplo, se cerró por falta de memoria)
+                    resultados[depto] = resultado_fallido(depto, 'error',
+                                                          f"el proceso terminó con código {proceso.exitcode}")
+                lectura.close()
+                proceso.join()
+
+            # Los ajustes colgados no se pueden interrumpir: se termina su proceso
+            if timeout is None:
+                continue
+            ahora = time.monotonic()
+            for lectura, (depto, proceso, inicio) in list(activos.items()):
+                if ahora - inicio >= timeout:
+                    del activos[lectura]
+                    proceso.terminate()
+                    proceso.join()
+                    lectura.close()
+                    resultados[depto] = resultado_fallido(depto, 'timeout', f"el ajuste superó {timeout} s",
+                                                          float(timeout))
+    finally:
+        for lectura, (_, proceso, _) in activos.items():
+            proceso.terminate()
+            proceso.join()
+            lectura.close()
+
+    return pd.DataFrame([resultados[d] for d in departamentos], columns=COLUMNAS_RESULTADO)
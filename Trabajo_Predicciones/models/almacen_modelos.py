@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: el candado usa msvcrt.locking
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+CARPETA_ALMACEN = "Trabajo_Predicciones/models/cache/modelos"
+
+# Tamaño máximo del almacén; al superarlo se borran los modelos usados hace más tiempo
+MAX_BYTES = 500 * 1024 * 1024
+
+
+def hash_serie(serie):
+    # Hash del contenido de una serie o DataFrame (valores e índice)
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(serie, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def clave_modelo(tipo, serie, hiperparametros):
+    """Clave del artefacto: tipo de modelo + contenido de la serie + hiperparámetros."""
+    texto = json.dumps({'tipo': tipo, 'serie': hash_serie(serie), 'hiperparametros': hiperparametros},
+                       sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()[:32]
+
+
+# Serialización por tipo de modelo: cada función escribe/lee dentro de una carpeta propia
+
+def guardar_arima(resultado, carpeta):
+    resultado.save(os.path.join(carpeta, 'arima.pkl'))
+
+
+def cargar_arima(carpeta):
+    from statsmodels.iolib.smpickle import load_pickle
+    return load_pickle(os.path.join(carpeta, 'arima.pkl'))
+
+
+def guardar_prophet(modelo, carpeta):
+    from prophet.serialize import model_to_json
+    with open(os.path.join(carpeta, 'prophet.json'), 'w', encoding='utf-8') as f:
+        f.write(model_to_json(modelo))
+
+
+def cargar_prophet(carpeta):
+    from prophet.serialize import model_from_json
+    with open(os.path.join(carpeta, 'prophet.json'), encoding='utf-8') as f:
+        return model_from_json(f.read())
+
+
+def guardar_lstm(artefacto, carpeta):
+    # artefacto = (modelo Keras, MinMaxScaler)
+    modelo, scaler = artefacto
+    modelo.save(os.path.join(carpeta, 'lstm.keras'))
+    with open(os.path.join(carpeta, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
+
+
+def cargar_lstm(carpeta):
+    from tensorflow.keras.models import load_model
+    modelo = load_model(os.path.join(carpeta, 'lstm.keras'))
+    with open(os.path.join(carpeta, 'scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    return modelo, scaler
+
+
+SERIALIZADORES = {
+    'arima': (guardar_arima, cargar_arima),
+    'prophet': (guardar_prophet, cargar_prophet),
+    'lstm': (guardar_lstm, cargar_lstm),
+}
+
+
+def bloquear_archivo(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    # msvcrt.locking se rinde tras 10 intentos de un segundo; se reintenta hasta obtenerlo
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def desbloquear_archivo(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def tamano_carpeta(carpeta):
+    return sum(os.path.getsize(os.path.join(raiz, a)) for raiz, _, archivos in os.walk(carpeta) for a in archivos)
+
+
+class AlmacenModelos:
+    """Registro local de modelos ajustados, con índice de metadatos y desalojo LRU por tamaño."""
+
+    def __init__(self, carpeta=CARPETA_ALMACEN, max_bytes=MAX_BYTES):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.ruta_indice = os.path.join(carpeta, 'indice.json')
+        self.ruta_candado = os.path.join(carpeta, 'indice.lock')
+        os.makedirs(carpeta, exist_ok=True)
+
+    @contextmanager
+    def bloqueo(self):
+        # Candado exclusivo entre procesos para leer-modificar-escribir el índice: el pipeline
+        # ajusta varios modelos en paralelo sobre el mismo almacén y sin él se pierden entradas
+        with open(self.ruta_candado, 'a+') as f:
+            bloquear_archivo(f)
+            try:
+                yield
+            finally:
+                desbloquear_archivo(f)
+
+    def leer_indice(self):
+        if not os.path.exists(self.ruta_indice):
+            return {}
+        with open(self.ruta_indice, encoding='utf-8') as f:
+            return json.load(f)
+
+    def escribir_indice(self, indice):
+        # Escritura atómica: otros scripts pueden estar leyendo el índice al mismo tiempo
+        temporal = f"{self.ruta_indice}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, indent=2)
+        os.replace(temporal, self.ruta_indice)
+
+    def obtener(self, clave):
+        """Devuelve el modelo guardado con esa clave, o None si no existe."""
+        with self.bloqueo():
+            entrada = self.leer_indice().get(clave)
+        carpeta = os.path.join(self.carpeta, clave)
+        if entrada is None or not os.path.isdir(carpeta):
+            return None
+        # La carga (lenta) va fuera del candado; si otro proceso desaloja el modelo mientras tanto, falla y se reajusta
+        try:
+            modelo = SERIALIZADORES[entrada['tipo']][1](carpeta)
+        except Exception as e:
+            print(f"⚠ No se pudo cargar el modelo {clave} ({type(e).__name__}: {e}); se vuelve a ajustar")
+            return None
+        with self.bloqueo():
+            indice = self.leer_indice()
+            if clave in indice:
+                indice[clave]['ultimo_acceso'] = time.time()
+                indice[clave]['usos'] = indice[clave].get('usos', 0) + 1
+                self.escribir_indice(indice)
+        return modelo
+
+    def guardar(self, clave, tipo, modelo, metadatos=None):
+        # Se serializa (lento) fuera del candado en una carpeta temporal propia, y con el candado
+        # tomado solo se mueve a su lugar: dos procesos con la misma clave no se pisan los archivos
+        carpeta = os.path.join(self.carpeta, clave)
+        temporal = tempfile.mkdtemp(dir=self.carpeta, prefix=f".{clave}.", suffix='.tmp')
+        viejo = None
+        try:
+            SERIALIZADORES[tipo][0](modelo, temporal)
+            bytes_modelo = tamano_carpeta(temporal)
+
+            with self.bloqueo():
+                if os.path.isdir(carpeta):
+                    viejo = f"{temporal}.viejo"
+                    try:
+                        os.replace(carpeta, viejo)
+                    except OSError:
+                        # Windows no deja mover una carpeta que otro proceso está leyendo: como la
+                        # clave es la misma (misma serie e hiperparámetros), se conserva la existente
+                        viejo = None
+                        bytes_modelo = tamano_carpeta(carpeta)
+                if not os.path.isdir(carpeta):
+                    os.replace(temporal, carpeta)
+
+                indice = self.leer_indice()
+                ahora = time.time()
+                indice[clave] = {
+                    'tipo': tipo,
+                    'creado': ahora,
+                    'ultimo_acceso': ahora,
+                    'usos': 0,
+                    'bytes': bytes_modelo,
+                    'metadatos': metadatos or {},
+                }
+                self.desalojar(indice, conservar=clave)
+                self.escribir_indice(indice)
+        finally:
+            shutil.rmtree(temporal, ignore_errors=True)
+            if viejo is not None:
+                shutil.rmtree(viejo, ignore_errors=True)
+
+    def desalojar(self, indice, conservar=None):
+        # Borra los artefactos menos usados recientemente hasta quedar bajo el límite.
+        # Se llama con el candado tomado, sobre el índice recién leído
+        total = sum(e['bytes'] for e in indice.values())
+        for clave in sorted(indice, key=lambda c: indice[c]['ultimo_acceso']):
+            if total <= self.max_bytes:
+                break
+            if clave == conservar:
+                continue
+            total -= indice[clave]['bytes']
+            shutil.rmtree(os.path.join(self.carpeta, clave), ignore_errors=True)
+            del indice[clave]
+
+    def obtener_o_ajustar(self, tipo, serie, hiperparametros, ajustar, usar_cache=True):
+        """Carga el modelo si ya se ajustó con la misma serie e hiperparámetros; si no, llama
+        a `ajustar()`, guarda el resultado y lo devuelve. Retorna (modelo, desde_cache)."""
+        clave = clave_modelo(tipo, serie, hiperparametros)
+        if usar_cache:
+            modelo = self.obtener(clave)
+            if modelo is not None:
+                return modelo, True
+        modelo = ajustar()
+        self.guardar(clave, tipo, modelo, metadatos={'hiperparametros': hiperparametros,
+                                                     'n_observaciones': int(np.shape(serie)[0])})
+        return modelo, False
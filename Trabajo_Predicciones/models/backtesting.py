@@ -0,0 +1,206 @@
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Ajuste completo cada 13 orígenes (un trimestre de semanas); fija los puntos de reajuste
+# sin importar cuántos procesos se usen
+REFIT_CADA = 13
+
+
+class AdaptadorARIMA:
+    """ARIMA de statsmodels: entre orígenes se agregan las observaciones nuevas al estado
+    ajustado (append sin re-estimar parámetros) en vez de volver a ajustar."""
+
+    nombre = 'arima'
+
+    def __init__(self, orden=(1, 1, 1), orden_estacional=(0, 0, 0, 0)):
+        self.orden = tuple(orden)
+        self.orden_estacional = tuple(orden_estacional)
+
+    def ajustar(self, fechas, y):
+        from statsmodels.tsa.arima.model import ARIMA
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return ARIMA(y, order=self.orden, seasonal_order=self.orden_estacional).fit()
+
+    def actualizar(self, estado, fechas_nuevas, y_nuevos):
+        return estado.append(y_nuevos, refit=False)
+
+    def pronosticar(self, estado, fechas_futuras):
+        return np.asarray(estado.forecast(steps=len(fechas_futuras)))
+
+
+class AdaptadorProphet:
+    """Prophet: cada origen se reajusta partiendo de los parámetros del origen anterior
+    (warm start), lo que converge en pocas iteraciones."""
+
+    nombre = 'prophet'
+
+    def __init__(self, yearly_seasonality=True):
+        self.yearly_seasonality = yearly_seasonality
+
+    def _nuevo_modelo(self):
+        from prophet import Prophet
+        return Prophet(yearly_seasonality=self.yearly_seasonality, weekly_seasonality=False,
+                       daily_seasonality=False)
+
+    def ajustar(self, fechas, y, init=None):
+        import logging
+        logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+        modelo = self._nuevo_modelo()
+        datos = pd.DataFrame({'ds': fechas, 'y': y})
+        if init is None:
+            modelo.fit(datos)
+        else:
+            modelo.fit(datos, init=init)
+        return modelo, datos
+
+    def actualizar(self, estado, fechas_nuevas, y_nuevos):
+        modelo, datos = estado
+        # Parámetros del ajuste anterior como punto de partida (como en la documentación de Prophet)
+        init = {}
+        for nombre in ['k', 'm', 'sigma_obs']:
+            init[nombre] = modelo.params[nombre][0][0]
+        for nombre in ['delta', 'beta']:
+            init[nombre] = modelo.params[nombre][0]
+        datos = pd.concat([datos, pd.DataFrame({'ds': fechas_nuevas, 'y': y_nuevos})], ignore_index=True)
+        return self.ajustar(datos['ds'], datos['y'], init=init)
+
+    def pronosticar(self, estado, fechas_futuras):
+        modelo, _ = estado
+        return modelo.predict(pd.DataFrame({'ds': fechas_futuras}))['yhat'].values
+
+
+class AdaptadorLSTM:
+    """LSTM de Keras: el escalador se ajusta con el primer tramo de entrenamiento y, entre
+    orígenes, la red sigue entrenando unas pocas épocas con los datos nuevos."""
+
+    nombre = 'lstm'
+
+    def __init__(self, pasos_tiempo=4, epochs=100, epochs_actualizacion=5):
+        self.pasos_tiempo = pasos_tiempo
+        self.epochs = epochs
+        self.epochs_actualizacion = epochs_actualizacion
+
+    def _entrenar(self, modelo, scaler, y, epochs):
+        from tensorflow.keras.callbacks import EarlyStopping
+        from lstm_inferencia import crear_secuencias
+        datos = scaler.transform(np.asarray(y, dtype=float).reshape(-1, 1))
+        X, y_obj = crear_secuencias(datos, pasos=self.pasos_tiempo)
+        early_stop = EarlyStopping(monitor='loss', patience=10, restore_best_weights=True)
+        modelo.fit(X, y_obj, epochs=epochs, batch_size=16, verbose=0, callbacks=[early_stop])
+
+    def ajustar(self, fechas, y):
+        from sklearn.preprocessing import MinMaxScaler
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense
+        from lstm_inferencia import crear_pronosticador
+
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaler.fit(np.asarray(y, dtype=float).reshape(-1, 1))
+        modelo = Sequential()
+        modelo.add(LSTM(50, activation='relu', input_shape=(self.pasos_tiempo, 1)))
+        modelo.add(Dense(1))
+        modelo.compile(optimizer='adam', loss='mse')
+        self._entrenar(modelo, scaler, y, self.epochs)
+        # El pronóstico compilado se guarda en el estado para no volver a trazarlo en cada origen
+        return modelo, scaler, np.asarray(y, dtype=float), crear_pronosticador(modelo)
+
+    def actualizar(self, estado, fechas_nuevas, y_nuevos):
+        modelo, scaler, y, pronosticador = estado
+        y = np.concatenate([y, np.asarray(y_nuevos, dtype=float)])
+        self._entrenar(modelo, scaler, y, self.epochs_actualizacion)
+        return modelo, scaler, y, pronosticador
+
+    def pronosticar(self, estado, fechas_futuras):
+        modelo, scaler, y, pronosticador = estado
+        entrada = scaler.transform(y[-self.pasos_tiempo:].reshape(-1, 1)).reshape(1, self.pasos_tiempo, 1)
+        salida = pronosticador(entrada, pasos_futuros=len(fechas_futuras))[0]
+        return scaler.inverse_transform(salida.reshape(-1, 1)).ravel()
+
+
+def evaluar_bloque(adaptador, fechas, y, origenes, horizonte):
+    # Recorre orígenes consecutivos: ajusta en el primero (el ancla) y actualiza el estado en los siguientes
+    filas = []
+    estado = None
+    ultimo = None
+    for origen in origenes:
+        if estado is None:
+            estado = adaptador.ajustar(fechas[:origen], y[:origen])
+        else:
+            estado = adaptador.actualizar(estado, fechas[ultimo:origen], y[ultimo:origen])
+        ultimo = origen
+
+        fin = min(origen + horizonte, len(y))
+        prediccion = adaptador.pronosticar(estado, fechas[origen:fin])
+        for h, (fecha, real, pred) in enumerate(zip(fechas[origen:fin], y[origen:fin], prediccion), start=1):
+            filas.append({'origen': fechas[origen - 1], 'horizonte': h, 'fecha': fecha,
+                          'real': real, 'prediccion': float(pred)})
+    return filas
+
+
+def backtest(adaptador, fechas, y, horizonte=12, origen_inicial=None, paso=1, workers=None, refit_cada=REFIT_CADA):
+    """Evaluación con origen móvil (walk-forward) para horizontes 1..horizonte.
+
+    Cada origen usa solo los datos anteriores a él. Hay un ajuste completo cada `refit_cada`
+    orígenes contados desde origen_inicial (0 o None: un único ajuste al inicio); entre dos
+    ajustes el modelo se actualiza con las semanas nuevas. Los bloques que empiezan en cada
+    ajuste se reparten entre procesos, así que el resultado no depende de `workers`.
+    Devuelve un DataFrame con una fila por (origen, horizonte).
+    """
+    fechas = pd.to_datetime(pd.Index(fechas)).values
+    y = np.asarray(y, dtype=float)
+    if origen_inicial is None:
+        origen_inicial = len(y) // 2
+    origenes = list(range(origen_inicial, len(y), paso))
+    tamano = refit_cada or len(origenes) or 1
+    bloques = [origenes[i:i + tamano] for i in range(0, len(origenes), tamano)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(bloques)))
+
+    if workers == 1:
+        filas = [fila for b in bloques for fila in evaluar_bloque(adaptador, fechas, y, b, horizonte)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(evaluar_bloque, adaptador, fechas, y, b, horizonte) for b in bloques]
+            filas = [fila for futuro in futuros for fila in futuro.result()]
+
+    return pd.DataFrame(filas, columns=['origen', 'horizonte', 'fecha', 'real', 'prediccion'])
+
+
+def metricas_backtest(resultados):
+    # Métricas por horizonte, con las mismas columnas que metricas_*.csv
+    def metricas(grupo):
+        error = grupo['real'] - grupo['prediccion']
+        con_casos = grupo['real'] != 0
+        return pd.Series({
+            'RMSE': np.sqrt(np.mean(error ** 2)),
+            'MAE': np.mean(np.abs(error)),
+            'MAPE (%)': np.mean(np.abs(error[con_casos] / grupo['real'][con_casos])) * 100,
+            'n': len(grupo),
+        })
+
+    por_horizonte = resultados.groupby('horizonte')[['real', 'prediccion']].apply(metricas).reset_index()
+    total = metricas(resultados).to_frame().T
+    total.insert(0, 'horizonte', 'todos')
+    tabla = pd.concat([por_horizonte, total], ignore_index=True)
+    tabla['n'] = tabla['n'].astype(int)
+    return tabla
+
+
+def ejecutar_backtest(adaptador, casos_semanales, **opciones):
+    """Corre el backtest sobre la serie semanal (índice fecha, columna 'casos') y guarda
+    backtest_<modelo>.csv y metricas_backtest_<modelo>.csv."""
+    inicio = time.perf_counter()
+    resultados = backtest(adaptador, casos_semanales.index, casos_semanales['casos'].values, **opciones)
+    metricas = metricas_backtest(resultados)
+    resultados.to_csv(f"Trabajo_Predicciones/models/backtest_{adaptador.nombre}.csv", index=False)
+    metricas.to_csv(f"Trabajo_Predicciones/models/metricas_backtest_{adaptador.nombre}.csv", index=False)
+
+    print(f"\n🔹 Backtest {adaptador.nombre.upper()} ({resultados['origen'].nunique()} orígenes, "
+          f"{time.perf_counter() - inicio:.1f} s):")
+    print(metricas.to_string(index=False))
+    return resultados, metricas
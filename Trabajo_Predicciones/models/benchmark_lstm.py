@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, Dense
+
+from lstm_inferencia import crear_pronosticador
+
+# Compara la latencia del pronóstico de 12 semanas: bucle original con modelo.predict por
+# semana contra el pronóstico compilado (una serie y lotes de varias series).
+# La arquitectura es la de modelo_lstm.py; los pesos no influyen en la latencia.
+
+
+def pronostico_bucle(modelo, entrada_pred, pasos_futuros):
+    # Versión original de modelo_lstm.py
+    pred_futuro = []
+    for _ in range(pasos_futuros):
+        pred = modelo.predict(entrada_pred, verbose=0)
+        pred_futuro.append(pred[0, 0])
+        entrada_pred = np.append(entrada_pred[:, 1:, :], [[[pred[0, 0]]]], axis=1)
+    return np.array(pred_futuro)
+
+
+def medir(funcion, repeticiones):
+    funcion()  # calentamiento (trazado del grafo, etc.)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return np.median(tiempos)
+
+
+def main(args):
+    pasos_tiempo = args.pasos_tiempo
+    modelo = Sequential()
+    modelo.add(LSTM(50, activation='relu', input_shape=(pasos_tiempo, 1)))
+    modelo.add(Dense(1))
+    modelo.compile(optimizer='adam', loss='mse')
+
+    rng = np.random.default_rng(0)
+    pronosticar = crear_pronosticador(modelo)
+    filas = []
+
+    # Una serie: el bucle original contra el pronóstico compilado
+    entrada = rng.random((1, pasos_tiempo, 1)).astype(np.float32)
+    esperado = pronostico_bucle(modelo, entrada, args.semanas)
+    obtenido = pronosticar(entrada, pasos_futuros=args.semanas)[0]
+    print(f"Diferencia máxima bucle vs compilado: {np.max(np.abs(esperado - obtenido)):.2e}")
+
+    t = medir(lambda: pronostico_bucle(modelo, entrada, args.semanas), args.repeticiones)
+    filas.append({'metodo': 'bucle_predict', 'series': 1, 'segundos_llamada': t, 'ms_por_pronostico': t * 1000})
+
+    for n in args.series:
+        ventanas = rng.random((n, pasos_tiempo, 1)).astype(np.float32)
+        t = medir(lambda: pronosticar(ventanas, pasos_futuros=args.semanas), args.repeticiones)
+        filas.append({'metodo': 'compilado', 'series': n, 'segundos_llamada': t, 'ms_por_pronostico': t * 1000 / n})
+
+    tabla = pd.DataFrame(filas)
+    print(f"\n🔹 Latencia del pronóstico de {args.semanas} semanas (mediana de {args.repeticiones} repeticiones):")
+    print(tabla.to_string(index=False))
+    if args.salida:
+        tabla.to_csv(args.salida, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del pronóstico recursivo LSTM.")
+    parser.add_argument('--semanas', type=int, default=12)
+    parser.add_argument('--pasos-tiempo', type=int, default=4)
+    parser.add_argument('--series', type=int, nargs='+', default=[1, 25, 1000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--salida', default=None, help="CSV donde guardar los resultados")
+    main(parser.parse_args())
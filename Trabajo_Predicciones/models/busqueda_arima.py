@@ -0,0 +1,187 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datos_dengue import escribir_json
+
+CARPETA_CACHE_ORDENES = "Trabajo_Predicciones/models/cache/ordenes_arima"
+
+# Umbrales para elegir las diferencias antes de la búsqueda (los mismos que usa auto-ARIMA)
+ALFA_KPSS = 0.05
+UMBRAL_FUERZA_ESTACIONAL = 0.64
+
+
+def clave_ajuste(y, orden, orden_estacional, maxiter):
+    # Identifica un ajuste por el contenido de la serie y los órdenes usados
+    h = hashlib.sha256(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    h.update(json.dumps([list(orden), list(orden_estacional), maxiter]).encode())
+    return h.hexdigest()
+
+
+def leer_cache(carpeta, clave):
+    ruta = os.path.join(carpeta, f"{clave}.json")
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def escribir_cache(carpeta, clave, resultado):
+    # Escritura atómica: varias búsquedas pueden compartir la carpeta de cache
+    os.makedirs(carpeta, exist_ok=True)
+    escribir_json(resultado, os.path.join(carpeta, f"{clave}.json"))
+
+
+def es_estacionaria(y, alfa=ALFA_KPSS):
+    # Prueba KPSS (hipótesis nula: serie estacionaria alrededor de una constante)
+    from statsmodels.tsa.stattools import kpss
+
+    if len(y) < 3 or np.ptp(y) == 0:
+        return True
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _, p_valor, *_ = kpss(y, regression='c', nlags='auto')
+    return p_valor >= alfa
+
+
+def fuerza_estacional(y, s):
+    # Fuerza de la estacionalidad según una descomposición STL: 1 - Var(resto) / Var(estacional + resto)
+    from statsmodels.tsa.seasonal import STL
+
+    descomposicion = STL(y, period=s).fit()
+    var_total = np.var(descomposicion.seasonal + descomposicion.resid)
+    if var_total == 0:
+        return 0.0
+    return max(0.0, 1.0 - np.var(descomposicion.resid) / var_total)
+
+
+def elegir_diferencias(y, d_valores, D_valores=(0,), s=0):
+    """Elige D (fuerza estacional) y luego d (KPSS) antes de comparar modelos.
+
+    Los AIC/BIC de modelos con distinto orden de diferenciación se calculan sobre datos distintos
+    y no son comparables, por eso d y D se fijan primero y la búsqueda solo recorre p, q (y P, Q).
+    """
+    D_valores = sorted(D_valores)
+    D = D_valores[0]
+    serie = np.diff(y, n=D * s) if D and s else np.asarray(y)
+    # STL necesita al menos dos periodos completos
+    while (s and D < D_valores[-1] and len(serie) > 2 * s
+           and fuerza_estacional(serie, s) > UMBRAL_FUERZA_ESTACIONAL):
+        serie = serie[s:] - serie[:-s]
+        D += 1
+
+    d_valores = sorted(d_valores)
+    for d in d_valores:
+        if es_estacionaria(np.diff(serie, n=d)):
+            return d, D
+    return d_valores[-1], D
+
+
+def evaluar_orden(y, orden, orden_estacional=(0, 0, 0, 0), maxiter=50):
+    """Ajusta un ARIMA con el orden dado y devuelve sus criterios de información."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    resultado = {'orden': list(orden), 'orden_estacional': list(orden_estacional),
+                 'aic': np.inf, 'bic': np.inf, 'llf': -np.inf, 'convergio': False, 'error': ''}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ajuste = ARIMA(y, order=orden, seasonal_order=orden_estacional).fit(method_kwargs={'maxiter': maxiter})
+        resultado.update(aic=float(ajuste.aic), bic=float(ajuste.bic), llf=float(ajuste.llf),
+                         convergio=bool(ajuste.mle_retvals.get('converged', False)))
+    except Exception as e:
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    return resultado
+
+
+def evaluar_candidatos(y, candidatos, maxiter, workers, carpeta_cache):
+    # Evalúa una lista de (orden, orden_estacional) usando la cache y un pool de procesos
+    resultados = {}
+    pendientes = []
+    for orden, estacional in candidatos:
+        clave = clave_ajuste(y, orden, estacional, maxiter)
+        guardado = leer_cache(carpeta_cache, clave) if carpeta_cache else None
+        if guardado is not None:
+            resultados[(orden, estacional)] = guardado
+        else:
+            pendientes.append((orden, estacional, clave))
+
+    if pendientes:
+        if workers == 1:
+            calculados = [evaluar_orden(y, o, e, maxiter) for o, e, _ in pendientes]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                calculados = list(executor.map(evaluar_orden, itertools.repeat(y),
+                                               [o for o, _, _ in pendientes],
+                                               [e for _, e, _ in pendientes],
+                                               itertools.repeat(maxiter)))
+        for (orden, estacional, clave), resultado in zip(pendientes, calculados):
+            resultados[(orden, estacional)] = resultado
+            if carpeta_cache:
+                escribir_cache(carpeta_cache, clave, resultado)
+
+    return [resultados[c] for c in candidatos]
+
+
+def buscar_orden_arima(y, p_valores=range(0, 4), d_valores=range(0, 3), q_valores=range(0, 4),
+                       estacional=None, criterio='aic', margen_poda=10.0, maxiter_rapido=10,
+                       maxiter=50, workers=None, carpeta_cache=CARPETA_CACHE_ORDENES):
+    """Busca el orden (p,d,q) con menor AIC/BIC en una grilla, en paralelo.
+
+    estacional: None o dict con listas 'P', 'D', 'Q' y el periodo 's' (por ejemplo 52).
+    d (y D) se eligen primero con elegir_diferencias, dentro de d_valores (y estacional['D']);
+    la grilla solo recorre p, q (y P, Q), así todos los criterios comparados son del mismo d.
+    La búsqueda tiene dos etapas: un ajuste rápido (pocas iteraciones) de todos los candidatos
+    y un ajuste completo solo de los que quedan a menos de `margen_poda` del mejor criterio
+    rápido; el resto se descarta por estar dominado. Los ajustes se guardan en disco por hash
+    de la serie y orden, así que repetir la búsqueda sobre los mismos datos no recalcula nada.
+    Devuelve (mejor_orden, mejor_orden_estacional, tabla, segundos).
+    """
+    inicio = time.perf_counter()
+    y = np.asarray(y, dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+
+    if estacional:
+        d, D = elegir_diferencias(y, d_valores, estacional['D'], estacional['s'])
+        estacionales = [(P, D, Q, estacional['s']) for P, Q in itertools.product(estacional['P'], estacional['Q'])]
+    else:
+        d, _ = elegir_diferencias(y, d_valores)
+        estacionales = [(0, 0, 0, 0)]
+    ordenes = [(p, d, q) for p, q in itertools.product(p_valores, q_valores)]
+    candidatos = [(tuple(o), tuple(e)) for o in ordenes for e in estacionales]
+
+    # Etapa 1: ajuste rápido de todos los candidatos
+    rapidos = evaluar_candidatos(y, candidatos, maxiter_rapido, workers, carpeta_cache)
+    mejor_rapido = min(r[criterio] for r in rapidos)
+    finalistas = [c for c, r in zip(candidatos, rapidos)
+                  if np.isfinite(r[criterio]) and r[criterio] <= mejor_rapido + margen_poda]
+
+    # Etapa 2: ajuste completo de los candidatos no dominados
+    completos = dict(zip(finalistas, evaluar_candidatos(y, finalistas, maxiter, workers, carpeta_cache)))
+
+    filas = []
+    for c, r in zip(candidatos, rapidos):
+        final = completos.get(c)
+        fila = final if final is not None else r
+        filas.append({
+            'orden': str(c[0]),
+            'orden_estacional': str(c[1]),
+            'aic': fila['aic'],
+            'bic': fila['bic'],
+            'convergio': fila['convergio'],
+            'podado': final is None,
+            'error': fila['error'],
+        })
+    tabla = pd.DataFrame(filas).sort_values([criterio, 'orden']).reset_index(drop=True)
+
+    mejor = min(completos, key=lambda c: completos[c][criterio]) if completos else None
+    if mejor is None or not np.isfinite(completos[mejor][criterio]):
+        raise RuntimeError("Ningún orden ARIMA de la grilla se pudo ajustar")
+    return mejor[0], mejor[1], tabla, time.perf_counter() - inicio
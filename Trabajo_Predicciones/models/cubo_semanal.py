@@ -0,0 +1,55 @@
+import os
+
+import pyarrow.feather as feather
+
+from datos_dengue import (RUTA_FILTRADA, CARPETA_CACHE, VERSION_CACHE, cache_vigente, guardar_meta,
+                          cargar_datos_dengue, escribir_feather, fechas_semana, nombre_cache)
+
+# Dimensiones del cubo: un conteo por cada combinación presente
+DIMENSIONES = ['ano', 'semana', 'departamento', 'enfermedad', 'diagnostic']
+
+# El cubo depende también de la versión de la cache de datos
+VERSION_CUBO = f"{VERSION_CACHE}.1"
+
+
+def construir_cubo(df):
+    """Cuenta los casos una sola vez por (año, semana, departamento, enfermedad, diagnóstico)."""
+    dimensiones = [c for c in DIMENSIONES if c in df.columns]
+    cubo = df.groupby(dimensiones, observed=True).size().reset_index(name='casos')
+    cubo['fecha'] = fechas_semana(cubo['ano'], cubo['semana'])
+    return cubo
+
+
+def cargar_cubo(ruta=RUTA_FILTRADA, carpeta_cache=CARPETA_CACHE):
+    # El cubo se guarda junto a la cache de datos y se invalida con el mismo CSV de origen
+    os.makedirs(carpeta_cache, exist_ok=True)
+    nombre = nombre_cache(ruta)
+    ruta_cubo = os.path.join(carpeta_cache, f"{nombre}.cubo.feather")
+    ruta_meta = os.path.join(carpeta_cache, f"{nombre}.cubo.meta.json")
+
+    if os.path.exists(ruta_cubo) and cache_vigente(ruta, ruta_meta, version=VERSION_CUBO):
+        return feather.read_table(ruta_cubo, memory_map=True).to_pandas()
+
+    cubo = construir_cubo(cargar_datos_dengue(ruta, carpeta_cache))
+    escribir_feather(cubo, ruta_cubo)
+    guardar_meta(ruta, ruta_meta, version=VERSION_CUBO)
+    return cubo
+
+
+def serie_nacional(cubo):
+    # Casos semanales de todo el país (índice 'fecha', columna 'casos')
+    return cubo.groupby('fecha')['casos'].sum().to_frame()
+
+
+def serie_departamento(cubo, departamento):
+    # Casos semanales de un departamento (sin distinguir mayúsculas ni espacios)
+    nombres = cubo['departamento'].astype(str).str.strip().str.lower()
+    return serie_nacional(cubo[nombres == departamento.strip().lower()])
+
+
+def series_departamentos(cubo):
+    # Una columna por departamento, semanas sin casos en 0
+    tabla = cubo.pivot_table(index='fecha', columns='departamento', values='casos',
+                             aggfunc='sum', fill_value=0, observed=True)
+    tabla.columns = tabla.columns.astype(str)
+    return tabla
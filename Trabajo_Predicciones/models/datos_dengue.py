@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+# Ruta del CSV filtrado (salida de Procesamiento/filtrar_datos.py); el pipeline la pasa por variable de entorno
+RUTA_FILTRADA = os.environ.get('DENGUE_DATOS_FILTRADOS', "C:\\Users\\pc\\Downloads\\datos_filtrados_2020_2023.csv")
+
+# Carpeta donde se guarda la copia columnar ya procesada
+CARPETA_CACHE = "Trabajo_Predicciones/models/cache"
+
+COLUMNAS_TIPOS = {
+    'departamento': 'category',
+    'enfermedad': 'category',
+    'ano': 'int16',
+    'semana': 'int8',
+    'diagnostic': 'category',
+}
+
+# Se incrementa cuando cambia la forma de procesar los datos, para invalidar caches antiguos
+VERSION_CACHE = 2
+
+# Los totales anuales cuentan todas las filas del CSV (sin el filtro de dengue)
+VERSION_TOTALES = f"{VERSION_CACHE}.t1"
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    # SHA-256 del archivo leído por bloques
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def escribir_atomico(ruta, escribir):
+    # Escribe en un temporal de la misma carpeta y lo mueve al final: las etapas del pipeline corren
+    # en paralelo y un lector nunca debe ver un archivo a medio escribir
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta) or '.', suffix='.tmp')
+    os.close(descriptor)
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_json(datos, ruta):
+    def escribir(temporal):
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=2)
+    escribir_atomico(ruta, escribir)
+
+
+def escribir_feather(df, ruta):
+    escribir_atomico(ruta, lambda temporal: feather.write_feather(df, temporal))
+
+
+def nombre_cache(ruta_fuente):
+    # Nombre del CSV más un hash corto de su ruta absoluta: dos CSV con el mismo nombre en carpetas
+    # distintas (por ejemplo, DENGUE_DATOS_FILTRADOS y la ruta por defecto) no comparten cache
+    nombre = os.path.splitext(os.path.basename(ruta_fuente))[0]
+    ruta = os.path.normcase(os.path.abspath(ruta_fuente))
+    return f"{nombre}_{hashlib.sha256(ruta.encode('utf-8')).hexdigest()[:8]}"
+
+
+def cache_vigente(ruta_fuente, ruta_meta, version=VERSION_CACHE):
+    # Primero se compara tamaño y fecha de modificación (barato); si cambiaron se compara el hash
+    if not os.path.exists(ruta_meta):
+        return False
+    with open(ruta_meta, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != version or meta.get('fuente') != os.path.abspath(ruta_fuente):
+        return False
+
+    info = os.stat(ruta_fuente)
+    if meta['tamano'] == info.st_size and meta['mtime'] == info.st_mtime_ns:
+        return True
+    if meta['tamano'] != info.st_size or meta['sha256'] != hash_archivo(ruta_fuente):
+        return False
+
+    # Mismo contenido con otra fecha (por ejemplo, el archivo se copió de nuevo)
+    meta['mtime'] = info.st_mtime_ns
+    escribir_json(meta, ruta_meta)
+    return True
+
+
+def guardar_meta(ruta_fuente, ruta_meta, version=VERSION_CACHE):
+    info = os.stat(ruta_fuente)
+    meta = {
+        'fuente': os.path.abspath(ruta_fuente),
+        'tamano': info.st_size,
+        'mtime': info.st_mtime_ns,
+        'sha256': hash_archivo(ruta_fuente),
+        'version': version,
+    }
+    escribir_json(meta, ruta_meta)
+
+
+@lru_cache(maxsize=8)
+def calendario_semanas(ano_min, ano_max):
+    # Tabla (año, semana 0-53) -> lunes de la semana, con la misma regla '%Y-W%W-%w' de los scripts.
+    # Solo se parsean 54 cadenas por año, una vez por rango de años.
+    anos = np.arange(ano_min, ano_max + 1)
+    semanas = np.arange(54)
+    textos = [f"{a}-W{s}-1" for a in anos for s in semanas]
+    fechas = pd.to_datetime(textos, format='%Y-W%W-%w').values
+    return fechas.reshape(len(anos), len(semanas))
+
+
+def fechas_semana(ano, semana):
+    # Resuelve arrays de año/semana a fechas con una búsqueda en el calendario
+    ano = np.asarray(ano, dtype=np.int64)
+    semana = np.asarray(semana, dtype=np.int64)
+    ano_min = int(ano.min())
+    calendario = calendario_semanas(ano_min, int(ano.max()))
+    return calendario[ano - ano_min, semana]
+
+
+def procesar_csv(ruta):
+    # Lectura tipada, filtro de dengue y fecha de la semana epidemiológica (lunes) desde el calendario
+    df = pd.read_csv(ruta, usecols=list(COLUMNAS_TIPOS), dtype=COLUMNAS_TIPOS)
+    df = df[df['enfermedad'].str.contains('DENGUE', case=False)]
+    df['enfermedad'] = df['enfermedad'].cat.remove_unused_categories()
+    df['fecha'] = fechas_semana(df['ano'], df['semana'])
+    return df.reset_index(drop=True)
+
+
+def cargar_datos_dengue(ruta=RUTA_FILTRADA, carpeta_cache=CARPETA_CACHE, usar_cache=True):
+    """Devuelve los casos de dengue filtrados, tipados y con la columna 'fecha'.
+
+    La primera vez se procesa el CSV y se guarda en formato Feather; las siguientes
+    ejecuciones leen esa copia (mapeada en memoria) mientras el CSV no cambie.
+    """
+    if not usar_cache:
+        return procesar_csv(ruta)
+
+    os.makedirs(carpeta_cache, exist_ok=True)
+    nombre = nombre_cache(ruta)
+    ruta_cache = os.path.join(carpeta_cache, f"{nombre}.feather")
+    ruta_meta = os.path.join(carpeta_cache, f"{nombre}.meta.json")
+
+    if os.path.exists(ruta_cache) and cache_vigente(ruta, ruta_meta):
+        tabla = feather.read_table(ruta_cache, memory_map=True)
+        return tabla.to_pandas()
+
+    df = procesar_csv(ruta)
+    escribir_feather(df, ruta_cache)
+    guardar_meta(ruta, ruta_meta)
+    return df
+
+
+def contar_totales_anuales(ruta, tamano_bloque=1_000_000):
+    # Un conteo por (departamento, año) leyendo solo esas dos columnas, por bloques
+    conteo = None
+    for bloque in pd.read_csv(ruta, usecols=['departamento', 'ano'],
+                              dtype={'departamento': 'category', 'ano': 'int16'}, chunksize=tamano_bloque):
+        parcial = bloque.groupby(['departamento', 'ano'], observed=True).size()
+        conteo = parcial if conteo is None else conteo.add(parcial, fill_value=0)
+    if conteo is None:
+        return pd.DataFrame({'departamento': pd.Series(dtype=str), 'ano': pd.Series(dtype='int16'),
+                             'total_casos': pd.Series(dtype='int64')})
+    totales = conteo.reset_index(name='total_casos')
+    totales['departamento'] = totales['departamento'].astype(str)
+    totales['total_casos'] = totales['total_casos'].astype('int64')
+    return totales.sort_values(['departamento', 'ano']).reset_index(drop=True)
+
+
+def cargar_totales_anuales(ruta=RUTA_FILTRADA, carpeta_cache=CARPETA_CACHE):
+    """Casos por departamento y año contando todas las filas del CSV filtrado.
+
+    Es la misma tabla que casos_por_departamento_ano_2020_2023.csv (salida agrupada de
+    filtrar_datos.py): no se aplica el filtro de dengue de cargar_datos_dengue.
+    """
+    os.makedirs(carpeta_cache, exist_ok=True)
+    nombre = nombre_cache(ruta)
+    ruta_totales = os.path.join(carpeta_cache, f"{nombre}.totales.feather")
+    ruta_meta = os.path.join(carpeta_cache, f"{nombre}.totales.meta.json")
+
+    if os.path.exists(ruta_totales) and cache_vigente(ruta, ruta_meta, version=VERSION_TOTALES):
+        return feather.read_feather(ruta_totales)
+
+    totales = contar_totales_anuales(ruta)
+    escribir_feather(totales, ruta_totales)
+    guardar_meta(ruta, ruta_meta, version=VERSION_TOTALES)
+    return totales
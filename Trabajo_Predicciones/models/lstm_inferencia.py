@@ -0,0 +1,38 @@
+import numpy as np
+import tensorflow as tf
+
+
+def crear_secuencias(data, pasos=4):
+    """Ventanas de entrada (n, pasos, 1) y objetivos (n, 1) como vistas de `data`, sin copiar.
+
+    Da lo mismo que el bucle original: X[i] = data[i:i+pasos], y[i] = data[i+pasos].
+    """
+    ventanas = np.lib.stride_tricks.sliding_window_view(np.asarray(data).reshape(-1), pasos + 1)
+    return ventanas[:, :-1, np.newaxis], ventanas[:, -1:]
+
+
+def crear_pronosticador(modelo):
+    """Compila (tf.function) el pronóstico recursivo de varias semanas para `modelo`.
+
+    La función devuelta recibe las últimas ventanas escaladas de una o varias series,
+    con forma (n_series, pasos_tiempo, 1), y el número de semanas a predecir; devuelve
+    (n_series, pasos_futuros). Todo el bucle corre dentro del grafo, así que cuesta una
+    sola llamada en vez de una `modelo.predict` por semana.
+    """
+    @tf.function(reduce_retracing=True)
+    def pronosticar(ventanas, pasos_futuros):
+        salidas = tf.TensorArray(tf.float32, size=pasos_futuros)
+        for i in tf.range(pasos_futuros):
+            pred = modelo(ventanas, training=False)
+            salidas = salidas.write(i, pred[:, 0])
+            # Se descarta la semana más antigua y se agrega la predicción
+            ventanas = tf.concat([ventanas[:, 1:, :], pred[:, :, tf.newaxis]], axis=1)
+        return tf.transpose(salidas.stack())
+
+    def llamar(ventanas, pasos_futuros=12):
+        ventanas = np.asarray(ventanas, dtype=np.float32)
+        if ventanas.ndim == 2:
+            ventanas = ventanas[np.newaxis]
+        return pronosticar(tf.constant(ventanas), tf.constant(pasos_futuros, dtype=tf.int32)).numpy()
+
+    return llamar
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 from statsmodels.tsa.arima.model import ARIMA
@@ -5,104 +6,155 @@ from pandas.plotting import register_matplotlib_converters
 import warnings
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import numpy as np
+from cubo_semanal import cargar_cubo, serie_nacional
+from busqueda_arima import buscar_orden_arima
+from backtesting import REFIT_CADA, AdaptadorARIMA, ejecutar_backtest
+from almacen_modelos import AlmacenModelos
 
 warnings.filterwarnings("ignore")
 register_matplotlib_converters()
 
-# 1. Cargar datos
-df = pd.read_csv("C:\\Users\\pc\\Downloads\\datos_filtrados_2020_2023.csv")
-
-# 2. Filtrar solo dengue (puedes ajustar a lo que quieras)
-df = df[df['enfermedad'].str.contains('DENGUE', case=False)]
-
-# 3. Crear columna de fecha desde año y semana
-df['fecha'] = pd.to_datetime(df['ano'].astype(str) + '-W' + df['semana'].astype(str) + '-1', format='%Y-W%W-%w')
-
-# 4. Agrupar por semana (contar casos)
-casos_semanales = df.groupby('fecha').size().reset_index(name='casos')
-casos_semanales.set_index('fecha', inplace=True)
-
-# 5. Ajustar modelo ARIMA (p, d, q) → puedes experimentar con (1,1,1), (2,1,2), etc.
-modelo_arima = ARIMA(casos_semanales['casos'], order=(1, 1, 1))
-modelo_entrenado = modelo_arima.fit()
-
-# 6. Predicción para las próximas 12 semanas
-n_semanas = 12
-predicciones = modelo_entrenado.forecast(steps=n_semanas)
-
-# 7. Crear índice de fechas futuras
-ultima_fecha = casos_semanales.index[-1]
-fechas_futuras = pd.date_range(start=ultima_fecha + pd.Timedelta(weeks=1), periods=n_semanas, freq='W')
-
-# 8. Visualizar resultados
-plt.figure(figsize=(12, 6))
-plt.plot(casos_semanales.index, casos_semanales['casos'], label='Casos reales')
-plt.plot(fechas_futuras, predicciones, label='Predicción ARIMA', color='red')
-plt.title('Predicción de casos semanales de dengue con ARIMA')
-plt.xlabel('Fecha')
-plt.ylabel('Casos')
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.show()
-
-# 9. Mostrar datos en consola
-print("\n🔹 Predicciones ARIMA para las próximas 12 semanas:")
-for fecha, valor in zip(fechas_futuras, predicciones):
-    print(f"{fecha.date()}: {round(valor)} casos estimados")
-
-# Guardar predicciones en CSV
-df_predicciones = pd.DataFrame({
-    'fecha': fechas_futuras,
-    'prediccion_casos': predicciones.round().astype(int)
-})
-df_predicciones.to_csv("Trabajo_Predicciones/models/predicciones_arima.csv", index=False)
-
-# 10. Tendencia general
-inicio = casos_semanales['casos'].iloc[0]
-fin = predicciones.iloc[-1]
-print(f"\n🔹 Tendencia general: de {inicio} casos (inicio histórico) a {round(fin)} casos (última predicción)")
-
-# Guardar tendencia general en CSV
-df_tendencia = pd.DataFrame({
-    'descripcion': ['inicio_historico', 'ultima_prediccion'],
-    'casos': [inicio, round(fin)]
-})
-df_tendencia.to_csv("Trabajo_Predicciones/models/tendencia_general_Arima.csv", index=False)
-
-# 11. Última semana real
-ultima_semana_real = casos_semanales.tail(1)
-print("\n🔹 Última semana real:")
-print(ultima_semana_real)
-
-# Guardar última semana real en CSV
-ultima_semana_real.to_csv("Trabajo_Predicciones/models/ultima_semana_real_Arima.csv", index=False)
-
-# 12. Evaluar modelo ARIMA en datos históricos
-predicciones_in_sample = modelo_entrenado.predict(start=0, end=len(casos_semanales)-1)
-
-# Crear DataFrame para comparar
-df_eval_arima = casos_semanales.copy()
-df_eval_arima['prediccion'] = predicciones_in_sample
-
-# Calcular métricas
-rmse_arima = np.sqrt(mean_squared_error(df_eval_arima['casos'], df_eval_arima['prediccion']))
-mae_arima = mean_absolute_error(df_eval_arima['casos'], df_eval_arima['prediccion'])
-mape_arima = np.mean(np.abs((df_eval_arima['casos'] - df_eval_arima['prediccion']) / df_eval_arima['casos'])) * 100
-r2_arima = r2_score(df_eval_arima['casos'], df_eval_arima['prediccion'])
-
-# Mostrar métricas
-print("\n🔹 Métricas de evaluación del modelo ARIMA:")
-print(f"RMSE: {rmse_arima:.2f}")
-print(f"MAE: {mae_arima:.2f}")
-print(f"MAPE: {mape_arima:.2f}%")
-print(f"R²: {r2_arima:.4f}")
-
-# Guardar métricas en CSV
-metricas_arima_df = pd.DataFrame({
-    'RMSE': [rmse_arima],
-    'MAE': [mae_arima],
-    'MAPE (%)': [mape_arima],
-    'R2': [r2_arima]
-})
-metricas_arima_df.to_csv("Trabajo_Predicciones/models/metricas_arima.csv", index=False)
+
+def main(args):
+    # 1-3. Cargar el cubo semanal de casos de dengue (desde la cache compartida)
+    cubo = cargar_cubo()
+
+    # 4. Serie nacional de casos por semana
+    casos_semanales = serie_nacional(cubo)
+
+    # 5. Ajustar modelo ARIMA (p, d, q) → (1,1,1) por defecto, o búsqueda automática con --auto-orden
+    orden, orden_estacional = (1, 1, 1), (0, 0, 0, 0)
+    if args.auto_orden:
+        estacional = None
+        if args.estacional:
+            estacional = {'P': range(0, 2), 'D': range(0, 2), 'Q': range(0, 2), 's': args.periodo}
+        orden, orden_estacional, tabla_ordenes, segundos = buscar_orden_arima(
+            casos_semanales['casos'].values,
+            p_valores=range(0, args.max_p + 1),
+            d_valores=range(0, args.max_d + 1),
+            q_valores=range(0, args.max_q + 1),
+            estacional=estacional,
+            criterio=args.criterio,
+            workers=args.workers,
+        )
+        print(f"\n🔹 Orden elegido: {orden} estacional {orden_estacional} ({segundos:.2f} s)")
+        print(tabla_ordenes.head(10).to_string(index=False))
+        tabla_ordenes.to_csv("Trabajo_Predicciones/models/tabla_ordenes_arima.csv", index=False)
+
+    def ajustar():
+        modelo_arima = ARIMA(casos_semanales['casos'], order=orden, seasonal_order=orden_estacional)
+        return modelo_arima.fit()
+
+    # Se reutiliza el ajuste guardado si la serie y el orden no cambiaron
+    hiperparametros = {'orden': list(orden), 'orden_estacional': list(orden_estacional)}
+    modelo_entrenado, desde_cache = AlmacenModelos().obtener_o_ajustar(
+        'arima', casos_semanales, hiperparametros, ajustar, usar_cache=not args.sin_cache)
+    if desde_cache:
+        print("Modelo ARIMA cargado del almacén (la serie no cambió).")
+
+    # 6. Predicción para las próximas 12 semanas
+    n_semanas = 12
+    predicciones = modelo_entrenado.forecast(steps=n_semanas)
+
+    # 7. Crear índice de fechas futuras
+    ultima_fecha = casos_semanales.index[-1]
+    fechas_futuras = pd.date_range(start=ultima_fecha + pd.Timedelta(weeks=1), periods=n_semanas, freq='W')
+
+    # 8. Visualizar resultados
+    plt.figure(figsize=(12, 6))
+    plt.plot(casos_semanales.index, casos_semanales['casos'], label='Casos reales')
+    plt.plot(fechas_futuras, predicciones, label='Predicción ARIMA', color='red')
+    plt.title('Predicción de casos semanales de dengue con ARIMA')
+    plt.xlabel('Fecha')
+    plt.ylabel('Casos')
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
+
+    # 9. Mostrar datos en consola
+    print("\n🔹 Predicciones ARIMA para las próximas 12 semanas:")
+    for fecha, valor in zip(fechas_futuras, predicciones):
+        print(f"{fecha.date()}: {round(valor)} casos estimados")
+
+    # Guardar predicciones en CSV
+    df_predicciones = pd.DataFrame({
+        'fecha': fechas_futuras,
+        'prediccion_casos': predicciones.round().astype(int)
+    })
+    df_predicciones.to_csv("Trabajo_Predicciones/models/predicciones_arima.csv", index=False)
+
+    # 10. Tendencia general
+    inicio = casos_semanales['casos'].iloc[0]
+    fin = predicciones.iloc[-1]
+    print(f"\n🔹 Tendencia general: de {inicio} casos (inicio histórico) a {round(fin)} casos (última predicción)")
+
+    # Guardar tendencia general en CSV
+    df_tendencia = pd.DataFrame({
+        'descripcion': ['inicio_historico', 'ultima_prediccion'],
+        'casos': [inicio, round(fin)]
+    })
+    df_tendencia.to_csv("Trabajo_Predicciones/models/tendencia_general_Arima.csv", index=False)
+
+    # 11. Última semana real
+    ultima_semana_real = casos_semanales.tail(1)
+    print("\n🔹 Última semana real:")
+    print(ultima_semana_real)
+
+    # Guardar última semana real en CSV
+    ultima_semana_real.to_csv("Trabajo_Predicciones/models/ultima_semana_real_Arima.csv", index=False)
+
+    # 12. Evaluar modelo ARIMA en datos históricos
+    predicciones_in_sample = modelo_entrenado.predict(start=0, end=len(casos_semanales)-1)
+
+    # Crear DataFrame para comparar
+    df_eval_arima = casos_semanales.copy()
+    df_eval_arima['prediccion'] = predicciones_in_sample
+
+    # Calcular métricas
+    rmse_arima = np.sqrt(mean_squared_error(df_eval_arima['casos'], df_eval_arima['prediccion']))
+    mae_arima = mean_absolute_error(df_eval_arima['casos'], df_eval_arima['prediccion'])
+    mape_arima = np.mean(np.abs((df_eval_arima['casos'] - df_eval_arima['prediccion']) / df_eval_arima['casos'])) * 100
+    r2_arima = r2_score(df_eval_arima['casos'], df_eval_arima['prediccion'])
+
+    # Mostrar métricas
+    print("\n🔹 Métricas de evaluación del modelo ARIMA:")
+    print(f"RMSE: {rmse_arima:.2f}")
+    print(f"MAE: {mae_arima:.2f}")
+    print(f"MAPE: {mape_arima:.2f}%")
+    print(f"R²: {r2_arima:.4f}")
+
+    # Guardar métricas en CSV
+    metricas_arima_df = pd.DataFrame({
+        'RMSE': [rmse_arima],
+        'MAE': [mae_arima],
+        'MAPE (%)': [mape_arima],
+        'R2': [r2_arima]
+    })
+    metricas_arima_df.to_csv("Trabajo_Predicciones/models/metricas_arima.csv", index=False)
+
+    # 13. Backtesting con origen móvil (métricas fuera de muestra, comparables entre modelos)
+    if args.backtest:
+        ejecutar_backtest(AdaptadorARIMA(orden, orden_estacional), casos_semanales,
+                          horizonte=args.horizonte, workers=args.workers, refit_cada=args.refit_cada)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicción semanal de casos de dengue con ARIMA.")
+    parser.add_argument('--auto-orden', action='store_true',
+                        help="Buscar el orden (p,d,q) con menor AIC/BIC en vez de usar (1,1,1)")
+    parser.add_argument('--max-p', type=int, default=3)
+    parser.add_argument('--max-d', type=int, default=2,
+                        help="d máximo; d se elige antes de la búsqueda con la prueba KPSS")
+    parser.add_argument('--max-q', type=int, default=3)
+    parser.add_argument('--estacional', action='store_true', help="Incluir órdenes estacionales (P,D,Q) en la búsqueda")
+    parser.add_argument('--periodo', type=int, default=52, help="Periodo estacional en semanas")
+    parser.add_argument('--criterio', choices=['aic', 'bic'], default='aic')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para la búsqueda y el backtest (por defecto, todos los núcleos)")
+    parser.add_argument('--backtest', action='store_true', help="Evaluar con origen móvil y guardar metricas_backtest_arima.csv")
+    parser.add_argument('--horizonte', type=int, default=12, help="Semanas a evaluar desde cada origen")
+    parser.add_argument('--refit-cada', type=int, default=REFIT_CADA,
+                        help="Reajustar por completo cada N orígenes (0 = un solo ajuste, sin paralelismo)")
+    parser.add_argument('--sin-cache', action='store_true', help="Reajustar aunque exista un modelo guardado para esta serie")
+    main(parser.parse_args())
@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Ejecuta las etapas de Trabajo_Predicciones como un grafo de dependencias, sin ventanas
+# (backend Agg de matplotlib), en paralelo cuando no dependen entre sí, y saltando las
+# etapas cuyas entradas no cambiaron desde la última ejecución correcta.
+#
+# Uso (desde la raíz del repositorio):
+#   python Trabajo_Predicciones/pipeline.py --datos-originales ruta.csv --datos-filtrados ruta.csv
+
+RAIZ = "Trabajo_Predicciones"
+RUTA_ESTADO = os.path.join(RAIZ, "cache", "pipeline_estado.json")
+RUTA_REPORTE = os.path.join(RAIZ, "reporte_pipeline.json")
+CARPETA_LOGS = os.path.join(RAIZ, "logs")
+
+DATOS_ORIGINALES = "C:\\Users\\pc\\Downloads\\datos_abiertos_vigilancia_dengue_2000_2023.csv"
+DATOS_FILTRADOS = "C:\\Users\\pc\\Downloads\\datos_filtrados_2020_2023.csv"
+
+# Etapas a la vez por defecto: hay cuatro modelos independientes después del filtrado
+MAX_ETAPAS_PARALELAS = 4
+
+
+def definir_etapas(args):
+    # Cada etapa: script, argumentos, etapas de las que depende, archivos que lee y que produce;
+    # 'procesos': el script acepta --workers y lanza su propio pool de procesos
+    modelos = f"{RAIZ}/models"
+    return {
+        'filtrar_datos': {
+            'script': f"{RAIZ}/Procesamiento/filtrar_datos.py",
+            'args': ['--entrada', args.datos_originales, '--filtrado', args.datos_filtrados]
+                    + (['--por-bloques'] if args.por_bloques else []),
+            'depende': [],
+            'entradas': [args.datos_originales],
+            'salidas': [args.datos_filtrados, f"{RAIZ}/Procesamiento/casos_departamentos_2020_2023.csv"],
+        },
+        'modelo_arima': {
+            'script': f"{modelos}/modelo_arima.py",
+            'args': [],
+            'procesos': True,
+            'depende': ['filtrar_datos'],
+            'entradas': [args.datos_filtrados],
+            'salidas': [f"{modelos}/predicciones_arima.csv", f"{modelos}/metricas_arima.csv"],
+        },
+        'modelo_lstm': {
+            'script': f"{modelos}/modelo_lstm.py",
+            'args': [],
+            'depende': ['filtrar_datos'],
+            'entradas': [args.datos_filtrados],
+            'salidas': [f"{modelos}/predicciones_lstm_futuro.csv", f"{modelos}/metricas_lstm.csv"],
+        },
+        'modelo_prophet': {
+            'script': f"{modelos}/modelo_prophet.py",
+            'args': [],
+            'procesos': True,
+            'depende': ['filtrar_datos'],
+            'entradas': [args.datos_filtrados],
+            'salidas': [f"{modelos}/predicciones_futuras.csv", f"{modelos}/metricas_prophet.csv"],
+        },
+        'modelo_dep_map': {
+            'script': f"{modelos}/modelo_dep_map.py",
+            'args': [],
+            'procesos': True,
+            'depende': ['filtrar_datos'],
+            'entradas': [args.datos_filtrados, f"{RAIZ}/Visualizaciones/pe.json"],
+            'salidas': [f"{modelos}/casosTotales_predicciones_2024.csv", f"{modelos}/mapa_prediccion_dengue.png"],
+        },
+        'graf_map': {
+            'script': f"{RAIZ}/Visualizaciones/graf_map.py",
+            'args': [],
+            'depende': [],
+            'entradas': [f"{RAIZ}/Visualizaciones/casos_departamento.csv", f"{RAIZ}/Visualizaciones/pe.json"],
+            'salidas': [f"{RAIZ}/Visualizaciones/heatmap_peru.png"],
+        },
+    }
+
+
+def huella_archivo(ruta):
+    # Los scripts se comparan por contenido; los datos (pueden pesar GB) por tamaño y fecha
+    if not os.path.exists(ruta):
+        return None
+    if ruta.endswith('.py'):
+        with open(ruta, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    info = os.stat(ruta)
+    return f"{info.st_size}-{info.st_mtime_ns}"
+
+
+def huella_etapa(etapa):
+    # Script + módulos de su carpeta (helpers importados) + entradas + argumentos
+    carpeta = os.path.dirname(etapa['script'])
+    codigo = sorted(os.path.join(carpeta, a) for a in os.listdir(carpeta) if a.endswith('.py'))
+    partes = {ruta: huella_archivo(ruta) for ruta in codigo + etapa['entradas']}
+    partes['args'] = etapa['args']
+    return hashlib.sha256(json.dumps(partes, sort_keys=True).encode()).hexdigest()
+
+
+def leer_estado():
+    if not os.path.exists(RUTA_ESTADO):
+        return {}
+    with open(RUTA_ESTADO, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_estado(estado):
+    os.makedirs(os.path.dirname(RUTA_ESTADO), exist_ok=True)
+    with open(RUTA_ESTADO, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+
+
+def ejecutar_etapa(nombre, etapa, entorno, workers_etapa):
+    # Corre el script en un proceso aparte y guarda su salida en logs/<etapa>.log.
+    # --workers no entra en la huella: no cambia los resultados, solo el reparto de núcleos
+    os.makedirs(CARPETA_LOGS, exist_ok=True)
+    ruta_log = os.path.join(CARPETA_LOGS, f"{nombre}.log")
+    extra = ['--workers', str(workers_etapa)] if etapa.get('procesos') else []
+    inicio = time.perf_counter()
+    with open(ruta_log, 'w', encoding='utf-8') as log:
+        proceso = subprocess.run([sys.executable, etapa['script']] + etapa['args'] + extra,
+                                 stdout=log, stderr=subprocess.STDOUT, env=entorno)
+    return proceso.returncode, time.perf_counter() - inicio, ruta_log
+
+
+def ejecutar_pipeline(etapas, entorno, workers, forzar=False, workers_etapa=None):
+    """Ejecuta las etapas respetando dependencias; devuelve el reporte por etapa.
+
+    workers_etapa: procesos de cada etapa con pool propio; por defecto los núcleos se reparten
+    entre las etapas que corren a la vez, para no lanzar workers × núcleos procesos.
+    """
+    workers_etapa = workers_etapa or max(1, (os.cpu_count() or 1) // workers)
+    estado = leer_estado()
+    reporte = {}
+    pendientes = dict(etapas)
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pendientes or en_curso:
+            # Lanzar (o saltar) las etapas cuyas dependencias ya terminaron
+            for nombre in list(pendientes):
+                etapa = pendientes[nombre]
+                corriendo = {n for n, _ in en_curso.values()}
+                if any(d in pendientes or d in corriendo for d in etapa['depende']):
+                    continue
+                del pendientes[nombre]
+
+                fallidas = [d for d in etapa['depende'] if reporte[d]['estado'] in ('error', 'omitida')]
+                if fallidas:
+                    reporte[nombre] = {'estado': 'omitida', 'segundos': 0.0,
+                                       'motivo': f"falló la dependencia {', '.join(fallidas)}"}
+                    continue
+
+                huella = huella_etapa(etapa)
+                salidas_ok = all(os.path.exists(s) for s in etapa['salidas'])
+                if not forzar and salidas_ok and estado.get(nombre) == huella:
+                    reporte[nombre] = {'estado': 'sin cambios', 'segundos': 0.0}
+                    print(f"= {nombre}: entradas sin cambios, se salta")
+                    continue
+
+                print(f"▶ {nombre}")
+                futuro = executor.submit(ejecutar_etapa, nombre, etapa, entorno, workers_etapa)
+                en_curso[futuro] = (nombre, time.time())
+
+            if not en_curso:
+                continue
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                nombre, inicio = en_curso.pop(futuro)
+                codigo, segundos, ruta_log = futuro.result()
+                reporte[nombre] = {'estado': 'ok' if codigo == 0 else 'error', 'segundos': round(segundos, 2),
+                                   'inicio': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(inicio)),
+                                   'log': ruta_log}
+                if codigo == 0:
+                    # La huella se recalcula al terminar: las etapas siguientes ven las salidas nuevas
+                    estado[nombre] = huella_etapa(etapas[nombre])
+                    guardar_estado(estado)
+                    print(f"✓ {nombre} ({segundos:.1f} s)")
+                else:
+                    estado.pop(nombre, None)
+                    guardar_estado(estado)
+                    print(f"✗ {nombre} falló (código {codigo}), ver {ruta_log}")
+
+    return reporte
+
+
+def main(args):
+    etapas = definir_etapas(args)
+    if args.solo:
+        # Solo las etapas pedidas y sus dependencias
+        elegidas = set()
+        por_revisar = list(args.solo)
+        while por_revisar:
+            nombre = por_revisar.pop()
+            if nombre not in elegidas:
+                elegidas.add(nombre)
+                por_revisar.extend(etapas[nombre]['depende'])
+        etapas = {n: e for n, e in etapas.items() if n in elegidas}
+
+    inicio = time.perf_counter()
+    entorno = dict(os.environ, MPLBACKEND='Agg', DENGUE_DATOS_FILTRADOS=args.datos_filtrados)
+    reporte = ejecutar_pipeline(etapas, entorno, workers=args.workers, forzar=args.forzar,
+                                 workers_etapa=args.workers_etapa)
+    total = time.perf_counter() - inicio
+
+    print("\n🔹 Tiempos por etapa:")
+    for nombre in etapas:
+        r = reporte[nombre]
+        print(f"  {nombre:<16} {r['estado']:<12} {r['segundos']:>8.1f} s")
+    print(f"  {'total':<16} {'':<12} {total:>8.1f} s")
+
+    with open(RUTA_REPORTE, 'w', encoding='utf-8') as f:
+        json.dump({'total_segundos': round(total, 2), 'etapas': reporte}, f, indent=2, ensure_ascii=False)
+    return 0 if all(r['estado'] in ('ok', 'sin cambios') for r in reporte.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline de predicción de dengue: filtrado, modelos y mapas.")
+    parser.add_argument('--datos-originales', default=DATOS_ORIGINALES)
+    parser.add_argument('--datos-filtrados', default=DATOS_FILTRADOS)
+    parser.add_argument('--por-bloques', action='store_true', help="Filtrar el CSV original por bloques")
+    parser.add_argument('--workers', type=int, default=min(MAX_ETAPAS_PARALELAS, os.cpu_count() or 1),
+                        help="Etapas que pueden correr a la vez")
+    parser.add_argument('--workers-etapa', type=int, default=None,
+                        help="Procesos por etapa de modelo (por defecto, núcleos / etapas a la vez)")
+    parser.add_argument('--solo', nargs='+', choices=['filtrar_datos', 'modelo_arima', 'modelo_lstm',
+                                                      'modelo_prophet', 'modelo_dep_map', 'graf_map'],
+                        help="Ejecutar solo estas etapas (y sus dependencias)")
+    parser.add_argument('--forzar', action='store_true', help="Ejecutar aunque las entradas no hayan cambiado")
+    sys.exit(main(parser.parse_args()))
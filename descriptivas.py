@@ -1,8 +1,202 @@
+import hashlib
+import io
+import time
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from enaho_carga import COLUMNA_GASTO, COLUMNAS, columnas_archivo, leer_enaho
+from enaho_consultas import AGREGACIONES, MAX_CATEGORIAS, asegurar_parquet, catalogo_parquet, opciones_tabla, tabla_cruzada
+from enaho_memoria import estimar_lectura_original, medir_etapa, memoria_proceso, tabla_mediciones
+from enaho_motor import preparar, texto_narrativa
+from enaho_resumen import ResumenElectricidad
+from enaho_ponderado import COLUMNA_FACTOR, comparar, leer_archivos
+
+expected_columns = COLUMNAS
+
+# Archivos distintos que se mantienen en cache por etapa; al superarlo se descarta el usado hace más tiempo
+MAX_ARCHIVOS_CACHE = 4
+
+
+def huella_archivo(uploaded_file):
+    # Hash SHA-256 del contenido subido; se calcula una sola vez por archivo y sesión
+    archivo_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    huellas = st.session_state.setdefault('huellas_archivos', {})
+    if archivo_id not in huellas:
+        huellas[archivo_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return huellas[archivo_id]
+
+
+# Las etapas se guardan en cache con la huella del contenido como clave; el contenido se pasa
+# con prefijo "_" para que Streamlit no lo vuelva a hashear en cada rerun.
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner="Leyendo el archivo...")
+def cargar_archivo(huella, _contenido):
+    """Solo las columnas requeridas, con tipos compactos, y la medición de la lectura; None si faltan columnas."""
+    fuente = io.BytesIO(_contenido)
+    if not all(col in columnas_archivo(fuente) for col in expected_columns):
+        return None
+    # Los campos con solo espacios se leen como NaN y los textos no numéricos se convierten a NaN
+    return medir_etapa("Lectura (3 columnas, Int8/float32)", leer_enaho, fuente)
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner="Filtrando filas válidas...")
+def filtrar_datos(huella, _contenido):
+    """Filas válidas (gasto vacío como 0), total de filas, vacíos y mediciones; None si faltan columnas."""
+    cargado = cargar_archivo(huella, _contenido)
+    if cargado is None:
+        return None
+    df, medicion_lectura = cargado
+    resultado, medicion_filtro = medir_etapa("Filtrado de filas válidas (df_clean)", preparar, df)
+    return resultado, [medicion_lectura, medicion_filtro]
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner="Calculando el resumen...")
+def resumir_datos(huella, _contenido):
+    """Resumen de los pasos 2 a 4 (conteos, medias, cruce y sketch del gasto); None si faltan columnas."""
+    filtrado = filtrar_datos(huella, _contenido)
+    if filtrado is None:
+        return None
+    resultado, mediciones = filtrado
+    resumen, medicion = medir_etapa("Resumen (conteos, cruce y sketch)", ResumenElectricidad.desde_dataframe, *resultado)
+    resumen.mediciones = mediciones + [medicion]
+    return resumen
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner=False)
+def estimar_original(huella, filas_totales, _contenido):
+    return estimar_lectura_original(_contenido, filas_totales)
+
+
+def mostrar_memoria(resumen, huella, contenido):
+    # Panel de instrumentación: memoria y tiempo de cada etapa frente a la lectura original
+    with st.expander("Uso de memoria y tiempos"):
+        tabla = tabla_mediciones(resumen.mediciones)
+        st.dataframe(tabla.round({'memoria_mb': 3, 'segundos': 3}), hide_index=True)
+
+        original = estimar_original(huella, resumen.total_filas, contenido)
+        actual = resumen.mediciones[0]['bytes']
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Lectura original (estimada)", f"{original / 1024 ** 2:.1f} MB")
+        col2.metric("Lectura actual", f"{actual / 1024 ** 2:.1f} MB")
+        col3.metric("Reducción", f"{original / actual:.1f}×" if actual else "-")
+        st.caption("La lectura original (todas las columnas como texto, antes de df.replace) se estima "
+                   f"leyendo una muestra del archivo. Archivo subido: {len(contenido) / 1024 ** 2:.1f} MB.")
+        rss = memoria_proceso()
+        if rss is not None:
+            st.caption(f"Memoria del proceso de Streamlit (todas las sesiones): {rss / 1024 ** 2:.0f} MB")
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE * 8, show_spinner=False)
+def figura_png(huella, nombre, _contenido):
+    # Cada figura se dibuja una sola vez por archivo; en los reruns se reutiliza el PNG
+    return resumir_datos(huella, _contenido).png(nombre)
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner="Leyendo las columnas del archivo...")
+def catalogo_consultas(ruta_parquet):
+    return catalogo_parquet(ruta_parquet)
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE * 16, show_spinner="Consultando...")
+def consultar_tabla(ruta_parquet, filas, columnas, medida, agregacion, solo_validos):
+    inicio = time.perf_counter()
+    tabla = tabla_cruzada(ruta_parquet, filas, columnas, medida, agregacion, solo_validos)
+    return tabla, time.perf_counter() - inicio
+
+
+def mostrar_tabla_cruzada(huella, contenido):
+    st.header("Tabla cruzada de variables")
+    # La conversión a Parquet recorre todo el CSV: solo se hace si se abre la sección
+    if not st.checkbox("Calcular tablas cruzadas con este archivo", key="abrir_tabla_cruzada"):
+        return
+    # El CSV se convierte a Parquet una vez por contenido (y otra vez si la limpieza de la carpeta lo
+    # borró); las tablas cruzadas leen solo las columnas que usan
+    with st.spinner("Preparando el archivo para consultas..."):
+        ruta_parquet = asegurar_parquet(contenido, huella)
+    catalogo = catalogo_consultas(ruta_parquet)
+    categoricas, medidas = opciones_tabla(catalogo)
+    if not categoricas:
+        st.info("El archivo no tiene variables con pocas categorías para cruzar.")
+        return
+
+    col1, col2 = st.columns(2)
+    filas = col1.selectbox("Filas", categoricas, index=categoricas.index('P1121') if 'P1121' in categoricas else 0)
+    opciones_columnas = ["(ninguna)"] + [c for c in categoricas if c != filas]
+    columnas = col2.selectbox("Columnas", opciones_columnas,
+                              index=opciones_columnas.index('P112A') if 'P112A' in opciones_columnas else 0)
+    columnas = None if columnas == "(ninguna)" else columnas
+
+    col1, col2 = st.columns(2)
+    agregacion = col1.selectbox("Agregación", list(AGREGACIONES), index=list(AGREGACIONES).index('media'))
+    medida = None
+    if agregacion != 'conteo':
+        if not medidas:
+            st.info("El archivo no tiene variables numéricas para agregar.")
+            return
+        medida = col2.selectbox("Medida", medidas,
+                                index=medidas.index(COLUMNA_GASTO) if COLUMNA_GASTO in medidas else 0)
+    con_columnas = all(col in catalogo['columna'].values for col in expected_columns)
+    solo_validos = st.checkbox("Solo filas válidas del análisis (gasto vacío como 0)", value=con_columnas,
+                               disabled=not con_columnas)
+
+    try:
+        tabla, segundos = consultar_tabla(ruta_parquet, filas, columnas, medida, agregacion, solo_validos)
+    except Exception as e:
+        st.error(f"No se pudo calcular la tabla: {e}")
+        return
+    st.dataframe(tabla.round(2))
+    st.caption(f"Calculada con DuckDB en {segundos:.2f} s. Como filas y columnas se ofrecen las variables "
+               f"con hasta {MAX_CATEGORIAS} valores distintos.")
+
+
+@st.cache_data(max_entries=MAX_ARCHIVOS_CACHE, show_spinner="Leyendo los archivos en paralelo...")
+def comparar_archivos(huellas, columna_factor, columna_geo, _fuentes):
+    """Tablas ponderadas por año (y zona) de varios módulos; la clave son las huellas de los archivos."""
+    return comparar(leer_archivos(_fuentes, columna_factor, columna_geo))
+
+
+def mostrar_comparacion():
+    st.header("Comparación ponderada entre años")
+    archivos = st.file_uploader("Carga los módulos ENAHO de varios años (CSV con factor de expansión)",
+                                type=["csv"], accept_multiple_files=True, key="archivos_comparacion")
+    if not archivos:
+        st.info("Carga uno o más archivos para comparar años con el factor de expansión.")
+        return
+
+    columnas = None
+    for archivo in archivos:
+        encabezado = columnas_archivo(io.BytesIO(archivo.getvalue()))
+        columnas = encabezado if columnas is None else [c for c in columnas if c in encabezado]
+    if not all(col in columnas for col in expected_columns):
+        st.error("Todos los archivos deben contener las columnas: P1121, P112A, P1172$02")
+        return
+
+    opciones = [c for c in columnas if c not in expected_columns]
+    columna_factor = st.selectbox("Factor de expansión", opciones,
+                                  index=opciones.index(COLUMNA_FACTOR) if COLUMNA_FACTOR in opciones else 0)
+    columna_geo = st.selectbox("Agrupar también por (UBIGEO se agrupa por departamento)",
+                               ["(ninguna)"] + opciones)
+    columna_geo = None if columna_geo == "(ninguna)" else columna_geo
+
+    huellas = tuple(huella_archivo(archivo) for archivo in archivos)
+    try:
+        tablas = comparar_archivos(huellas, columna_factor, columna_geo,
+                                   [(archivo.name, archivo.getvalue()) for archivo in archivos])
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    st.subheader("Hogares con electricidad para alumbrado (%)")
+    st.line_chart(tablas['p1121']['pct_con_electricidad'].unstack('zona'))
+    st.dataframe(tablas['p1121'].round(2))
+
+    st.subheader("Tipo de conexión entre hogares con electricidad (%)")
+    st.dataframe(tablas['p112a'].round(2))
+
+    st.subheader("Gasto mensual en electricidad (S/), ponderado")
+    st.line_chart(tablas['gasto']['media'].unstack('zona'))
+    st.dataframe(tablas['gasto'].round(2))
+
 
 # Configuración de la página
 st.set_page_config(page_title="Análisis de Electricidad", layout="centered")
@@ -13,47 +207,20 @@ st.header("Cargar archivo CSV")
 uploaded_file = st.file_uploader("Carga tu archivo CSV con las columnas: P1121, P112A, P1172$02", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(
-        uploaded_file,
-        sep=",",
-        na_values=["", "  ", "   ", "    "],
-        keep_default_na=False
-    )
-
-    # Reemplazar espacios en blanco por NaN
-    df = df.replace(r'^\s+$', np.nan, regex=True)
-
-    expected_columns = ['P1121', 'P112A', 'P1172$02']
-    if all(col in df.columns for col in expected_columns):
-        df = df[expected_columns].copy()
-
-        # Convertir a numérico y manejar errores
-        df['P1121'] = pd.to_numeric(df['P1121'], errors='coerce')
-        df['P112A'] = pd.to_numeric(df['P112A'], errors='coerce')
-        df['P1172$02'] = pd.to_numeric(df['P1172$02'], errors='coerce')
-
-        total_filas = df.shape[0]
-        vacios_p1121 = df['P1121'].isna().sum()
-        vacios_p112a = df['P112A'].isna().sum()
-        vacios_p1172 = df['P1172$02'].isna().sum()
-        
-        tiene_p1121_valido = df['P1121'].notna()
-        es_sin_electricidad = df['P1121'] == 0
-        es_con_electricidad = df['P1121'] == 1
-        tiene_p112a_valido = df['P112A'].notna()
-        
-        # Condición para filtrar filas válidas para análisis
-        condicion_final = (
-            tiene_p1121_valido & 
-            (es_sin_electricidad | (es_con_electricidad & tiene_p112a_valido))
-        )
-        
-        df_clean = df[condicion_final].copy()
-        
-        filas_eliminadas = total_filas - df_clean.shape[0]
-
-        # Llenar valores NaN en gasto mensual con 0
-        df_clean['P1172$02'] = df_clean['P1172$02'].fillna(0)
+    huella = huella_archivo(uploaded_file)
+    contenido = uploaded_file.getvalue()
+    resumen = resumir_datos(huella, contenido)
+
+    def mostrar_figura(nombre):
+        st.image(figura_png(huella, nombre, contenido))
+
+    if resumen is not None:
+        total_filas = resumen.total_filas
+        vacios_p1121 = resumen.vacios['P1121']
+        vacios_p112a = resumen.vacios['P112A']
+        vacios_p1172 = resumen.vacios['P1172$02']
+
+        filas_eliminadas = total_filas - resumen.filas_validas
 
         st.header("Paso 1: Limpieza de datos y detección de outliers")
         st.markdown(f"""
@@ -61,26 +228,21 @@ if uploaded_file:
         - Vacíos encontrados en P1121: **{vacios_p1121}**
         - Vacíos encontrados en P112A: **{vacios_p112a}**
         - Vacíos encontrados en P1172$02: **{vacios_p1172}**
-        - **Filas finales para análisis: {df_clean.shape[0]}**
+        - **Filas finales para análisis: {resumen.filas_validas}**
         """)
 
-        # Función para detectar outliers usando el método IQR
-        def detectar_outliers(series):
-            q1 = series.quantile(0.25)
-            q3 = series.quantile(0.75)
-            iqr = q3 - q1
-            lim_inf = q1 - 1.5 * iqr
-            lim_sup = q3 + 1.5 * iqr
-            return series[(series < lim_inf) | (series > lim_sup)]
-
-        outliers_p1172 = detectar_outliers(df_clean['P1172$02'].dropna())
+        # Outliers por el método IQR, desde el sketch del gasto
+        sketch_gasto = resumen.sketch_gasto
+        n_outliers_p1172 = sketch_gasto.contar_outliers()
 
         st.markdown("### Resumen de Outliers Detectados")
         st.markdown(f"""
-        - Outliers en **P1172$02 (gasto mensual)**: {len(outliers_p1172)} {'Ninguno' if len(outliers_p1172) == 0 else ''}
+        - Outliers en **P1172$02 (gasto mensual)**: {n_outliers_p1172} {'Ninguno' if n_outliers_p1172 == 0 else ''}
         """)
+        if not sketch_gasto.exacto:
+            st.caption(f"Cuartiles y outliers aproximados (error relativo ≤ {sketch_gasto.error_relativo:.0%}).")
 
-        valores_p1121 = df_clean['P1121'].value_counts().sort_index()
+        mostrar_memoria(resumen, huella, contenido)
 
         if 'step' not in st.session_state:
             st.session_state.step = 1
@@ -93,23 +255,10 @@ if uploaded_file:
             st.header("Paso 2: Estadísticas descriptivas")
 
             st.subheader("Tipo de Alumbrado (P1121)")
-            conteo_p1121 = df_clean['P1121'].value_counts().sort_index()
-
-            tabla_p1121 = pd.DataFrame({
-                'Valor': [0, 1],
-                'Descripción': ['Sin electricidad', 'Con electricidad'],
-                'Cantidad': [conteo_p1121.get(0, 0), conteo_p1121.get(1, 0)]
-            })
-            st.table(tabla_p1121)
+            st.table(resumen.tabla_p1121())
 
             # Gráfico de barras para tipo de alumbrado
-            fig, ax = plt.subplots()
-            sns.barplot(x='Descripción', y='Cantidad', data=tabla_p1121, ax=ax)
-            ax.set_title("Distribución del Tipo de Alumbrado")
-            ax.set_xlabel("Tipo de Alumbrado")
-            ax.set_ylabel("Número de Hogares")
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            mostrar_figura('barras_p1121')
 
             st.markdown("""
             ¿Qué muestra este gráfico?  
@@ -119,27 +268,11 @@ if uploaded_file:
             st.subheader("Tipo de Conexión Eléctrica (P112A)")
             st.write("*Nota: Solo se considera para hogares con electricidad*")
 
-            df_con_electricidad = df_clean[df_clean['P1121'] == 1]
-
-            if len(df_con_electricidad) > 0:
-                labels_p112a = {1: 'Exclusivo', 2: 'Colectivo', 3: 'Otro'}
-                conteo_p112a = df_con_electricidad['P112A'].value_counts().sort_index()
-
-                tabla_p112a = pd.DataFrame({
-                    'Valor': [1, 2, 3],
-                    'Descripción': ['Exclusivo', 'Colectivo', 'Otro'],
-                    'Cantidad': [conteo_p112a.get(1, 0), conteo_p112a.get(2, 0), conteo_p112a.get(3, 0)]
-                })
-                st.table(tabla_p112a)
+            if resumen.hogares_con_electricidad > 0:
+                st.table(resumen.tabla_p112a())
 
                 # Gráfico de barras para tipo de conexión
-                fig, ax = plt.subplots()
-                sns.barplot(x='Descripción', y='Cantidad', data=tabla_p112a, ax=ax)
-                ax.set_title("Distribución del Tipo de Conexión Eléctrica")
-                ax.set_xlabel("Tipo de Conexión")
-                ax.set_ylabel("Número de Hogares")
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
+                mostrar_figura('barras_p112a')
 
                 st.markdown("""
                 ¿Qué muestra este gráfico?  
@@ -150,32 +283,10 @@ if uploaded_file:
                 st.write("No hay hogares con electricidad en los datos.")
 
             st.subheader("Gasto Mensual en Electricidad (P1172$02)")
-            stats = df_clean['P1172$02'].describe(percentiles=[0.25, 0.5, 0.75]).to_dict()
-            stats['varianza'] = df_clean['P1172$02'].var()
-
-            resumen = pd.DataFrame({
-                'Estadística': ['Recuento', 'Promedio', 'Desviación estándar', 'Valor mínimo', 'Primer cuartil (25%)', 'Mediana (50%)', 'Tercer cuartil (75%)', 'Valor máximo', 'Varianza'],
-                'Valor': [
-                    int(stats['count']),
-                    round(stats['mean'], 2),
-                    round(stats['std'], 2),
-                    stats['min'],
-                    stats['25%'],
-                    stats['50%'],
-                    stats['75%'],
-                    stats['max'],
-                    round(stats['varianza'], 2)
-                ]
-            })
-            st.table(resumen)
+            st.table(resumen.tabla_gasto())
 
             # Histograma del gasto mensual
-            fig1, ax1 = plt.subplots()
-            sns.histplot(df_clean['P1172$02'], kde=False, bins=30, ax=ax1, color='skyblue')
-            ax1.set_title("Histograma del Gasto Mensual en Electricidad")
-            ax1.set_xlabel("Gasto Mensual (S/)")
-            ax1.set_ylabel("Número de Hogares")
-            st.pyplot(fig1)
+            mostrar_figura('histograma_gasto')
 
             st.markdown("""
             ¿Qué muestra este gráfico?  
@@ -183,11 +294,7 @@ if uploaded_file:
             """)
 
             # Boxplot del gasto mensual
-            fig2, ax2 = plt.subplots()
-            sns.boxplot(x=df_clean['P1172$02'], ax=ax2, color='lightgreen')
-            ax2.set_title("Boxplot del Gasto Mensual en Electricidad")
-            ax2.set_xlabel("Gasto Mensual (S/)")
-            st.pyplot(fig2)
+            mostrar_figura('caja_gasto')
 
             st.markdown("""
             ¿Qué nos muestra este gráfico?  
@@ -201,106 +308,22 @@ if uploaded_file:
             st.header("Paso 3: Visualizaciones adicionales")
 
             st.subheader("Distribución del Tipo de Alumbrado (P1121)")
-            fig, ax = plt.subplots()
-            labels_pie = {0: 'Sin electricidad', 1: 'Con electricidad'}
-            counts_p1121 = df_clean['P1121'].map(labels_pie).value_counts()
-            counts_p1121.plot.pie(autopct='%1.1f%%', ax=ax, legend=True)
-            ax.set_ylabel("")
-            ax.set_title("Distribución del Tipo de Alumbrado")
-            ax.legend(title="Tipo de Alumbrado", loc="best")
-            st.pyplot(fig)
-
-            if len(df_con_electricidad) > 0:
+            mostrar_figura('torta_p1121')
+
+            if resumen.hogares_con_electricidad > 0:
                 st.subheader("Distribución del Tipo de Conexión Eléctrica (P112A)")
-                fig, ax = plt.subplots()
-                labels_p112a = {1: 'Exclusivo', 2: 'Colectivo', 3: 'Otro'}
-                counts_p112a = df_con_electricidad['P112A'].map(labels_p112a).value_counts()
-                counts_p112a = counts_p112a.reindex(labels_p112a.values(), fill_value=0)
-                counts_p112a = counts_p112a[counts_p112a > 0]
-                counts_p112a.plot.pie(autopct='%1.1f%%', ax=ax, legend=True)
-                ax.set_ylabel("")
-                ax.set_title("Distribución del Tipo de Conexión Eléctrica")
-                ax.legend(title="Tipo de Conexión", loc="best")
-                st.pyplot(fig)
+                mostrar_figura('torta_p112a')
             else:
                 st.write("No hay hogares con electricidad para mostrar la distribución de P112A.")
 
             st.subheader("Mapa de calor del Gasto Mensual en Electricidad (P1172$02)")
-            pivot_table = df_clean.pivot_table(
-                index='P1121',
-                columns='P112A',
-                values='P1172$02',
-                aggfunc='mean'
-            )
-
-            pivot_table = pivot_table.reindex(columns=[1, 2, 3])
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            sns.heatmap(pivot_table, annot=True, fmt=".2f", cmap="YlGnBu", cbar_kws={'label': 'Gasto promedio'}, ax=ax)
-            ax.set_xlabel("Tipo de Conexión Eléctrica (P112A)")
-            ax.set_ylabel("Tipo de Alumbrado (P1121)")
-            ax.set_title("Gasto Promedio Mensual según Tipo de Alumbrado y Conexión")
-
-            y_labels_map = {0: 'Sin electricidad (0)', 1: 'Con electricidad (1)'}
-            x_labels_map = {1: 'Exclusivo (1)', 2: 'Colectivo (2)', 3: 'Otro (3)'}
-            ax.set_yticklabels([y_labels_map[i] for i in pivot_table.index], rotation=0)
-            ax.set_xticklabels([x_labels_map[i] for i in pivot_table.columns], rotation=45)
-
-            st.pyplot(fig)
+            mostrar_figura('mapa_calor')
 
         if st.session_state.step >= 4:
             st.header("Paso 4: Storytelling")
 
-            total_hogares = len(df_clean)
-            hogares_con_electricidad = (df_clean['P1121'] == 1).sum()
-            hogares_sin_electricidad = (df_clean['P1121'] == 0).sum()
-
-            pct_con_electricidad = (hogares_con_electricidad / total_hogares) * 100
-            pct_sin_electricidad = (hogares_sin_electricidad / total_hogares) * 100
-
-            gasto_promedio_total = df_clean['P1172$02'].mean()
-            if hogares_con_electricidad > 0:
-                gasto_promedio_con_electricidad = df_clean[df_clean['P1121'] == 1]['P1172$02'].mean()
-            else:
-                gasto_promedio_con_electricidad = 0
-
-            if hogares_sin_electricidad > 0:
-                gasto_promedio_sin_electricidad = df_clean[df_clean['P1121'] == 0]['P1172$02'].mean()
-            else:
-                gasto_promedio_sin_electricidad = 0
-
-            if hogares_con_electricidad > 0:
-                tipos_conexion_counts = df_clean[df_clean['P1121'] == 1]['P112A'].value_counts(normalize=True) * 100
-                tipo_exclusivo = tipos_conexion_counts.get(1, 0)
-                tipo_colectivo = tipos_conexion_counts.get(2, 0)
-                tipo_otro = tipos_conexion_counts.get(3, 0)
-            else:
-                tipo_exclusivo = tipo_colectivo = tipo_otro = 0
-
             # Narrativa final basada en los datos procesados
-            st.markdown(f"""
-            ## ¿Qué nos dicen los datos sobre el acceso a la electricidad en los hogares peruanos?
-
-            ### Hogares con y sin electricidad
-            De los {total_hogares:,} hogares analizados, **casi {pct_con_electricidad:.1f}%** tienen acceso a electricidad para alumbrado, lo que significa que pueden iluminar sus casas con energía eléctrica. Sin embargo, **un {pct_sin_electricidad:.1f}%** todavía vive sin este servicio básico, lo que afecta su calidad de vida y oportunidades.
-
-            ### ¿Cómo se conectan a la electricidad los hogares que sí la tienen?
-            Entre los hogares con electricidad, la mayoría usa conexiones **exclusivas** (es decir, una conexión propia), mientras que otros usan conexiones **colectivas** o de otro tipo. Esto influye en la manera como consumen y pagan la electricidad.
-
-            ### ¿Cuánto gastan en electricidad?
-            El gasto promedio mensual es de S/ {gasto_promedio_total:.2f}. Los hogares con electricidad gastan, en promedio, S/ {gasto_promedio_con_electricidad:.2f} al mes, mientras que los hogares sin electricidad tienen un gasto cercano a cero, lo que refleja su falta de acceso.
-
-            ### ¿Por qué es importante esta información?
-            La falta de electricidad afecta la educación, la seguridad, la salud y las actividades económicas en las familias. El hecho de que aún haya un porcentaje importante sin acceso indica que es necesario continuar con programas que lleven electricidad a todos los hogares, especialmente en zonas rurales y vulnerables.
-
-            ### En resumen:
-            - La mayoría de los hogares en Perú ya cuenta con electricidad para alumbrado, pero no todos.
-            - Hay diferentes tipos de conexiones, y eso puede influir en el consumo y gasto.
-            - Entender quién tiene y quién no tiene electricidad ayuda a diseñar mejores políticas públicas.
-            - Los datos muestran una oportunidad clara para mejorar el acceso y apoyar a las familias que aún no cuentan con este servicio básico.
-
-            Con estos gráficos y datos, podemos ver no solo números, sino las historias de millones de hogares peruanos y su relación con la electricidad, un recurso vital para el desarrollo.
-            """)
+            st.markdown(texto_narrativa(resumen))
 
 
         if st.session_state.step < 4:
@@ -308,6 +331,9 @@ if uploaded_file:
 
     else:
         st.error("El archivo no contiene todas las columnas requeridas: P1121, P112A, P1172$02")
+
+    mostrar_tabla_cruzada(huella, contenido)
 else:
     st.info("Por favor, carga un archivo CSV para comenzar el análisis.")
 
+mostrar_comparacion()
@@ -0,0 +1,175 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from enaho_sketch import SketchGasto
+
+# Lectura del módulo ENAHO leyendo solo las columnas que usa el análisis de electricidad,
+# con tipos compactos y, para archivos grandes, por bloques.
+
+COLUMNAS = ['P1121', 'P112A', 'P1172$02']
+COLUMNAS_CODIGO = ['P1121', 'P112A']
+COLUMNA_GASTO = 'P1172$02'
+
+# Filas por bloque al procesar archivos que no entran en memoria
+TAMANO_BLOQUE = 500_000
+
+
+def rebobinar(fuente):
+    # Archivos subidos / BytesIO se pueden releer; las rutas se abren de nuevo en cada lectura
+    if hasattr(fuente, 'seek'):
+        fuente.seek(0)
+    return fuente
+
+
+def columnas_archivo(fuente):
+    """Encabezado del CSV (sin leer datos)."""
+    columnas = pd.read_csv(rebobinar(fuente), nrows=0).columns.tolist()
+    rebobinar(fuente)
+    return columnas
+
+
+def leer_csv(fuente, tamano_bloque, robusto, extras=()):
+    # skipinitialspace convierte los campos con solo espacios en vacíos, que se leen como NA
+    opciones = dict(sep=",", usecols=COLUMNAS + list(extras), skipinitialspace=True,
+                    na_values=[""], keep_default_na=False, chunksize=tamano_bloque)
+    if robusto:
+        # Hay textos no numéricos: se leen como texto y se convierten con errors='coerce'
+        return pd.read_csv(rebobinar(fuente), dtype=str, **opciones)
+    tipos = {col: 'float32' for col in COLUMNAS}
+    tipos.update({col: str for col in extras})
+    return pd.read_csv(rebobinar(fuente), dtype=tipos, **opciones)
+
+
+def compactar(df, extras=()):
+    """P1121/P112A como códigos Int8 (NA si no son enteros válidos) y el gasto como float32.
+
+    Las columnas de `extras` (factor de expansión, año, ubigeo...) se devuelven como texto.
+    """
+    salida = {}
+    for col in COLUMNAS_CODIGO:
+        valores = pd.to_numeric(df[col], errors='coerce').astype('float32')
+        validos = (valores == np.round(valores)) & (valores.abs() <= 127)
+        salida[col] = valores.where(validos).astype('Int8')
+    salida[COLUMNA_GASTO] = pd.to_numeric(df[COLUMNA_GASTO], errors='coerce').astype('float32')
+    for col in extras:
+        salida[col] = df[col]
+    return pd.DataFrame(salida, index=df.index)
+
+
+def leer_bloques(fuente, tamano_bloque=TAMANO_BLOQUE, extras=()):
+    """Genera bloques con las tres columnas ya convertidas a tipos compactos.
+
+    Primero se intenta leer directamente como números; si aparece texto no numérico se
+    reinicia la lectura en modo texto, saltando los bloques que ya se entregaron.
+    """
+    entregados = 0
+    try:
+        for bloque in leer_csv(fuente, tamano_bloque, robusto=False, extras=extras):
+            yield compactar(bloque, extras)
+            entregados += 1
+        return
+    except ValueError:
+        if isinstance(fuente, io.IOBase) and not fuente.seekable():
+            raise
+    for i, bloque in enumerate(leer_csv(fuente, tamano_bloque, robusto=True, extras=extras)):
+        if i >= entregados:
+            yield compactar(bloque, extras)
+
+
+def leer_enaho(fuente, tamano_bloque=TAMANO_BLOQUE, extras=()):
+    """Las tres columnas completas en un DataFrame compacto (se arma bloque a bloque)."""
+    bloques = list(leer_bloques(fuente, tamano_bloque, extras))
+    if not bloques:
+        return compactar(pd.DataFrame(columns=COLUMNAS + list(extras)), extras)
+    return pd.concat(bloques, ignore_index=True)
+
+
+def condicion_valida(df):
+    # Con P1121 válido y, si tiene electricidad, también P112A
+    return df['P1121'].notna() & (
+        (df['P1121'] == 0) | ((df['P1121'] == 1) & df['P112A'].notna())
+    ).fillna(False)
+
+
+def filtrar_validos(df):
+    """Filas válidas para el análisis, con el gasto vacío como 0.
+
+    Cada columna se filtra una sola vez y el DataFrame se arma sin copiarlas de nuevo
+    (antes: filtrado + .copy() + reasignación del gasto); el índice se renumera.
+    """
+    mascara = condicion_valida(df).to_numpy(dtype=bool)
+    columnas = {col: df[col].array[mascara] for col in df.columns}
+    gasto = columnas[COLUMNA_GASTO].to_numpy()
+    gasto[np.isnan(gasto)] = 0  # el arreglo filtrado ya es una copia
+    columnas[COLUMNA_GASTO] = gasto
+    return pd.DataFrame(columnas, copy=False)
+
+
+def resumen_por_bloques(fuente, tamano_bloque=TAMANO_BLOQUE):
+    """Conteos y agregados del análisis acumulados bloque a bloque, sin cargar el archivo entero.
+
+    El gasto se acumula en float64 (sumas, sumas de cuadrados) para no perder precisión;
+    sus cuantiles, histograma y outliers salen del sketch combinable ('sketch_gasto').
+    """
+    total_filas = 0
+    vacios = pd.Series(0, index=COLUMNAS, dtype='int64')
+    conteo_p1121 = pd.Series(dtype='int64')
+    conteo_p112a = pd.Series(dtype='int64')
+    gasto = pd.DataFrame(columns=['n', 'suma', 'suma_cuadrados', 'minimo', 'maximo'], dtype='float64')
+    cruce = None
+    sketch = SketchGasto()
+
+    for bloque in leer_bloques(fuente, tamano_bloque):
+        total_filas += len(bloque)
+        vacios += bloque.isna().sum()
+
+        validos = filtrar_validos(bloque)
+        conteo_p1121 = conteo_p1121.add(validos['P1121'].value_counts(), fill_value=0)
+        con_electricidad = validos[validos['P1121'] == 1]
+        conteo_p112a = conteo_p112a.add(con_electricidad['P112A'].value_counts(), fill_value=0)
+
+        g = validos[COLUMNA_GASTO].astype('float64')
+        sketch.agregar(g.to_numpy())
+        parcial = g.groupby(validos['P1121']).agg(['count', 'sum', 'min', 'max'])
+        parcial['suma_cuadrados'] = (g ** 2).groupby(validos['P1121']).sum()
+        parcial = parcial.rename(columns={'count': 'n', 'sum': 'suma', 'min': 'minimo', 'max': 'maximo'})
+        gasto = combinar_gasto(gasto, parcial)
+
+        parcial_cruce = g.groupby([validos['P1121'], validos['P112A']]).agg(['count', 'sum'])
+        parcial_cruce = parcial_cruce.rename(columns={'count': 'n', 'sum': 'suma'})
+        cruce = parcial_cruce if cruce is None else cruce.add(parcial_cruce, fill_value=0)
+
+    n_total = gasto['n'].sum()
+    suma_total = gasto['suma'].sum()
+    media = suma_total / n_total if n_total else np.nan
+    varianza = ((gasto['suma_cuadrados'].sum() - n_total * media ** 2) / (n_total - 1)
+                if n_total > 1 else np.nan)
+    gasto['media'] = gasto['suma'] / gasto['n']
+
+    return {
+        'total_filas': total_filas,
+        'vacios': vacios.astype(int).to_dict(),
+        'filas_validas': int(n_total),
+        'conteo_p1121': conteo_p1121.astype(int).sort_index(),
+        'conteo_p112a': conteo_p112a.astype(int).sort_index(),
+        'gasto_por_p1121': gasto.sort_index(),
+        'gasto_total': {'n': int(n_total), 'media': media, 'varianza': varianza,
+                        'minimo': gasto['minimo'].min(), 'maximo': gasto['maximo'].max()},
+        'sketch_gasto': sketch,
+        'gasto_medio_cruce': (cruce['suma'] / cruce['n']).unstack() if cruce is not None else pd.DataFrame(),
+    }
+
+
+def combinar_gasto(acumulado, parcial):
+    # Suma n, suma y suma de cuadrados; mínimo y máximo se combinan aparte
+    if acumulado.empty:
+        return parcial[acumulado.columns].astype('float64')
+    indice = acumulado.index.union(parcial.index)
+    a = acumulado.reindex(indice)
+    p = parcial.reindex(indice)
+    combinado = a[['n', 'suma', 'suma_cuadrados']].add(p[['n', 'suma', 'suma_cuadrados']], fill_value=0)
+    combinado['minimo'] = np.fmin(a['minimo'], p['minimo'])
+    combinado['maximo'] = np.fmax(a['maximo'], p['maximo'])
+    return combinado[acumulado.columns]
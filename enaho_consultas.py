@@ -0,0 +1,253 @@
+import argparse
+import os
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+from enaho_carga import COLUMNA_GASTO
+
+# Tablas cruzadas de cualquier variable del módulo ENAHO con DuckDB (motor SQL columnar en proceso).
+# El CSV se convierte una sola vez a Parquet con tipos detectados; cada consulta lee solo las
+# columnas que usa y devuelve ya agregada, sin cargar el archivo completo en pandas.
+#
+# Uso:
+#   python enaho_consultas.py enaho_2023.csv --filas P1121 --columnas P112A --medida 'P1172$02' --agregacion media
+
+AGREGACIONES = {
+    'conteo': 'count(*)',
+    'suma': 'sum({medida})',
+    'media': 'avg({medida})',
+    'mediana': 'median({medida})',
+    'minimo': 'min({medida})',
+    'maximo': 'max({medida})',
+    'desviacion': 'stddev_samp({medida})',
+}
+
+# Variables con más valores distintos no se ofrecen como filas/columnas de la tabla
+MAX_CATEGORIAS = 60
+
+ETIQUETA_TOTAL = 'Total'
+ETIQUETA_VACIO = '(vacío)'
+
+# Parquet de los archivos subidos: se borran los usados hace más tiempo (por fecha de modificación,
+# que se renueva en cada uso) cuando la carpeta supera el tamaño o superan la edad máxima
+CARPETA_PARQUET = os.path.join(tempfile.gettempdir(), 'enaho_consultas')
+MAX_BYTES_PARQUET = 2 * 1024 ** 3
+MAX_SEGUNDOS_PARQUET = 24 * 60 * 60
+
+
+def columna_sql(nombre):
+    # Los nombres ENAHO traen $ y Ñ: siempre entre comillas dobles
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def texto_sql(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def convertir_a_parquet(ruta_csv, ruta_parquet):
+    """Convierte el CSV a Parquet detectando el tipo de cada columna.
+
+    Los campos vacíos o con solo espacios quedan como NULL. Una columna es entera si todos sus
+    valores lo son (salvo códigos con ceros a la izquierda, como UBIGEO, que quedan como texto),
+    decimal si todos son números, y texto en otro caso.
+    """
+    con = duckdb.connect()
+    try:
+        con.execute(f"CREATE VIEW crudo AS SELECT * FROM read_csv({texto_sql(ruta_csv)}, header=true, all_varchar=true)")
+        nombres = [fila[0] for fila in con.execute("DESCRIBE crudo").fetchall()]
+        limpios = {n: f"NULLIF(trim({columna_sql(n)}), '')" for n in nombres}
+
+        # Una sola pasada para decidir el tipo de todas las columnas
+        consultas = []
+        for n in nombres:
+            x = limpios[n]
+            consultas += [f"count({x})",
+                          f"count(CASE WHEN regexp_full_match({x}, '-?[0-9]+') THEN 1 END)",
+                          f"count(TRY_CAST({x} AS DOUBLE))",
+                          f"bool_or(regexp_full_match({x}, '0[0-9]+'))"]
+        conteos = con.execute(f"SELECT {', '.join(consultas)} FROM crudo").fetchone()
+
+        expresiones = []
+        for i, n in enumerate(nombres):
+            total, enteros, numeros, ceros = conteos[4 * i:4 * i + 4]
+            if total and enteros == total and not ceros:
+                tipo = 'BIGINT'
+            elif total and numeros == total and not ceros:
+                tipo = 'DOUBLE'
+            else:
+                tipo = 'VARCHAR'
+            expresiones.append(f"CAST({limpios[n]} AS {tipo}) AS {columna_sql(n)}")
+        con.execute(f"COPY (SELECT {', '.join(expresiones)} FROM crudo) TO {texto_sql(ruta_parquet)} (FORMAT parquet)")
+    finally:
+        con.close()
+
+
+def catalogo_parquet(ruta_parquet):
+    """Columnas del Parquet con su tipo y valores distintos (aproximados)."""
+    con = duckdb.connect()
+    try:
+        origen = f"read_parquet({texto_sql(ruta_parquet)})"
+        esquema = con.execute(f"DESCRIBE SELECT * FROM {origen}").fetchall()
+        nombres = [fila[0] for fila in esquema]
+        distintos = con.execute("SELECT " + ', '.join(f"approx_count_distinct({columna_sql(n)})" for n in nombres)
+                                + f" FROM {origen}").fetchone()
+    finally:
+        con.close()
+    return pd.DataFrame({'columna': nombres, 'tipo': [fila[1] for fila in esquema], 'distintos': distintos})
+
+
+def limpiar_carpeta(carpeta, conservar=None, max_bytes=MAX_BYTES_PARQUET, max_segundos=MAX_SEGUNDOS_PARQUET):
+    """Borra los Parquet vencidos y, si la carpeta sigue sobre max_bytes, los usados hace más tiempo."""
+    ahora = time.time()
+    archivos = []
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:  # otra sesión lo borró o lo renombró
+            continue
+        if nombre.endswith('.parquet'):
+            archivos.append((info.st_mtime, info.st_size, ruta))
+        elif ahora - info.st_mtime > max_segundos:
+            archivos.append((0, info.st_size, ruta))  # temporales abandonados (conversión interrumpida)
+    total = sum(tamano for _, tamano, _ in archivos)
+    for mtime, tamano, ruta in sorted(archivos):
+        if ruta == conservar or (total <= max_bytes and ahora - mtime <= max_segundos):
+            continue
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        total -= tamano
+
+
+def asegurar_parquet(contenido, huella, carpeta=CARPETA_PARQUET):
+    """Ruta del Parquet del CSV subido: se convierte una sola vez por contenido (y de nuevo si se borró)."""
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_parquet = os.path.join(carpeta, f'{huella}.parquet')
+    try:
+        os.utime(ruta_parquet)  # último uso, para el LRU de limpiar_carpeta
+        return ruta_parquet
+    except FileNotFoundError:
+        pass
+
+    # Temporales con nombre único: dos sesiones pueden subir el mismo archivo a la vez
+    descriptor, ruta_csv = tempfile.mkstemp(prefix=f'{huella}.', suffix='.csv', dir=carpeta)
+    with os.fdopen(descriptor, 'wb') as f:
+        f.write(contenido)
+    descriptor, temporal = tempfile.mkstemp(prefix=f'{huella}.', suffix='.parquet.tmp', dir=carpeta)
+    os.close(descriptor)
+    try:
+        convertir_a_parquet(ruta_csv, temporal)
+        os.replace(temporal, ruta_parquet)
+    finally:
+        for ruta in (ruta_csv, temporal):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+    limpiar_carpeta(carpeta, conservar=ruta_parquet)
+    return ruta_parquet
+
+
+def preparar_parquet(contenido, huella, carpeta=CARPETA_PARQUET):
+    """Guarda el CSV subido como Parquet (una sola vez por contenido); devuelve (ruta, catálogo)."""
+    ruta_parquet = asegurar_parquet(contenido, huella, carpeta)
+    return ruta_parquet, catalogo_parquet(ruta_parquet)
+
+
+def opciones_tabla(catalogo, max_categorias=MAX_CATEGORIAS):
+    """(variables categóricas, medidas numéricas) del catálogo."""
+    categoricas = catalogo.loc[catalogo['distintos'] <= max_categorias, 'columna'].tolist()
+    medidas = catalogo.loc[catalogo['tipo'] != 'VARCHAR', 'columna'].tolist()
+    return categoricas, medidas
+
+
+def marca_libre(marca, usadas):
+    # Etiqueta para totales/vacíos que no coincida con ninguna categoría de los datos
+    while marca in usadas:
+        marca = f"[{marca}]"
+    return marca
+
+
+def tabla_cruzada(ruta_parquet, filas, columnas=None, medida=None, agregacion='conteo', solo_validos=False):
+    """Tabla filas × columnas con la agregación de `medida`, incluidos los totales.
+
+    Se agrupa en DuckDB con GROUPING SETS, de modo que los totales usan la misma agregación
+    (una mediana total no es la mediana de las medianas). solo_validos aplica el mismo filtro
+    que el análisis de electricidad (enaho_carga.condicion_valida) con el gasto vacío como 0.
+    """
+    if agregacion not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {agregacion}")
+    if agregacion != 'conteo' and medida is None:
+        raise ValueError(f"La agregación {agregacion} necesita una medida")
+    if columnas == filas:
+        columnas = None
+
+    # Los textos no numéricos de la medida cuentan como vacíos (como errors='coerce' en enaho_carga)
+    valor_medida = f"TRY_CAST({columna_sql(medida)} AS DOUBLE)" if medida else None
+    condicion = 'true'
+    if solo_validos:
+        p1121, p112a = (f"TRY_CAST({columna_sql(c)} AS DOUBLE)" for c in ('P1121', 'P112A'))
+        condicion = f"{p1121} = 0 OR ({p1121} = 1 AND {p112a} IS NOT NULL)"
+        if medida == COLUMNA_GASTO:
+            valor_medida = f'coalesce({valor_medida}, 0)'
+    valor = AGREGACIONES[agregacion].format(medida=valor_medida)
+
+    claves = [filas] + ([columnas] if columnas else [])
+    grupos = ', '.join(columna_sql(c) for c in claves)
+    conjuntos = f"({grupos}), " + (f"({columna_sql(filas)}), ({columna_sql(columnas)}), ()" if columnas else "()")
+    marcas = ', '.join(f"grouping({columna_sql(c)}) AS total_{i}, CAST({columna_sql(c)} AS VARCHAR) AS etiqueta_{i}"
+                       for i, c in enumerate(claves))
+    consulta = f"""
+        SELECT {grupos}, {marcas}, {valor} AS valor
+        FROM read_parquet({texto_sql(ruta_parquet)})
+        WHERE {condicion}
+        GROUP BY GROUPING SETS ({conjuntos})
+    """
+    con = duckdb.connect()
+    try:
+        largo = con.execute(consulta).fetchdf()
+    finally:
+        con.close()
+
+    # El resultado ya viene agregado (pocas celdas): solo se etiqueta y se pivotea.
+    # Las categorías se ordenan por su valor (numérico si lo es) y se muestran como texto; los
+    # totales y vacíos se distinguen por grouping() y NULL, y su etiqueta nunca repite una categoría
+    orden = {}
+    for i, c in enumerate(claves):
+        es_total = largo[f'total_{i}'] != 0
+        es_vacio = ~es_total & largo[c].isna()
+        presentes = largo[~es_total].dropna(subset=[c]).sort_values(c)[f'etiqueta_{i}'].unique().tolist()
+        vacio = marca_libre(ETIQUETA_VACIO, presentes)
+        total = marca_libre(ETIQUETA_TOTAL, presentes + [vacio])
+        orden[c] = presentes + ([vacio] if es_vacio.any() else []) + [total]
+        largo[c] = largo[f'etiqueta_{i}'].mask(es_vacio, vacio).mask(es_total, total)
+    if not columnas:
+        return largo.set_index(filas)[['valor']].rename(columns={'valor': agregacion}).reindex(orden[filas])
+    tabla = largo.pivot(index=filas, columns=columnas, values='valor')
+    return tabla.reindex(index=orden[filas], columns=orden[columnas])
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'consulta.parquet')
+        convertir_a_parquet(args.archivo, ruta)
+        if args.catalogo:
+            print(catalogo_parquet(ruta).to_string(index=False))
+            return
+        tabla = tabla_cruzada(ruta, args.filas, args.columnas, args.medida, args.agregacion, args.solo_validos)
+    print(tabla.round(2).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tablas cruzadas de variables ENAHO con DuckDB.")
+    parser.add_argument('archivo', help="CSV del módulo ENAHO")
+    parser.add_argument('--filas', default='P1121', help="Variable de las filas")
+    parser.add_argument('--columnas', default=None, help="Variable de las columnas (opcional)")
+    parser.add_argument('--medida', default=None, help="Variable numérica a agregar")
+    parser.add_argument('--agregacion', default='conteo', choices=list(AGREGACIONES))
+    parser.add_argument('--solo-validos', action='store_true', help="Solo las filas válidas del análisis de electricidad")
+    parser.add_argument('--catalogo', action='store_true', help="Mostrar las columnas con su tipo y valores distintos")
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # opcional: sin psutil no se muestra la memoria del proceso
+    psutil = None
+
+# Medición de memoria y tiempos por etapa, y reducción automática de tipos.
+
+# Filas que se leen "a la manera original" para estimar cuánto ocupaba esa lectura
+FILAS_MUESTRA = 20_000
+
+
+def memoria_bytes(objeto):
+    """Memoria de un DataFrame/Series (incluye el contenido de los textos) o de un arreglo."""
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        return int(np.sum(objeto.memory_usage(deep=True)))
+    if isinstance(objeto, np.ndarray):
+        return int(objeto.nbytes)
+    return int(getattr(objeto, 'nbytes', 0))
+
+
+def memoria_proceso():
+    """Memoria residente del proceso en bytes (None si psutil no está instalado)."""
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def medir_etapa(nombre, funcion, *args, **kwargs):
+    """Ejecuta funcion(*args) y devuelve (resultado, medición) con tiempo, filas y memoria del resultado."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    datos = resultado[0] if isinstance(resultado, tuple) else resultado
+    return resultado, {
+        'etapa': nombre,
+        'segundos': segundos,
+        'filas': len(datos) if hasattr(datos, '__len__') else None,
+        'bytes': memoria_bytes(datos),
+    }
+
+
+def reducir_tipos(df, max_categorias=0.5, excluir=()):
+    """Reduce los tipos de un DataFrame (las columnas de `excluir` quedan igual).
+
+    - enteros (con o sin NA) al entero más chico que los contenga (Int8, Int16...);
+    - flotantes a float32 (unas 7 cifras significativas, suficiente para montos en soles);
+    - textos con pocos valores distintos (menos de max_categorias × filas) a category.
+    """
+    salida = {}
+    for col in df.columns:
+        serie = df[col]
+        if col in excluir:
+            salida[col] = serie
+        elif pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            salida[col] = entero_minimo(serie)
+        elif pd.api.types.is_float_dtype(serie):
+            salida[col] = serie.astype('float32')
+        elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            distintos = serie.nunique(dropna=True)
+            salida[col] = serie.astype('category') if distintos < max_categorias * max(len(serie), 1) else serie
+        else:
+            salida[col] = serie
+    return pd.DataFrame(salida, index=df.index, copy=False)
+
+
+def entero_minimo(serie):
+    if pd.api.types.is_bool_dtype(serie) or serie.dropna().empty:
+        return serie
+    minimo, maximo = serie.min(), serie.max()
+    for tipo, info in (('Int8', np.iinfo(np.int8)), ('Int16', np.iinfo(np.int16)), ('Int32', np.iinfo(np.int32))):
+        if info.min <= minimo and maximo <= info.max:
+            return serie.astype(tipo)
+    return serie
+
+
+def estimar_lectura_original(contenido, filas_totales, filas_muestra=FILAS_MUESTRA):
+    """Memoria estimada de la lectura original (todas las columnas como texto) para filas_totales.
+
+    Se leen las primeras filas_muestra filas como lo hacía descriptivas.py al principio y se
+    extrapola por fila; no se carga el archivo completo.
+    """
+    muestra = pd.read_csv(io.BytesIO(contenido), sep=",", nrows=filas_muestra,
+                          na_values=["", "  ", "   ", "    "], keep_default_na=False)
+    if len(muestra) == 0:
+        return 0
+    return int(memoria_bytes(muestra) / len(muestra) * filas_totales)
+
+
+def tabla_mediciones(mediciones):
+    """Mediciones por etapa como DataFrame con la memoria en MB."""
+    tabla = pd.DataFrame(mediciones)
+    if tabla.empty:
+        return tabla
+    tabla['memoria_mb'] = tabla['bytes'] / 1024 ** 2
+    return tabla[['etapa', 'filas', 'memoria_mb', 'segundos']]
@@ -0,0 +1,122 @@
+import numpy as np
+
+from enaho_carga import COLUMNAS, columnas_archivo, filtrar_validos, leer_enaho, resumen_por_bloques
+from enaho_ponderado import geo_de
+from enaho_resumen import ResumenElectricidad, ETIQUETAS_P112A
+
+# Motor del análisis de electricidad sin interfaz: limpieza, estadísticas y narrativa.
+# La app de Streamlit (descriptivas.py) y los reportes por lotes (enaho_reportes.py) usan
+# estas mismas funciones.
+
+
+def preparar(df):
+    """Filas válidas, total de filas y vacíos por columna de un DataFrame leído con enaho_carga."""
+    vacios = {col: int(df[col].isna().sum()) for col in COLUMNAS}
+    return filtrar_validos(df), len(df), vacios
+
+
+def analizar_dataframe(df):
+    return ResumenElectricidad.desde_dataframe(*preparar(df))
+
+
+def analizar(fuente, tamano_bloque=None):
+    """Resumen de un archivo (ruta o archivo abierto).
+
+    Con tamano_bloque se procesa por bloques sin cargar el archivo completo (cuartiles del
+    gasto aproximados si hay más de enaho_sketch.LIMITE_EXACTO filas).
+    """
+    faltantes = [col for col in COLUMNAS if col not in columnas_archivo(fuente)]
+    if faltantes:
+        raise ValueError(f"El archivo no contiene las columnas requeridas: {', '.join(faltantes)}")
+    if tamano_bloque:
+        return ResumenElectricidad.desde_bloques(resumen_por_bloques(fuente, tamano_bloque))
+    return analizar_dataframe(leer_enaho(fuente))
+
+
+def particionar(fuente, columna):
+    """Un DataFrame por valor de `columna` (UBIGEO se agrupa por departamento), leyendo el archivo una vez."""
+    if columna not in columnas_archivo(fuente):
+        raise ValueError(f"El archivo no contiene la columna {columna}")
+    df = leer_enaho(fuente, extras=[columna])
+    zonas = geo_de(df, columna)
+    return {zona: parte[COLUMNAS] for zona, parte in df.groupby(zonas, sort=True)}
+
+
+def cifras_narrativa(resumen):
+    """Números que usa el storytelling del paso 4."""
+    pct_sin, pct_con = resumen.porcentajes_p1121()
+    tipo_exclusivo, tipo_colectivo, tipo_otro = resumen.porcentajes_p112a()
+    return {
+        'total_hogares': resumen.filas_validas,
+        'hogares_con_electricidad': resumen.hogares_con_electricidad,
+        'hogares_sin_electricidad': resumen.hogares_sin_electricidad,
+        'pct_con_electricidad': pct_con,
+        'pct_sin_electricidad': pct_sin,
+        'gasto_promedio_total': resumen.gasto_medio(),
+        'gasto_promedio_con_electricidad': resumen.gasto_medio(1),
+        'gasto_promedio_sin_electricidad': resumen.gasto_medio(0),
+        'pct_exclusivo': tipo_exclusivo,
+        'pct_colectivo': tipo_colectivo,
+        'pct_otro': tipo_otro,
+    }
+
+
+def texto_narrativa(resumen):
+    """Narrativa final (markdown) basada en los datos procesados."""
+    c = cifras_narrativa(resumen)
+    return f"""
+## ¿Qué nos dicen los datos sobre el acceso a la electricidad en los hogares peruanos?
+
+### Hogares con y sin electricidad
+De los {c['total_hogares']:,} hogares analizados, **casi {c['pct_con_electricidad']:.1f}%** tienen acceso a electricidad para alumbrado, lo que significa que pueden iluminar sus casas con energía eléctrica. Sin embargo, **un {c['pct_sin_electricidad']:.1f}%** todavía vive sin este servicio básico, lo que afecta su calidad de vida y oportunidades.
+
+### ¿Cómo se conectan a la electricidad los hogares que sí la tienen?
+Entre los hogares con electricidad, la mayoría usa conexiones **exclusivas** (es decir, una conexión propia), mientras que otros usan conexiones **colectivas** o de otro tipo. Esto influye en la manera como consumen y pagan la electricidad.
+
+### ¿Cuánto gastan en electricidad?
+El gasto promedio mensual es de S/ {c['gasto_promedio_total']:.2f}. Los hogares con electricidad gastan, en promedio, S/ {c['gasto_promedio_con_electricidad']:.2f} al mes, mientras que los hogares sin electricidad tienen un gasto cercano a cero, lo que refleja su falta de acceso.
+
+### ¿Por qué es importante esta información?
+La falta de electricidad afecta la educación, la seguridad, la salud y las actividades económicas en las familias. El hecho de que aún haya un porcentaje importante sin acceso indica que es necesario continuar con programas que lleven electricidad a todos los hogares, especialmente en zonas rurales y vulnerables.
+
+### En resumen:
+- La mayoría de los hogares en Perú ya cuenta con electricidad para alumbrado, pero no todos.
+- Hay diferentes tipos de conexiones, y eso puede influir en el consumo y gasto.
+- Entender quién tiene y quién no tiene electricidad ayuda a diseñar mejores políticas públicas.
+- Los datos muestran una oportunidad clara para mejorar el acceso y apoyar a las familias que aún no cuentan con este servicio básico.
+
+Con estos gráficos y datos, podemos ver no solo números, sino las historias de millones de hogares peruanos y su relación con la electricidad, un recurso vital para el desarrollo.
+"""
+
+
+def a_json(valor):
+    # Tipos de numpy/pandas a tipos nativos (NaN -> None)
+    if isinstance(valor, dict):
+        return {str(k): a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [a_json(v) for v in valor]
+    if isinstance(valor, (np.integer, np.bool_)):
+        return valor.item()
+    if isinstance(valor, (float, np.floating)):
+        return None if np.isnan(valor) else float(valor)
+    return valor
+
+
+def resumen_a_diccionario(resumen):
+    """Todas las cifras del análisis (pasos 1 a 4) en un diccionario serializable a JSON."""
+    sketch = resumen.sketch_gasto
+    cruce = resumen.gasto_medio_cruce
+    return a_json({
+        'limpieza': {
+            'total_filas': resumen.total_filas,
+            'vacios': resumen.vacios,
+            'filas_validas': resumen.filas_validas,
+            'outliers_gasto': sketch.contar_outliers(),
+            'cuartiles_exactos': sketch.exacto,
+        },
+        'p1121': resumen.conteo_p1121.to_dict(),
+        'p112a': {ETIQUETAS_P112A[k]: v for k, v in resumen.conteo_p112a.to_dict().items()},
+        'gasto': sketch.describir(),
+        'gasto_medio_cruce': {str(fila): cruce.loc[fila].to_dict() for fila in cruce.index},
+        'narrativa': cifras_narrativa(resumen),
+    })
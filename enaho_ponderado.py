@@ -0,0 +1,209 @@
+import argparse
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from enaho_carga import COLUMNA_GASTO, columnas_archivo, filtrar_validos, leer_enaho
+from enaho_memoria import reducir_tipos
+
+# Comparación ponderada de varios módulos ENAHO (un archivo por año, o varios por año).
+# Cada archivo se lee en un proceso aparte; luego todas las estadísticas se calculan con el
+# factor de expansión, agrupando por año y, si se pide, por una columna geográfica.
+
+COLUMNA_FACTOR = 'FACTOR07'
+
+# Nombres con los que aparece el año en los módulos; AÑO se lista también con sus codificaciones
+# erróneas habituales (UTF-8 leído como Latin-1/cp1252, carácter de reemplazo o '?')
+PATRON_COLUMNA_ANIO = re.compile(r'^(AÑO|ANIO|ANO|AÑO_ENCUESTA|AÃ\x91O|AÃ‘O|A\uFFFDO|A\?O)$', re.IGNORECASE)
+PATRON_ANIO_ARCHIVO = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+CUANTILES = [0.25, 0.5, 0.75]
+
+
+# --- Kernels ponderados (vectorizados sobre todos los grupos a la vez) ---
+
+def sumas_por_grupo(grupos, pesos, n_grupos, valores=None):
+    # Σw (o Σw·x) por grupo
+    return np.bincount(grupos, weights=pesos if valores is None else pesos * valores, minlength=n_grupos)
+
+
+def frecuencias_ponderadas(grupos, codigos, pesos, n_grupos, categorias):
+    """Matriz grupos × categorías con la suma de factores de cada código."""
+    categorias = np.asarray(categorias)
+    posicion = np.searchsorted(categorias, codigos)
+    valido = (posicion < categorias.size) & (categorias[np.minimum(posicion, categorias.size - 1)] == codigos)
+    celdas = grupos[valido] * categorias.size + posicion[valido]
+    return np.bincount(celdas, weights=pesos[valido],
+                       minlength=n_grupos * categorias.size).reshape(n_grupos, categorias.size)
+
+
+def media_varianza_ponderadas(grupos, valores, pesos, n_grupos):
+    """Media y varianza ponderadas por grupo: Σw(x - m)² / Σw (los factores son pesos de frecuencia)."""
+    total = sumas_por_grupo(grupos, pesos, n_grupos)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = sumas_por_grupo(grupos, pesos, n_grupos, valores) / total
+        desvio = valores - media[grupos]
+        varianza = sumas_por_grupo(grupos, pesos, n_grupos, desvio * desvio) / total
+    return media, varianza
+
+
+def cuantiles_ponderados(grupos, valores, pesos, n_grupos, qs):
+    """Cuantiles ponderados por grupo (inversa de la distribución acumulada ponderada).
+
+    Se ordena una sola vez por (grupo, valor) y se buscan todos los cuantiles de todos los
+    grupos con un único searchsorted sobre el peso acumulado.
+    """
+    qs = np.asarray(qs, dtype=np.float64)
+    if valores.size == 0:
+        return np.full((n_grupos, qs.size), np.nan)
+    orden = np.lexsort((valores, grupos))
+    valores_ordenados = valores[orden]
+    acumulado = np.cumsum(pesos[orden])
+    total = sumas_por_grupo(grupos, pesos, n_grupos)
+    inicio = np.concatenate([[0.0], np.cumsum(total)[:-1]])
+    objetivos = inicio[:, None] + qs[None, :] * total[:, None]
+    # Primer dato cuyo peso acumulado alcanza el objetivo, sin salir del grupo
+    indices = np.searchsorted(acumulado, objetivos, side='left')
+    conteos = np.bincount(grupos, minlength=n_grupos)
+    fin = np.cumsum(conteos) - 1
+    indices = np.clip(indices, (fin - conteos + 1)[:, None], fin[:, None])
+    resultado = valores_ordenados[np.clip(indices, 0, valores.size - 1)]
+    resultado[total == 0] = np.nan
+    return resultado
+
+
+# --- Lectura de archivos ---
+
+def anio_de(df, nombre):
+    # Año desde la columna del módulo o, si no está, desde el nombre del archivo
+    columnas = [c for c in df.columns if PATRON_COLUMNA_ANIO.match(c)]
+    if columnas:
+        anios = pd.to_numeric(df[columnas[0]], errors='coerce')
+        if anios.notna().any():
+            return anios.astype('Int64')
+    coincidencia = PATRON_ANIO_ARCHIVO.search(os.path.basename(nombre))
+    if coincidencia is None:
+        raise ValueError(f"No se encontró el año en {nombre}: agrega la columna AÑO o ponlo en el nombre")
+    return pd.Series(int(coincidencia.group(1)), index=df.index, dtype='Int64')
+
+
+def geo_de(df, columna_geo):
+    # UBIGEO se reduce al departamento (dos primeros dígitos); otras columnas se usan tal cual
+    valores = df[columna_geo].astype(str).str.strip()
+    if columna_geo.upper() == 'UBIGEO':
+        return valores.str.zfill(6).str[:2]
+    return valores
+
+
+def procesar_archivo(fuente, nombre, columna_factor=COLUMNA_FACTOR, columna_geo=None):
+    """Filas válidas de un módulo con año, factor y (opcional) zona; se ejecuta en un proceso aparte.
+
+    fuente: ruta o bytes del CSV.
+    """
+    if isinstance(fuente, bytes):
+        fuente = io.BytesIO(fuente)
+    columnas = columnas_archivo(fuente)
+    faltantes = [c for c in [columna_factor] + ([columna_geo] if columna_geo else []) if c not in columnas]
+    if faltantes:
+        raise ValueError(f"{nombre}: faltan las columnas {', '.join(faltantes)}")
+    extras = [columna_factor] + [c for c in columnas if PATRON_COLUMNA_ANIO.match(c)][:1]
+    if columna_geo:
+        extras.append(columna_geo)
+    extras = list(dict.fromkeys(extras))
+
+    df = filtrar_validos(leer_enaho(fuente, extras=extras))
+    # Año y zona se repiten en cada fila: como Int16 y category ocupan mucho menos al volver al proceso principal
+    return reducir_tipos(pd.DataFrame({
+        'anio': anio_de(df, nombre),
+        'zona': geo_de(df, columna_geo) if columna_geo else 'Total',
+        'P1121': df['P1121'],
+        'P112A': df['P112A'],
+        'gasto': df[COLUMNA_GASTO],
+        'factor': pd.to_numeric(df[columna_factor], errors='coerce').astype('float64'),
+    }).dropna(subset=['anio', 'factor']), excluir=['factor'])
+
+
+def leer_archivos(fuentes, columna_factor=COLUMNA_FACTOR, columna_geo=None, workers=None):
+    """Procesa los archivos en paralelo. fuentes: lista de (nombre, ruta o bytes)."""
+    workers = workers or min(len(fuentes), os.cpu_count() or 1)
+    if workers <= 1 or len(fuentes) == 1:
+        partes = [procesar_archivo(f, n, columna_factor, columna_geo) for n, f in fuentes]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(procesar_archivo, f, n, columna_factor, columna_geo) for n, f in fuentes]
+            partes = [futuro.result() for futuro in futuros]
+    # concat convierte a texto las zonas con categorías distintas entre archivos
+    return reducir_tipos(pd.concat(partes, ignore_index=True), excluir=['factor'])
+
+
+# --- Comparación ---
+
+def comparar(datos, cuantiles=CUANTILES):
+    """Tablas ponderadas por (año, zona): P1121, P112A (hogares con electricidad) y gasto mensual."""
+    claves = datos[['anio', 'zona']]
+    indice = pd.MultiIndex.from_frame(claves.drop_duplicates().sort_values(['anio', 'zona']))
+    grupos = indice.get_indexer(pd.MultiIndex.from_frame(claves))
+    n_grupos = len(indice)
+    pesos = datos['factor'].to_numpy()
+    p1121 = datos['P1121'].to_numpy(dtype='float64', na_value=np.nan)
+    p112a = datos['P112A'].to_numpy(dtype='float64', na_value=np.nan)
+    gasto = datos['gasto'].to_numpy(dtype='float64')
+
+    # Tipo de alumbrado: hogares expandidos y porcentaje
+    frec_p1121 = frecuencias_ponderadas(grupos, p1121, pesos, n_grupos, [0, 1])
+    hogares = frec_p1121.sum(axis=1)
+    tabla_p1121 = pd.DataFrame({
+        'n_muestra': np.bincount(grupos, minlength=n_grupos),
+        'hogares_expandidos': hogares,
+        'pct_sin_electricidad': frec_p1121[:, 0] / hogares * 100,
+        'pct_con_electricidad': frec_p1121[:, 1] / hogares * 100,
+    }, index=indice)
+
+    # Tipo de conexión entre los hogares con electricidad
+    con = p1121 == 1
+    frec_p112a = frecuencias_ponderadas(grupos[con], p112a[con], pesos[con], n_grupos, [1, 2, 3])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct_p112a = frec_p112a / frec_p112a.sum(axis=1, keepdims=True) * 100
+    tabla_p112a = pd.DataFrame(pct_p112a, index=indice,
+                               columns=['pct_exclusivo', 'pct_colectivo', 'pct_otro'])
+
+    # Gasto mensual: media, varianza y cuantiles ponderados; media de los hogares con electricidad
+    media, varianza = media_varianza_ponderadas(grupos, gasto, pesos, n_grupos)
+    media_con, _ = media_varianza_ponderadas(grupos[con], gasto[con], pesos[con], n_grupos)
+    tabla_gasto = pd.DataFrame({'media': media, 'varianza': varianza, 'desviacion': np.sqrt(varianza)},
+                               index=indice)
+    valores_q = cuantiles_ponderados(grupos, gasto, pesos, n_grupos, cuantiles)
+    for q, columna in zip(cuantiles, valores_q.T):
+        tabla_gasto[f'q{int(q * 100)}'] = columna
+    tabla_gasto['media_con_electricidad'] = media_con
+
+    return {'p1121': tabla_p1121, 'p112a': tabla_p112a, 'gasto': tabla_gasto}
+
+
+def comparar_archivos(rutas, columna_factor=COLUMNA_FACTOR, columna_geo=None, workers=None):
+    datos = leer_archivos([(ruta, ruta) for ruta in rutas], columna_factor, columna_geo, workers)
+    return comparar(datos)
+
+
+def main(args):
+    tablas = comparar_archivos(args.archivos, args.factor, args.geo, args.workers)
+    os.makedirs(args.salida, exist_ok=True)
+    for nombre, tabla in tablas.items():
+        ruta = os.path.join(args.salida, f"ponderado_{nombre}.csv")
+        tabla.round(4).to_csv(ruta)
+        print(f"\n🔹 {nombre} ({ruta})")
+        print(tabla.round(2).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparación ponderada de módulos ENAHO por año y zona.")
+    parser.add_argument('archivos', nargs='+', help="CSV de los módulos (uno o más por año)")
+    parser.add_argument('--factor', default=COLUMNA_FACTOR, help="Columna del factor de expansión")
+    parser.add_argument('--geo', default=None, help="Columna geográfica (UBIGEO se agrupa por departamento)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos para leer los archivos")
+    parser.add_argument('--salida', default='.', help="Carpeta donde guardar los CSV")
+    main(parser.parse_args())
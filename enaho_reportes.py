@@ -0,0 +1,171 @@
+import matplotlib
+matplotlib.use('Agg')  # sin ventanas: los reportes se generan en procesos sin pantalla
+
+import argparse
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from enaho_motor import analizar, analizar_dataframe, particionar, resumen_a_diccionario, texto_narrativa
+from enaho_resumen import FIGURAS
+
+# Reportes por lotes del análisis de electricidad (JSON + HTML + PNG), sin abrir Streamlit.
+#
+# Uso:
+#   python enaho_reportes.py enaho_2022.csv enaho_2023.csv --salida reportes
+#   python enaho_reportes.py enaho_2023.csv --particion UBIGEO --salida reportes   (un reporte por departamento)
+
+
+def markdown_a_html(texto):
+    # Solo lo que usa la narrativa: títulos ##/###, viñetas y negritas
+    lineas, en_lista = [], False
+    for linea in texto.strip().splitlines():
+        linea = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html.escape(linea.strip()))
+        if linea.startswith('- '):
+            if not en_lista:
+                lineas.append('<ul>')
+                en_lista = True
+            lineas.append(f'<li>{linea[2:]}</li>')
+            continue
+        if en_lista:
+            lineas.append('</ul>')
+            en_lista = False
+        if linea.startswith('### '):
+            lineas.append(f'<h3>{linea[4:]}</h3>')
+        elif linea.startswith('## '):
+            lineas.append(f'<h2>{linea[3:]}</h2>')
+        elif linea:
+            lineas.append(f'<p>{linea}</p>')
+    if en_lista:
+        lineas.append('</ul>')
+    return '\n'.join(lineas)
+
+
+def escribir_reporte(resumen, carpeta, titulo):
+    """Escribe resumen.json, las figuras PNG y reporte.html en `carpeta`; devuelve el diccionario del resumen."""
+    os.makedirs(carpeta, exist_ok=True)
+    datos = resumen_a_diccionario(resumen)
+    with open(os.path.join(carpeta, 'resumen.json'), 'w', encoding='utf-8') as f:
+        json.dump({'titulo': titulo, **datos}, f, indent=2, ensure_ascii=False)
+
+    for nombre in FIGURAS:
+        if nombre.endswith('p112a') and resumen.hogares_con_electricidad == 0:
+            continue
+        with open(os.path.join(carpeta, f'{nombre}.png'), 'wb') as f:
+            f.write(resumen.png(nombre, dpi=120))
+
+    limpieza = datos['limpieza']
+    tablas = '\n'.join(
+        f'<h3>{html.escape(subtitulo)}</h3>\n{tabla.to_html(index=False, border=0)}'
+        for subtitulo, tabla in (('Tipo de Alumbrado (P1121)', resumen.tabla_p1121()),
+                                 ('Tipo de Conexión Eléctrica (P112A)', resumen.tabla_p112a()),
+                                 ('Gasto Mensual en Electricidad (P1172$02)', resumen.tabla_gasto()))
+    )
+    figuras = '\n'.join(f'<img src="{nombre}.png" alt="{nombre}">' for nombre in FIGURAS
+                        if os.path.exists(os.path.join(carpeta, f'{nombre}.png')))
+    pagina = f"""<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>{html.escape(titulo)}</title>
+<style>body {{ font-family: sans-serif; max-width: 60em; margin: auto; }} img {{ max-width: 100%; }}
+table {{ border-collapse: collapse; }} td, th {{ padding: 0.2em 0.8em; text-align: right; }}</style></head>
+<body>
+<h1>ENAHO Análisis de Datos de Electricidad: {html.escape(titulo)}</h1>
+<h2>Paso 1: Limpieza de datos</h2>
+<ul>
+<li>Total de filas originales: <strong>{limpieza['total_filas']}</strong></li>
+<li>Vacíos encontrados en P1121: <strong>{limpieza['vacios']['P1121']}</strong></li>
+<li>Vacíos encontrados en P112A: <strong>{limpieza['vacios']['P112A']}</strong></li>
+<li>Vacíos encontrados en P1172$02: <strong>{limpieza['vacios']['P1172$02']}</strong></li>
+<li>Filas finales para análisis: <strong>{limpieza['filas_validas']}</strong></li>
+<li>Outliers en P1172$02 (gasto mensual): <strong>{limpieza['outliers_gasto']}</strong></li>
+</ul>
+<h2>Paso 2: Estadísticas descriptivas</h2>
+{tablas}
+<h2>Pasos 2 y 3: Gráficos</h2>
+{figuras}
+{markdown_a_html(texto_narrativa(resumen))}
+</body>
+</html>
+"""
+    with open(os.path.join(carpeta, 'reporte.html'), 'w', encoding='utf-8') as f:
+        f.write(pagina)
+    return datos
+
+
+def reporte_archivo(ruta, carpeta, tamano_bloque=None):
+    # Tarea de un proceso: analizar un archivo completo y escribir su reporte
+    inicio = time.perf_counter()
+    datos = escribir_reporte(analizar(ruta, tamano_bloque), carpeta, os.path.basename(ruta))
+    return datos, time.perf_counter() - inicio
+
+
+def reporte_particion(df, carpeta, titulo):
+    # Tarea de un proceso: una partición (por ejemplo, un departamento) ya leída
+    inicio = time.perf_counter()
+    datos = escribir_reporte(analizar_dataframe(df), carpeta, titulo)
+    return datos, time.perf_counter() - inicio
+
+
+def nombre_carpeta(texto):
+    return re.sub(r'[^\w.-]+', '_', os.path.splitext(os.path.basename(str(texto)))[0]) or 'reporte'
+
+
+def generar_reportes(rutas, salida, particion=None, workers=None, tamano_bloque=None):
+    """Genera un reporte por archivo o, con `particion`, uno por valor de esa columna.
+
+    Los reportes se generan en paralelo con un proceso por tarea. Escribe indice.json
+    con las cifras principales de cada reporte y lo devuelve.
+    """
+    os.makedirs(salida, exist_ok=True)
+    tareas = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for ruta in rutas:
+            if particion is None:
+                carpeta = os.path.join(salida, nombre_carpeta(ruta))
+                tareas[carpeta] = executor.submit(reporte_archivo, ruta, carpeta, tamano_bloque)
+                continue
+            for zona, df in particionar(ruta, particion).items():
+                titulo = f"{os.path.basename(ruta)} - {particion} {zona}"
+                carpeta = os.path.join(salida, nombre_carpeta(ruta), f"{particion}_{nombre_carpeta(zona)}")
+                tareas[carpeta] = executor.submit(reporte_particion, df, carpeta, titulo)
+
+        indice = {}
+        for carpeta, futuro in tareas.items():
+            clave = os.path.relpath(carpeta, salida)
+            try:
+                datos, segundos = futuro.result()
+            except Exception as e:
+                indice[clave] = {'estado': 'error', 'error': f"{type(e).__name__}: {e}"}
+                print(f"✗ {clave}: {e}")
+                continue
+            indice[clave] = {'estado': 'ok', 'segundos': round(segundos, 2),
+                             'filas_validas': datos['limpieza']['filas_validas'], **datos['narrativa']}
+            print(f"✓ {clave} ({segundos:.1f} s)")
+
+    with open(os.path.join(salida, 'indice.json'), 'w', encoding='utf-8') as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    return indice
+
+
+def main(args):
+    inicio = time.perf_counter()
+    indice = generar_reportes(args.archivos, args.salida, args.particion, args.workers, args.tamano_bloque)
+    errores = sum(r['estado'] == 'error' for r in indice.values())
+    print(f"\n{len(indice) - errores} reportes generados en {time.perf_counter() - inicio:.1f} s "
+          f"({errores} con error); índice en {os.path.join(args.salida, 'indice.json')}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reportes del análisis de electricidad ENAHO (JSON/HTML/PNG).")
+    parser.add_argument('archivos', nargs='+', help="CSV de los módulos ENAHO")
+    parser.add_argument('--salida', default='reportes', help="Carpeta de salida")
+    parser.add_argument('--particion', default=None,
+                        help="Columna para un reporte por grupo (UBIGEO = uno por departamento)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument('--tamano-bloque', type=int, default=None,
+                        help="Procesar cada archivo por bloques de este número de filas (archivos muy grandes)")
+    raise SystemExit(main(parser.parse_args()))
@@ -0,0 +1,228 @@
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from enaho_carga import COLUMNA_GASTO
+from enaho_sketch import sketch_de
+
+# Resumen del análisis de electricidad calculado una sola vez por conjunto de datos.
+# Las tablas, gráficos y la narrativa de los pasos 2 a 4 se arman desde aquí, sin volver
+# a recorrer las filas; las figuras se renderizan a PNG la primera vez que se piden.
+
+ETIQUETAS_P1121 = {0: 'Sin electricidad', 1: 'Con electricidad'}
+ETIQUETAS_P112A = {1: 'Exclusivo', 2: 'Colectivo', 3: 'Otro'}
+
+
+class ResumenElectricidad:
+    """Conteos, medias condicionales, cruce P1121×P112A y sketch del gasto de un conjunto de datos."""
+
+    def __init__(self, total_filas, vacios, conteo_p1121, conteo_p112a, gasto_por_p1121,
+                 gasto_medio_cruce, sketch_gasto):
+        self.total_filas = total_filas
+        self.vacios = vacios
+        # Conteos con todas las categorías (0 si no aparecen)
+        self.conteo_p1121 = conteo_p1121.reindex(list(ETIQUETAS_P1121), fill_value=0).astype(int)
+        self.conteo_p112a = conteo_p112a.reindex(list(ETIQUETAS_P112A), fill_value=0).astype(int)
+        self.gasto_por_p1121 = gasto_por_p1121.reindex(list(ETIQUETAS_P1121))
+        self.gasto_medio_cruce = gasto_medio_cruce.reindex(columns=list(ETIQUETAS_P112A))
+        self.sketch_gasto = sketch_gasto
+        self.figuras = {}
+        # Mediciones de memoria y tiempo de las etapas que produjeron el resumen (enaho_memoria)
+        self.mediciones = []
+
+    @classmethod
+    def desde_dataframe(cls, df_clean, total_filas, vacios):
+        """Resumen de las filas ya filtradas (df_clean) en una sola pasada por columna."""
+        p1121 = df_clean['P1121']
+        gasto = df_clean[COLUMNA_GASTO].astype('float64')
+        return cls(
+            total_filas=total_filas,
+            vacios=vacios,
+            conteo_p1121=p1121.value_counts(),
+            conteo_p112a=df_clean.loc[p1121 == 1, 'P112A'].value_counts(),
+            gasto_por_p1121=gasto.groupby(p1121).agg(n='count', media='mean'),
+            gasto_medio_cruce=gasto.groupby([p1121, df_clean['P112A']]).mean().unstack(),
+            sketch_gasto=sketch_de(gasto.to_numpy()),
+        )
+
+    @classmethod
+    def desde_bloques(cls, resumen):
+        """Resumen a partir de enaho_carga.resumen_por_bloques (archivos que no entran en memoria)."""
+        return cls(
+            total_filas=resumen['total_filas'],
+            vacios=resumen['vacios'],
+            conteo_p1121=resumen['conteo_p1121'],
+            conteo_p112a=resumen['conteo_p112a'],
+            gasto_por_p1121=resumen['gasto_por_p1121'][['n', 'media']],
+            gasto_medio_cruce=resumen['gasto_medio_cruce'],
+            sketch_gasto=resumen['sketch_gasto'],
+        )
+
+    @property
+    def nbytes(self):
+        tablas = [self.conteo_p1121, self.conteo_p112a, self.gasto_por_p1121, self.gasto_medio_cruce]
+        return int(sum(np.sum(t.memory_usage(deep=True)) for t in tablas)) + self.sketch_gasto.nbytes
+
+    # --- Cifras ---
+
+    @property
+    def filas_validas(self):
+        return int(self.conteo_p1121.sum())
+
+    @property
+    def hogares_con_electricidad(self):
+        return int(self.conteo_p1121[1])
+
+    @property
+    def hogares_sin_electricidad(self):
+        return int(self.conteo_p1121[0])
+
+    def gasto_medio(self, p1121=None):
+        # Sin categoría: gasto medio de todos los hogares; 0 si no hay hogares en la categoría
+        if p1121 is None:
+            return self.sketch_gasto.media
+        media = self.gasto_por_p1121.loc[p1121, 'media']
+        return 0 if pd.isna(media) else media
+
+    def porcentajes_p1121(self):
+        return self.conteo_p1121 / self.filas_validas * 100
+
+    def porcentajes_p112a(self):
+        total = self.conteo_p112a.sum()
+        return self.conteo_p112a / total * 100 if total else self.conteo_p112a * 0.0
+
+    def tabla_p1121(self):
+        return pd.DataFrame({
+            'Valor': list(ETIQUETAS_P1121),
+            'Descripción': list(ETIQUETAS_P1121.values()),
+            'Cantidad': self.conteo_p1121.values
+        })
+
+    def tabla_p112a(self):
+        return pd.DataFrame({
+            'Valor': list(ETIQUETAS_P112A),
+            'Descripción': list(ETIQUETAS_P112A.values()),
+            'Cantidad': self.conteo_p112a.values
+        })
+
+    def tabla_gasto(self):
+        stats = self.sketch_gasto.describir()
+        return pd.DataFrame({
+            'Estadística': ['Recuento', 'Promedio', 'Desviación estándar', 'Valor mínimo', 'Primer cuartil (25%)', 'Mediana (50%)', 'Tercer cuartil (75%)', 'Valor máximo', 'Varianza'],
+            'Valor': [
+                int(stats['count']),
+                round(stats['mean'], 2),
+                round(stats['std'], 2),
+                round(stats['min'], 2),
+                round(stats['25%'], 2),
+                round(stats['50%'], 2),
+                round(stats['75%'], 2),
+                round(stats['max'], 2),
+                round(stats['varianza'], 2)
+            ]
+        })
+
+    # --- Figuras ---
+
+    def png(self, nombre, dpi=200):
+        """Figura renderizada a PNG (se genera una sola vez por resumen)."""
+        if nombre not in self.figuras:
+            fig = FIGURAS[nombre](self)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+            plt.close(fig)
+            self.figuras[nombre] = buffer.getvalue()
+        return self.figuras[nombre]
+
+
+def figura_barras_p1121(resumen):
+    fig, ax = plt.subplots()
+    sns.barplot(x='Descripción', y='Cantidad', data=resumen.tabla_p1121(), ax=ax)
+    ax.set_title("Distribución del Tipo de Alumbrado")
+    ax.set_xlabel("Tipo de Alumbrado")
+    ax.set_ylabel("Número de Hogares")
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+def figura_barras_p112a(resumen):
+    fig, ax = plt.subplots()
+    sns.barplot(x='Descripción', y='Cantidad', data=resumen.tabla_p112a(), ax=ax)
+    ax.set_title("Distribución del Tipo de Conexión Eléctrica")
+    ax.set_xlabel("Tipo de Conexión")
+    ax.set_ylabel("Número de Hogares")
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+def figura_histograma_gasto(resumen):
+    # Histograma de 30 intervalos a partir de los conteos del sketch
+    fig, ax = plt.subplots()
+    conteos, bordes = resumen.sketch_gasto.histograma(bins=30)
+    sns.histplot(x=bordes[:-1], weights=conteos, bins=bordes.tolist(), kde=False, ax=ax, color='skyblue')
+    ax.set_title("Histograma del Gasto Mensual en Electricidad")
+    ax.set_xlabel("Gasto Mensual (S/)")
+    ax.set_ylabel("Número de Hogares")
+    return fig
+
+
+def figura_caja_gasto(resumen):
+    # Boxplot con las estadísticas precalculadas (cuartiles, bigotes y outliers)
+    fig, ax = plt.subplots()
+    ax.bxp([resumen.sketch_gasto.estadisticas_caja()], orientation='horizontal', widths=0.8, patch_artist=True,
+           boxprops={'facecolor': 'lightgreen'}, medianprops={'color': 'black'})
+    ax.set_yticks([])
+    ax.set_title("Boxplot del Gasto Mensual en Electricidad")
+    ax.set_xlabel("Gasto Mensual (S/)")
+    return fig
+
+
+def figura_torta_p1121(resumen):
+    fig, ax = plt.subplots()
+    counts_p1121 = resumen.conteo_p1121.rename(ETIQUETAS_P1121)
+    counts_p1121 = counts_p1121[counts_p1121 > 0].sort_values(ascending=False)
+    counts_p1121.plot.pie(autopct='%1.1f%%', ax=ax, legend=True)
+    ax.set_ylabel("")
+    ax.set_title("Distribución del Tipo de Alumbrado")
+    ax.legend(title="Tipo de Alumbrado", loc="best")
+    return fig
+
+
+def figura_torta_p112a(resumen):
+    fig, ax = plt.subplots()
+    counts_p112a = resumen.conteo_p112a.rename(ETIQUETAS_P112A)
+    counts_p112a = counts_p112a[counts_p112a > 0]
+    counts_p112a.plot.pie(autopct='%1.1f%%', ax=ax, legend=True)
+    ax.set_ylabel("")
+    ax.set_title("Distribución del Tipo de Conexión Eléctrica")
+    ax.legend(title="Tipo de Conexión", loc="best")
+    return fig
+
+
+def figura_mapa_calor(resumen):
+    pivot_table = resumen.gasto_medio_cruce
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.heatmap(pivot_table, annot=True, fmt=".2f", cmap="YlGnBu", cbar_kws={'label': 'Gasto promedio'}, ax=ax)
+    ax.set_xlabel("Tipo de Conexión Eléctrica (P112A)")
+    ax.set_ylabel("Tipo de Alumbrado (P1121)")
+    ax.set_title("Gasto Promedio Mensual según Tipo de Alumbrado y Conexión")
+
+    y_labels_map = {0: 'Sin electricidad (0)', 1: 'Con electricidad (1)'}
+    x_labels_map = {1: 'Exclusivo (1)', 2: 'Colectivo (2)', 3: 'Otro (3)'}
+    ax.set_yticklabels([y_labels_map[i] for i in pivot_table.index], rotation=0)
+    ax.set_xticklabels([x_labels_map[i] for i in pivot_table.columns], rotation=45)
+    return fig
+
+
+FIGURAS = {
+    'barras_p1121': figura_barras_p1121,
+    'barras_p112a': figura_barras_p112a,
+    'histograma_gasto': figura_histograma_gasto,
+    'caja_gasto': figura_caja_gasto,
+    'torta_p1121': figura_torta_p1121,
+    'torta_p112a': figura_torta_p112a,
+    'mapa_calor': figura_mapa_calor,
+}
@@ -0,0 +1,194 @@
+import numpy as np
+
+# Resumen compacto y combinable del gasto (P1172$02): cuantiles, histograma y estadísticas
+# del boxplot sin guardar la serie completa.
+#
+# Modo exacto: mientras haya pocos datos se guardan los valores y todo coincide con pandas.
+# Modo aproximado: los valores se agrupan en cubetas logarítmicas (como DDSketch). La cubeta i
+# cubre (γ^(i-1), γ^i] con γ = (1 + α) / (1 - α) y se representa por 2γ^i / (γ + 1), de modo
+# que cada valor queda a menos de α·|x| de su representante. Consecuencias:
+#   - cuantil(q) está a menos de α·|x| de x, el dato de rango ⌊q(n-1)⌋ (los ceros y el
+#     mínimo/máximo son exactos);
+#   - en el histograma solo pueden cambiar de intervalo los valores que están a menos de
+#     α·|x| de un borde; en el conteo de outliers, además, los límites del IQR salen de los
+#     cuartiles aproximados (cada uno con el error anterior).
+# Recuento, media, varianza, mínimo y máximo son siempre exactos.
+
+ERROR_RELATIVO = 0.01
+
+# Hasta cuántos valores se mantiene el modo exacto (8 bytes por valor)
+LIMITE_EXACTO = 100_000
+
+
+class SketchGasto:
+    """Sketch combinable de una variable numérica: momentos exactos y cuantiles con error relativo acotado."""
+
+    def __init__(self, error_relativo=ERROR_RELATIVO, limite_exacto=LIMITE_EXACTO):
+        self.error_relativo = error_relativo
+        self.limite_exacto = limite_exacto
+        self.gamma = (1 + error_relativo) / (1 - error_relativo)
+        self.log_gamma = np.log(self.gamma)
+        self.n = 0
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.valores = np.empty(0)   # solo en modo exacto
+        self.ceros = 0
+        # Cubetas (índice, conteo) ordenadas por índice; las negativas guardan el índice de |x|
+        self.positivos = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self.negativos = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    @property
+    def exacto(self):
+        return self.valores is not None
+
+    def agregar(self, valores):
+        x = np.asarray(valores, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return self
+        self.n += x.size
+        self.suma += x.sum()
+        self.suma_cuadrados += np.square(x).sum()
+        self.minimo = min(self.minimo, x.min())
+        self.maximo = max(self.maximo, x.max())
+        if self.exacto:
+            self.valores = np.concatenate([self.valores, x])
+            if self.valores.size > self.limite_exacto:
+                self.pasar_a_cubetas()
+        else:
+            self.agregar_cubetas(x)
+        return self
+
+    def combinar(self, otro):
+        """Agrega en este sketch los datos de otro (mismo error relativo)."""
+        if otro.error_relativo != self.error_relativo:
+            raise ValueError("Solo se pueden combinar sketches con el mismo error relativo")
+        self.n += otro.n
+        self.suma += otro.suma
+        self.suma_cuadrados += otro.suma_cuadrados
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        if self.exacto and otro.exacto and self.valores.size + otro.valores.size <= self.limite_exacto:
+            self.valores = np.concatenate([self.valores, otro.valores])
+            return self
+        if self.exacto:
+            self.pasar_a_cubetas()
+        if otro.exacto:
+            self.agregar_cubetas(otro.valores)
+        else:
+            self.ceros += otro.ceros
+            self.positivos = sumar_cubetas(self.positivos, otro.positivos)
+            self.negativos = sumar_cubetas(self.negativos, otro.negativos)
+        return self
+
+    def pasar_a_cubetas(self):
+        valores, self.valores = self.valores, None
+        self.agregar_cubetas(valores)
+
+    def agregar_cubetas(self, x):
+        self.ceros += int((x == 0).sum())
+        for signo, destino in ((1, 'positivos'), (-1, 'negativos')):
+            v = x[signo * x > 0] * signo
+            if v.size:
+                indices, conteos = np.unique(np.ceil(np.log(v) / self.log_gamma).astype(np.int64),
+                                             return_counts=True)
+                setattr(self, destino, sumar_cubetas(getattr(self, destino), (indices, conteos)))
+
+    def representantes(self):
+        # Valores representativos y conteos en orden creciente (modo aproximado)
+        idx_neg, cnt_neg = self.negativos
+        idx_pos, cnt_pos = self.positivos
+        valores = np.concatenate([-self.valor_cubeta(idx_neg[::-1]), [0.0], self.valor_cubeta(idx_pos)])
+        conteos = np.concatenate([cnt_neg[::-1], [self.ceros], cnt_pos])
+        valores = np.clip(valores, self.minimo, self.maximo)
+        return valores[conteos > 0], conteos[conteos > 0]
+
+    def valor_cubeta(self, indices):
+        return 2 * self.gamma ** indices.astype(np.float64) / (self.gamma + 1)
+
+    def cuantiles(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if self.exacto:
+            return np.quantile(self.valores, qs)
+        valores, conteos = self.representantes()
+        acumulado = np.cumsum(conteos)
+        rangos = np.floor(qs * (self.n - 1))
+        resultado = valores[np.searchsorted(acumulado, rangos, side='right')]
+        resultado = np.where(qs <= 0, self.minimo, resultado)
+        return np.where(qs >= 1, self.maximo, resultado)
+
+    def cuantil(self, q):
+        return float(self.cuantiles([q])[0])
+
+    @property
+    def media(self):
+        return self.suma / self.n if self.n else np.nan
+
+    @property
+    def varianza(self):
+        # Varianza muestral (ddof=1), como pandas
+        if self.n < 2:
+            return np.nan
+        return max(self.suma_cuadrados - self.n * self.media ** 2, 0.0) / (self.n - 1)
+
+    def describir(self):
+        """Mismas claves que Series.describe() más la varianza."""
+        q1, q2, q3 = self.cuantiles([0.25, 0.5, 0.75])
+        return {'count': self.n, 'mean': self.media, 'std': np.sqrt(self.varianza),
+                'min': self.minimo, '25%': q1, '50%': q2, '75%': q3, 'max': self.maximo,
+                'varianza': self.varianza}
+
+    def limites_iqr(self):
+        q1, q3 = self.cuantiles([0.25, 0.75])
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    def contar_outliers(self):
+        lim_inf, lim_sup = self.limites_iqr()
+        valores, conteos = (self.valores, None) if self.exacto else self.representantes()
+        fuera = (valores < lim_inf) | (valores > lim_sup)
+        return int(fuera.sum()) if conteos is None else int(conteos[fuera].sum())
+
+    def histograma(self, bins=30):
+        """Conteos y bordes de `bins` intervalos iguales entre el mínimo y el máximo."""
+        if self.exacto:
+            return np.histogram(self.valores, bins=bins)
+        valores, conteos = self.representantes()
+        return np.histogram(valores, bins=bins, range=(self.minimo, self.maximo), weights=conteos)
+
+    def estadisticas_caja(self):
+        """Diccionario para Axes.bxp: cuartiles, bigotes (1.5·IQR) y outliers.
+
+        En modo aproximado los outliers son los valores representativos de las cubetas
+        (uno por cubeta), así el gráfico no recibe todos los puntos.
+        """
+        q1, mediana, q3 = self.cuantiles([0.25, 0.5, 0.75])
+        lim_inf, lim_sup = self.limites_iqr()
+        valores = np.unique(self.valores) if self.exacto else self.representantes()[0]
+        dentro = valores[(valores >= lim_inf) & (valores <= lim_sup)]
+        return {'med': mediana, 'q1': q1, 'q3': q3,
+                'whislo': dentro.min() if dentro.size else q1,
+                'whishi': dentro.max() if dentro.size else q3,
+                'fliers': valores[(valores < lim_inf) | (valores > lim_sup)]}
+
+    @property
+    def nbytes(self):
+        arreglos = [*self.positivos, *self.negativos] + ([self.valores] if self.exacto else [])
+        return sum(a.nbytes for a in arreglos)
+
+
+def sumar_cubetas(a, b):
+    indices = np.concatenate([a[0], b[0]])
+    conteos = np.concatenate([a[1], b[1]])
+    if indices.size == 0:
+        return a
+    unicos, posicion = np.unique(indices, return_inverse=True)
+    return unicos, np.bincount(posicion, weights=conteos, minlength=unicos.size).astype(np.int64)
+
+
+def sketch_de(valores, **opciones):
+    return SketchGasto(**opciones).agregar(valores)
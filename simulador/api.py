@@ -0,0 +1,62 @@
+from estado import nuevo_id
+from jugadas import JugadaInvalida, aplicar_jugadas, crear_juego, diferencias, estado_publico
+
+# API JSON del juego para jugadores automáticos. Cada función recibe el almacén y los datos ya
+# leídos y devuelve (cuerpo, código HTTP); app.py (Flask) y asgi.py (Starlette) solo las envuelven.
+#
+#   POST /api/juegos                    {"participantes": 30, "dulces_para_cambiar": 6, ...} -> id y estado
+#   GET  /api/juegos/<id>               estado del juego (sin el reparto inicial)
+#   POST /api/juegos/<id>/cambios       {"jugadas": [{"accion": "cambiar_dulces_a_chupetin",
+#                                                     "dulces": {"limon": 2, ...}, "extra": {...}}, ...]}
+#                                       -> solo lo que cambió; si una jugada falla no se aplica ninguna
+#
+# Las jugadas tienen el mismo formato que las de /pista, así un bot puede enviar el plan tal cual.
+
+MAX_JUGADAS = 10_000
+MAX_PARTICIPANTES = 1_000_000
+
+
+def parametros_juego(datos):
+    # Valida la configuración de un juego nuevo (JSON o formulario); ValueError con el mensaje si no es válida.
+    # El límite de participantes evita repartir millones de manos dentro de la petición
+    try:
+        parametros = [int(datos.get(clave, valor)) for clave, valor in
+                      (('participantes', None), ('dulces_para_cambiar', 6), ('dulces_extra', 2), ('dulces_recibidos', 6))]
+    except (TypeError, ValueError):
+        raise ValueError("participantes, dulces_para_cambiar, dulces_extra y dulces_recibidos deben ser enteros")
+    if not 1 <= parametros[0] <= MAX_PARTICIPANTES or min(parametros[1:]) < 0:
+        raise ValueError(f"participantes debe estar entre 1 y {MAX_PARTICIPANTES} y los dulces no pueden ser negativos")
+    return parametros
+
+
+def crear(almacen, datos):
+    try:
+        parametros = parametros_juego(datos)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    juego_id, juego = nuevo_id(), crear_juego(*parametros)
+    almacen.guardar(juego_id, juego)
+    return {'id': juego_id, 'estado': estado_publico(juego)}, 201
+
+
+def consultar(almacen, juego_id):
+    juego = almacen.cargar(juego_id)
+    if juego is None:
+        return {'error': "El juego no existe o ya venció"}, 404
+    return estado_publico(juego), 200
+
+
+def aplicar(almacen, juego_id, datos):
+    jugadas = datos.get('jugadas')
+    if not isinstance(jugadas, list) or not all(isinstance(j, dict) for j in jugadas):
+        return {'error': "Se espera {\"jugadas\": [{\"accion\": ..., \"dulces\": {...}}, ...]}"}, 400
+    if len(jugadas) > MAX_JUGADAS:
+        return {'error': f"Como máximo {MAX_JUGADAS} jugadas por petición"}, 400
+    try:
+        resultado = almacen.actualizar(juego_id, lambda juego: aplicar_jugadas(juego, jugadas))
+    except JugadaInvalida as e:
+        return {'error': str(e), 'jugada': e.jugada}, 422
+    if resultado is None:
+        return {'error': "El juego no existe o ya venció"}, 404
+    antes, despues = resultado
+    return {'aplicadas': len(jugadas), 'cambios': diferencias(antes, despues)}, 200
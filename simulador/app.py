@@ -1,31 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-import random
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
 from collections import Counter
 
+import numpy as np
+
+import api
+from estado import crear_almacen, nuevo_id
+from jugadas import JugadaInvalida, cambiar_chupetin_a_dulces, cambiar_dulces_a_chupetin, crear_juego
+from montecarlo import simular
+from solucionador import pista
+from reglas import DULCES, nombres_reparto, valida_combinacion
+
 app = Flask(__name__)
 app.secret_key = 'clave-secreta-para-sesiones'
 
-DULCES = ['limon', 'pera', 'huevo']
-
-# Función para validar combinaciones permitidas
-def valida_combinacion(dulces_totales, cantidad):
-    c = dulces_totales
-    if cantidad == 3:
-        # 1 de cada tipo
-        return all(c[d] >= 1 for d in DULCES)
-    elif cantidad == 4:
-        # 2 pares iguales (ej: 2 limon + 2 pera)
-        pares = [c[d] // 2 for d in DULCES]
-        return sum(pares) >= 2
-    elif cantidad == 6:
-        # 2 de cada tipo
-        return all(c[d] >= 2 for d in DULCES)
-    elif cantidad == 9:
-        # 3 de cada tipo
-        return all(c[d] >= 3 for d in DULCES)
-    else:
-        # Para otros casos, solo checamos que haya suficientes dulces en total
-        return sum(c.values()) >= cantidad
+# El juego se guarda en el servidor; la cookie de sesión solo lleva su id (ver estado.py)
+almacen = crear_almacen()
+
+# Participantes iniciales que se muestran por página
+PARTICIPANTES_POR_PAGINA = 50
+
+def cargar_juego():
+    # Estado del juego de esta sesión ({} si no hay juego o ya venció)
+    juego_id = session.get('juego_id')
+    return (almacen.cargar(juego_id) if juego_id else None) or {}
+
+def guardar_juego(juego):
+    almacen.guardar(session['juego_id'], juego)
 
 # Página inicial y manejo de todo el juego
 @app.route('/', methods=['GET', 'POST'])
@@ -35,36 +35,20 @@ def index():
     if request.method == 'POST':
         accion = request.form.get('accion')
         if accion == 'reiniciar_juego':
+            if 'juego_id' in session:
+                almacen.borrar(session['juego_id'])
             session.clear()
             return redirect(url_for('index'))
 
         # Primera configuración del juego
         if not accion:
             try:
-                num = int(request.form['participantes'])
-                dulces_para_cambiar = int(request.form['dulces_para_cambiar'])
-                dulces_extra = int(request.form['dulces_extra'])
-                dulces_recibidos = int(request.form['dulces_recibidos'])
-
-                participantes = []
-                dulces_totales = Counter()
-
-                # Dar 2 dulces aleatorios a cada participante
-                for _ in range(num):
-                    dulces = random.choices(DULCES, k=2)
-                    participantes.append(dulces)
-                    dulces_totales.update(dulces)
-
-                # Guardamos datos en sesión
-                session['num'] = num
-                session['dulces_para_cambiar'] = dulces_para_cambiar
-                session['dulces_extra'] = dulces_extra
-                session['dulces_recibidos'] = dulces_recibidos
-                session['participantes'] = participantes
-                session['dulces_totales'] = dict(dulces_totales)
-                session['chupetines'] = 0
-                session['cambios_dulces_a_chupetin'] = 0
-                session['cambios_chupetin_a_dulces'] = 0
+                # Mismas validaciones que la API JSON (límite de participantes, dulces no negativos)
+                num, dulces_para_cambiar, dulces_extra, dulces_recibidos = api.parametros_juego(request.form)
+
+                # Guardamos el juego en el servidor (nuevo id en la sesión)
+                session['juego_id'] = nuevo_id()
+                guardar_juego(crear_juego(num, dulces_para_cambiar, dulces_extra, dulces_recibidos))
 
             except Exception as e:
                 flash(f"Error: {e}")
@@ -72,100 +56,40 @@ def index():
         
         # Cambios de dulces
         else:
-            num = session.get('num', 0)
-            dulces_para_cambiar = session.get('dulces_para_cambiar', 0)
-            dulces_extra = session.get('dulces_extra', 0)
-            dulces_recibidos = session.get('dulces_recibidos', 0)
-            participantes = session.get('participantes', [])
-            dulces_totales = Counter(session.get('dulces_totales', {}))
-            chupetines = session.get('chupetines', 0)
-            cambios_dulces_a_chupetin = session.get('cambios_dulces_a_chupetin', 0)
-            cambios_chupetin_a_dulces = session.get('cambios_chupetin_a_dulces', 0)
-
-            if accion == 'cambiar_dulces_a_chupetin':
-                # Usuario debe elegir dulces exactos dulces_para_cambiar
-                dulces_elegidos = []
-                for d in DULCES:
-                    cantidad = int(request.form.get(f'dulce_{d}', 0))
-                    dulces_elegidos.extend([d]*cantidad)
-
-                extra_elegidos = []
-                for d in DULCES:
-                    cantidad = int(request.form.get(f'extra_{d}', 0))
-                    extra_elegidos.extend([d]*cantidad)
-
-                if len(dulces_elegidos) != dulces_para_cambiar:
-                    mensaje = f"Debes elegir exactamente {dulces_para_cambiar} dulces para cambiar por un chupetín."
-                elif len(extra_elegidos) != dulces_extra:
-                    mensaje = f"Debes elegir exactamente {dulces_extra} dulces extra."
+            juego = cargar_juego()
+            # Si el juego no venció se aplica el cambio; los errores de la jugada se muestran como mensaje
+            if juego:
+                try:
+                    if accion == 'cambiar_dulces_a_chupetin':
+                        juego = cambiar_dulces_a_chupetin(juego,
+                                                          {d: request.form.get(f'dulce_{d}', 0) for d in DULCES},
+                                                          {d: request.form.get(f'extra_{d}', 0) for d in DULCES})
+                    elif accion == 'cambiar_chupetin_a_dulces':
+                        juego = cambiar_chupetin_a_dulces(juego, {d: request.form.get(f'dulce_{d}', 0) for d in DULCES})
+                except JugadaInvalida as e:
+                    mensaje = str(e)
                 else:
-                    contador_elegidos = Counter(dulces_elegidos)
-                    if not valida_combinacion(contador_elegidos, dulces_para_cambiar):
-                        if dulces_para_cambiar == 3:
-                            mensaje = "Para 3 dulces debe ser: 1 de cada tipo (1 limón + 1 pera + 1 huevo)."
-                        elif dulces_para_cambiar == 4:
-                            mensaje = "Para 4 dulces debe ser: 2 pares iguales (ej: 2 limón + 2 pera)."
-                        elif dulces_para_cambiar == 6:
-                            mensaje = "Para 6 dulces debe ser: 2 de cada tipo (2 limón + 2 pera + 2 huevo)."
-                        elif dulces_para_cambiar == 9:
-                            mensaje = "Para 9 dulces debe ser: 3 de cada tipo (3 limón + 3 pera + 3 huevo)."
-                        else:
-                            mensaje = "Combinación inválida. Revisa las reglas."
-                    else:
-                        disponibles = True
-                        for d in DULCES:
-                            if dulces_elegidos.count(d) > dulces_totales.get(d, 0):
-                                disponibles = False
-                                break
-
-                        if not disponibles:
-                            mensaje = "No tienes suficientes dulces para esa combinación."
-                        else:
-                            for d in dulces_elegidos:
-                                dulces_totales[d] -= 1
-                            for d in extra_elegidos:
-                                dulces_totales[d] += 1
-                            chupetines += 1
-                            cambios_dulces_a_chupetin += 1
-
-
-            elif accion == 'cambiar_chupetin_a_dulces':
-                if chupetines == 0:
-                    mensaje = "No tienes chupetines para cambiar."
-                else:
-                    # Usuario debe elegir dulces para recibir exactamente dulces_recibidos
-                    dulces_elegidos = []
-                    for d in DULCES:
-                        cantidad = int(request.form.get(f'dulce_{d}', 0))
-                        dulces_elegidos.extend([d]*cantidad)
-
-                    if len(dulces_elegidos) != dulces_recibidos:
-                        mensaje = f"Debes elegir exactamente {dulces_recibidos} dulces al cambiar un chupetín."
-                    else:
-                        chupetines -= 1
-                        cambios_chupetin_a_dulces += 1
-                        # Agregar los dulces elegidos
-                        for d in dulces_elegidos:
-                            dulces_totales[d] += 1
-
-            # Guardamos todo actualizado en sesión
-            session['dulces_totales'] = dict(dulces_totales)
-            session['chupetines'] = chupetines
-            session['cambios_dulces_a_chupetin'] = cambios_dulces_a_chupetin
-            session['cambios_chupetin_a_dulces'] = cambios_chupetin_a_dulces
+                    # Guardamos todo actualizado en el servidor
+                    guardar_juego(juego)
 
     # Obtener datos para mostrar solo si hay juego iniciado
-    num = session.get('num')
+    juego = cargar_juego()
+    num = juego.get('num')
     
     if num:
-        participantes = session.get('participantes', [])
-        dulces_totales = Counter(session.get('dulces_totales', {}))
-        chupetines = session.get('chupetines', 0)
-        cambios_dulces_a_chupetin = session.get('cambios_dulces_a_chupetin', 0)
-        cambios_chupetin_a_dulces = session.get('cambios_chupetin_a_dulces', 0)
-        dulces_para_cambiar = session.get('dulces_para_cambiar', 6)
-        dulces_extra = session.get('dulces_extra', 2)
-        dulces_recibidos = session.get('dulces_recibidos', 6)
+        # Solo se decodifica la página pedida de participantes; el resto se resume en `manos`
+        codigos = np.frombuffer(juego.get('participantes', b''), dtype=np.uint8).reshape(-1, 2)
+        paginas = max(1, -(-len(codigos) // PARTICIPANTES_POR_PAGINA))
+        pagina = min(max(request.args.get('pagina', 1, type=int), 1), paginas)
+        inicio = (pagina - 1) * PARTICIPANTES_POR_PAGINA
+        participantes = nombres_reparto(codigos[inicio:inicio + PARTICIPANTES_POR_PAGINA])
+        dulces_totales = Counter(juego.get('dulces_totales', {}))
+        chupetines = juego.get('chupetines', 0)
+        cambios_dulces_a_chupetin = juego.get('cambios_dulces_a_chupetin', 0)
+        cambios_chupetin_a_dulces = juego.get('cambios_chupetin_a_dulces', 0)
+        dulces_para_cambiar = juego.get('dulces_para_cambiar', 6)
+        dulces_extra = juego.get('dulces_extra', 2)
+        dulces_recibidos = juego.get('dulces_recibidos', 6)
 
         # Validar combinaciones
         cantidad_dulces = sum(dulces_totales.values())
@@ -177,6 +101,10 @@ def index():
         return render_template('index.html',
                                num=num,
                                participantes=participantes,
+                               primer_participante=inicio + 1,
+                               pagina=pagina,
+                               paginas=paginas,
+                               manos=juego.get('manos', []),
                                dulces_totales=dulces_totales,
                                chupetines=chupetines,
                                cambios_dulces_a_chupetin=cambios_dulces_a_chupetin,
@@ -191,5 +119,65 @@ def index():
         # No hay juego iniciado, solo mostrar formulario inicial
         return render_template('index.html', num=None)
 
+# Monte Carlo: probabilidad de salvar a todos con unos parámetros (ver montecarlo.py)
+# Ej: /montecarlo?participantes=20&dulces_para_cambiar=6&dulces_extra=2&dulces_recibidos=6&juegos=100000
+# Corre dentro de la petición y en un solo proceso: los límites lo dejan en pocos segundos.
+# Estudios más grandes o en paralelo, con `python montecarlo.py`.
+MAX_JUEGOS_MONTECARLO = 1_000_000
+MAX_PARTICIPANTES_MONTECARLO = 500
+MAX_DULCES_MONTECARLO = 50
+
+@app.route('/montecarlo')
+def montecarlo():
+    try:
+        participantes = request.args.get('participantes', 10, type=int)
+        dulces_para_cambiar = request.args.get('dulces_para_cambiar', 6, type=int)
+        dulces_extra = request.args.get('dulces_extra', 2, type=int)
+        dulces_recibidos = request.args.get('dulces_recibidos', 6, type=int)
+        juegos = min(request.args.get('juegos', 100_000, type=int), MAX_JUEGOS_MONTECARLO)
+        semilla = request.args.get('semilla', None, type=int)
+        if participantes > MAX_PARTICIPANTES_MONTECARLO:
+            raise ValueError(f"Como máximo {MAX_PARTICIPANTES_MONTECARLO} participantes (usar montecarlo.py para más)")
+        if max(dulces_para_cambiar, dulces_extra, dulces_recibidos) > MAX_DULCES_MONTECARLO:
+            raise ValueError(f"Como máximo {MAX_DULCES_MONTECARLO} dulces por cambio")
+        return jsonify(simular(participantes, dulces_para_cambiar, dulces_extra, dulces_recibidos,
+                               juegos=juegos, semilla=semilla, workers=1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+# Pista: ¿se puede salvar a todos desde el estado actual del juego y con cuántos cambios? (ver solucionador.py)
+# La búsqueda corre dentro de la petición: se acota en nodos y en tiempo (resoluble=None si no alcanza)
+MAX_NODOS_PISTA = 5_000
+MAX_SEGUNDOS_PISTA = 1.0
+
+@app.route('/pista')
+def pista_juego():
+    juego = cargar_juego()
+    if not juego:
+        return jsonify({'error': 'No hay un juego iniciado'}), 404
+    resultado = pista(juego['dulces_totales'], juego['chupetines'], juego['num'],
+                      juego['dulces_para_cambiar'], juego['dulces_extra'], juego['dulces_recibidos'],
+                      max_nodos=MAX_NODOS_PISTA, max_segundos=MAX_SEGUNDOS_PISTA)
+    if not request.args.get('plan'):
+        # El plan completo puede tener cientos de jugadas: solo si se pide (?plan=1)
+        resultado.pop('plan')
+    return jsonify(resultado)
+
+# API JSON por lotes para jugadores automáticos (ver api.py); asgi.py sirve las mismas rutas en modo async
+@app.route('/api/juegos', methods=['POST'])
+def api_crear_juego():
+    cuerpo, codigo = api.crear(almacen, request.get_json(silent=True) or {})
+    return jsonify(cuerpo), codigo
+
+@app.route('/api/juegos/<juego_id>')
+def api_consultar_juego(juego_id):
+    cuerpo, codigo = api.consultar(almacen, juego_id)
+    return jsonify(cuerpo), codigo
+
+@app.route('/api/juegos/<juego_id>/cambios', methods=['POST'])
+def api_aplicar_cambios(juego_id):
+    cuerpo, codigo = api.aplicar(almacen, juego_id, request.get_json(silent=True) or {})
+    return jsonify(cuerpo), codigo
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
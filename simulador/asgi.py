@@ -0,0 +1,60 @@
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # opcional: sin a2wsgi se usa el adaptador de Starlette
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+import api
+from app import app as app_flask, almacen
+from estado import AlmacenMemoria
+
+# Modo async: la API JSON corre como corutinas en el bucle de eventos y el resto de la app (HTML,
+# /pista, /montecarlo) se sirve desde Flask a través del adaptador WSGI.
+#
+#   uvicorn asgi:app --workers 4
+#
+# Crear un juego (hasta un millón de participantes) y aplicar un lote (hasta 10.000 jugadas) pueden
+# tardar, así que van al pool de hilos para no frenar las demás conexiones del worker. Solo la
+# consulta con AlmacenMemoria, que es una lectura de diccionario, se responde en el bucle.
+# Ojo: con varios workers el almacén en memoria es uno por proceso; usar SIMULADOR_ESTADO=sqlite.
+
+
+async def consultar(juego_id):
+    if isinstance(almacen, AlmacenMemoria):
+        return api.consultar(almacen, juego_id)
+    return await run_in_threadpool(api.consultar, almacen, juego_id)
+
+
+async def datos_json(request):
+    try:
+        datos = await request.json()
+    except ValueError:
+        return {}
+    return datos if isinstance(datos, dict) else {}
+
+
+async def crear_juego(request):
+    cuerpo, codigo = await run_in_threadpool(api.crear, almacen, await datos_json(request))
+    return JSONResponse(cuerpo, status_code=codigo)
+
+
+async def consultar_juego(request):
+    cuerpo, codigo = await consultar(request.path_params['juego_id'])
+    return JSONResponse(cuerpo, status_code=codigo)
+
+
+async def aplicar_cambios(request):
+    cuerpo, codigo = await run_in_threadpool(api.aplicar, almacen, request.path_params['juego_id'], await datos_json(request))
+    return JSONResponse(cuerpo, status_code=codigo)
+
+
+app = Starlette(routes=[
+    Route('/api/juegos', crear_juego, methods=['POST']),
+    Route('/api/juegos/{juego_id}', consultar_juego, methods=['GET']),
+    Route('/api/juegos/{juego_id}/cambios', aplicar_cambios, methods=['POST']),
+    Mount('/', WSGIMiddleware(app_flask)),
+])
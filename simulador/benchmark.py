@@ -0,0 +1,340 @@
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from reglas import DULCES
+from solucionador import pista
+
+# Benchmark de carga y latencia del simulador.
+#
+# Cada escenario (flujo × participantes × concurrencia) juega `flujos` partidas completas, cada una
+# con su propia sesión, repartidas entre `concurrencia` jugadores simultáneos:
+#   - formulario: GET /, configuración, [GET /pista], `jugadas` cambios por formulario,
+#     GET /?pagina=2 y reinicio, como un jugador en el navegador;
+#   - api: POST /api/juegos, un lote de `jugadas` cambios y GET del estado, como un jugador automático.
+# Las jugadas son válidas: salen de un plan corto del solucionador calculado en el cliente (sin medir)
+# a partir de los dulces que muestra la página o devuelve la API.
+#
+# Modos:
+#   - cliente: Flask test client en el mismo proceso (mide solo el código de la app);
+#   - servidor: levanta `uvicorn asgi:app` con varios workers en un puerto libre y le pega por HTTP;
+#   - --url: usa un servidor ya levantado.
+#
+# Guarda throughput, latencias p50/p95/p99 y tamaños de respuesta y de la cookie por escenario y por
+# tipo de petición en JSON, y compara contra una corrida anterior (sale con código 1 si hay regresiones).
+#
+# Uso:
+#   python benchmark.py --participantes 10 100 1000 --concurrencia 1 4 16 --json base.json
+#   python benchmark.py --modo servidor --workers 4 --json actual.json --comparar base.json
+#   python benchmark.py --comparar base.json --actual actual.json
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+CONFIGURACION = {'dulces_para_cambiar': 6, 'dulces_extra': 2, 'dulces_recibidos': 6}
+PERCENTILES = (50, 95, 99)
+TOLERANCIA = 0.10
+
+# Métricas del total de cada escenario que se comparan entre corridas: +1 mejor si sube, -1 si baja
+METRICAS_COMPARADAS = {
+    'peticiones_por_segundo': 1,
+    'ms_p50': -1,
+    'ms_p95': -1,
+    'ms_p99': -1,
+    'bytes_media': -1,
+    'cookie_max_bytes': -1,
+}
+
+
+class ClientePrueba:
+    """Flask test client con su propia sesión (cookies)."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def pedir(self, metodo, ruta, form=None, json=None):
+        r = self.cliente.open(ruta, method=metodo, data=form, json=json)
+        return r.status_code, r.get_data(), sum(len(c) for c in r.headers.getlist('Set-Cookie'))
+
+
+class ClienteHTTP:
+    """Sesión de requests contra un servidor real; no sigue redirecciones para medir cada petición."""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.sesion = requests.Session()
+
+    def pedir(self, metodo, ruta, form=None, json=None):
+        r = self.sesion.request(metodo, self.url + ruta, data=form, json=json, allow_redirects=False)
+        return r.status_code, r.content, len(r.headers.get('Set-Cookie', ''))
+
+
+def medir(cliente, registros, etiqueta, metodo, ruta, form=None, json=None):
+    inicio = time.perf_counter()
+    codigo, cuerpo, cookie = cliente.pedir(metodo, ruta, form=form, json=json)
+    registros.append((etiqueta, time.perf_counter() - inicio, len(cuerpo), codigo, cookie))
+    return cuerpo
+
+
+def plan_corto(dulces_totales, participantes, jugadas):
+    # Las jugadas válidas no dependen de la meta: basta un plan para salvar a `jugadas` participantes
+    resultado = pista(dulces_totales, 0, min(participantes, jugadas), CONFIGURACION['dulces_para_cambiar'],
+                      CONFIGURACION['dulces_extra'], CONFIGURACION['dulces_recibidos'])
+    return (resultado['plan'] or [])[:jugadas]
+
+
+def totales_pagina(html):
+    # Los dulces que el jugador ve en la página ("Limon: 15")
+    totales = {}
+    for d in DULCES:
+        encontrado = re.search(rf'<li>{d.title()}: (\d+)</li>', html)
+        totales[d] = int(encontrado.group(1)) if encontrado else 0
+    return totales
+
+
+def flujo_formulario(cliente, participantes, jugadas, con_pista):
+    registros = []
+    medir(cliente, registros, 'inicio', 'GET', '/')
+    html = medir(cliente, registros, 'configurar', 'POST', '/',
+                 form={'participantes': participantes, **CONFIGURACION}).decode()
+    if con_pista:
+        medir(cliente, registros, 'pista', 'GET', '/pista')
+    for jugada in plan_corto(totales_pagina(html), participantes, jugadas):
+        form = {'accion': jugada['accion']}
+        form.update({f'dulce_{d}': n for d, n in jugada['dulces'].items()})
+        form.update({f'extra_{d}': n for d, n in jugada.get('extra', {}).items()})
+        medir(cliente, registros, 'cambio', 'POST', '/', form=form)
+    medir(cliente, registros, 'pagina', 'GET', '/?pagina=2')
+    medir(cliente, registros, 'reiniciar', 'POST', '/', form={'accion': 'reiniciar_juego'})
+    return registros
+
+
+def flujo_api(cliente, participantes, jugadas, con_pista):
+    registros = []
+    creado = json.loads(medir(cliente, registros, 'api_crear', 'POST', '/api/juegos',
+                              json={'participantes': participantes, **CONFIGURACION}))
+    ruta = f"/api/juegos/{creado['id']}"
+    plan = plan_corto(creado['estado']['dulces_totales'], participantes, jugadas)
+    medir(cliente, registros, 'api_cambios', 'POST', ruta + '/cambios', json={'jugadas': plan})
+    medir(cliente, registros, 'api_consultar', 'GET', ruta)
+    return registros
+
+
+FLUJOS = {
+    'formulario': flujo_formulario,
+    'api': flujo_api,
+}
+
+
+def estadisticas(registros):
+    ms = np.array([r[1] for r in registros]) * 1000
+    tamanos = np.array([r[2] for r in registros])
+    percentiles = np.percentile(ms, PERCENTILES)
+    resumen = {'peticiones': len(registros), 'errores': sum(r[3] >= 400 for r in registros),
+               'ms_media': round(float(ms.mean()), 3)}
+    resumen.update({f'ms_p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, percentiles)})
+    resumen.update({'bytes_media': round(float(tamanos.mean()), 1), 'bytes_max': int(tamanos.max())})
+    return resumen
+
+
+def correr_escenario(nuevo_cliente, flujo, participantes, concurrencia, flujos, jugadas, con_pista, calentamiento):
+    jugar = FLUJOS[flujo]
+    for _ in range(calentamiento):
+        jugar(nuevo_cliente(), participantes, jugadas, con_pista)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        partidas = list(executor.map(lambda _: jugar(nuevo_cliente(), participantes, jugadas, con_pista),
+                                     range(flujos)))
+    segundos = time.perf_counter() - inicio
+
+    registros = [r for partida in partidas for r in partida]
+    total = estadisticas(registros)
+    total['peticiones_por_segundo'] = round(len(registros) / segundos, 2)
+    total['flujos_por_segundo'] = round(flujos / segundos, 2)
+    total['cookie_max_bytes'] = max(r[4] for r in registros)
+    etiquetas = dict.fromkeys(r[0] for r in registros)
+    return {
+        'flujo': flujo,
+        'participantes': participantes,
+        'concurrencia': concurrencia,
+        'flujos': flujos,
+        'segundos': round(segundos, 3),
+        'total': total,
+        'por_peticion': {e: estadisticas([r for r in registros if r[0] == e]) for e in etiquetas},
+    }
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def servidor_local(workers, entorno):
+    """`uvicorn asgi:app` con `workers` procesos; devuelve la URL cuando ya responde."""
+    puerto = puerto_libre()
+    url = f'http://127.0.0.1:{puerto}'
+    proceso = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(puerto),
+                                '--workers', str(workers), '--log-level', 'warning'],
+                               cwd=CARPETA, env={**os.environ, **entorno})
+    try:
+        limite = time.time() + 30
+        while True:
+            try:
+                requests.get(url + '/', timeout=1)
+                break
+            except requests.ConnectionError:
+                if proceso.poll() is not None or time.time() > limite:
+                    raise RuntimeError("El servidor de prueba no arrancó")
+                time.sleep(0.2)
+        yield url
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
+
+
+def version_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=CARPETA, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def clave(escenario):
+    return escenario['flujo'], escenario['participantes'], escenario['concurrencia']
+
+
+def comparar(base, actual, tolerancia=TOLERANCIA):
+    """Filas (escenario, métrica, antes, después, cambio relativo, es_regresión) de los escenarios comunes."""
+    anteriores = {clave(e): e for e in base['escenarios']}
+    filas = []
+    for escenario in actual['escenarios']:
+        anterior = anteriores.get(clave(escenario))
+        if anterior is None:
+            continue
+        for metrica, sentido in METRICAS_COMPARADAS.items():
+            antes, despues = anterior['total'].get(metrica), escenario['total'].get(metrica)
+            if antes is None or despues is None:
+                continue
+            cambio = (despues - antes) / antes if antes else 0.0
+            filas.append((clave(escenario), metrica, antes, despues, cambio, cambio * sentido < -tolerancia))
+    return filas
+
+
+def imprimir_comparacion(base, actual, tolerancia):
+    if base['meta'].get('modo') != actual['meta'].get('modo'):
+        print(f"Aviso: se comparan modos distintos ({base['meta'].get('modo')} vs {actual['meta'].get('modo')})")
+    filas = comparar(base, actual, tolerancia)
+    for (flujo, participantes, concurrencia), metrica, antes, despues, cambio, regresion in filas:
+        print(f"{flujo:>10} participantes={participantes:>5} concurrencia={concurrencia:>3} {metrica:>22}: "
+              f"{antes:>10} -> {despues:>10} ({cambio:+.1%}){'  REGRESIÓN' if regresion else ''}")
+    regresiones = sum(f[5] for f in filas)
+    print(f"{regresiones} regresiones (tolerancia {tolerancia:.0%}) en {len(filas)} comparaciones")
+    return regresiones
+
+
+def main(args):
+    if args.actual:
+        if not args.comparar:
+            sys.exit("--actual necesita --comparar")
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        with open(args.actual, encoding='utf-8') as f:
+            actual = json.load(f)
+        sys.exit(1 if imprimir_comparacion(base, actual, args.tolerancia) else 0)
+
+    modo = 'http' if args.url else args.modo
+    with tempfile.TemporaryDirectory() as carpeta:
+        entorno = {'SIMULADOR_ESTADO': args.estado, 'SIMULADOR_SQLITE': os.path.join(carpeta, 'juegos.sqlite3')}
+        if modo == 'cliente':
+            # El almacén se elige al importar app
+            os.environ.update(entorno)
+            from app import app
+            servidor = None
+            nuevo_cliente = lambda: ClientePrueba(app)  # noqa: E731
+        else:
+            servidor = servidor_local(args.workers, entorno) if modo == 'servidor' else None
+            url = servidor.__enter__() if servidor else args.url
+            nuevo_cliente = lambda: ClienteHTTP(url)  # noqa: E731
+
+        escenarios = []
+        try:
+            for flujo in args.flujo:
+                for participantes in args.participantes:
+                    for concurrencia in args.concurrencia:
+                        e = correr_escenario(nuevo_cliente, flujo, participantes, concurrencia, args.flujos,
+                                             args.jugadas, args.con_pista, args.calentamiento)
+                        escenarios.append(e)
+                        t = e['total']
+                        print(f"{flujo:>10} participantes={participantes:>5} concurrencia={concurrencia:>3}: "
+                              f"{t['peticiones_por_segundo']:>8.1f} pet/s  p50={t['ms_p50']:.1f} ms  "
+                              f"p95={t['ms_p95']:.1f} ms  p99={t['ms_p99']:.1f} ms  "
+                              f"{t['bytes_media']:.0f} B/resp  cookie={t['cookie_max_bytes']} B  errores={t['errores']}")
+        finally:
+            if servidor:
+                servidor.__exit__(None, None, None)
+
+    resultados = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': version_git(),
+            'modo': modo,
+            'workers': args.workers if modo == 'servidor' else None,
+            'estado': args.estado if modo != 'http' else None,
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'flujos': args.flujos,
+            'jugadas': args.jugadas,
+            'con_pista': args.con_pista,
+        },
+        'escenarios': escenarios,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        sys.exit(1 if imprimir_comparacion(base, resultados, args.tolerancia) else 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de carga y latencia del simulador.")
+    parser.add_argument('--modo', choices=['cliente', 'servidor'], default='cliente',
+                        help="Flask test client en proceso o uvicorn con varios workers")
+    parser.add_argument('--url', default=None, help="Usar un servidor ya levantado (ej. http://127.0.0.1:8000)")
+    parser.add_argument('--workers', type=int, default=4, help="Workers de uvicorn en modo servidor")
+    parser.add_argument('--estado', choices=['memoria', 'sqlite'], default=None,
+                        help="Backend de estado (por defecto memoria; sqlite si hay varios workers)")
+    parser.add_argument('--flujo', nargs='+', choices=list(FLUJOS), default=list(FLUJOS))
+    parser.add_argument('--participantes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 4, 16], help="Jugadores simultáneos")
+    parser.add_argument('--flujos', type=int, default=20, help="Partidas medidas por escenario")
+    parser.add_argument('--jugadas', type=int, default=20, help="Cambios por partida")
+    parser.add_argument('--con-pista', action='store_true', help="Pedir /pista en el flujo de formulario")
+    parser.add_argument('--calentamiento', type=int, default=2, help="Partidas sin medir antes de cada escenario")
+    parser.add_argument('--json', default=None, help="Guardar los resultados en este archivo JSON")
+    parser.add_argument('--comparar', default=None, help="JSON de una corrida anterior contra el que comparar")
+    parser.add_argument('--actual', default=None, help="Comparar este JSON (sin correr el benchmark)")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help="Empeoramiento relativo tolerado")
+    args = parser.parse_args()
+    multiproceso = args.modo == 'servidor' and not args.url and args.workers > 1
+    if args.estado is None:
+        args.estado = 'sqlite' if multiproceso else 'memoria'
+    elif args.estado == 'memoria' and multiproceso:
+        parser.error("Con varios workers cada proceso tendría su propio almacén en memoria: usar --estado sqlite")
+    main(args)
@@ -0,0 +1,132 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Estado de los juegos guardado en el servidor. La cookie de sesión solo lleva el id del juego,
+# así su tamaño no depende del número de participantes.
+#
+# Backends:
+#   - AlmacenMemoria: diccionario en el proceso con expulsión LRU y vencimiento (TTL).
+#     Es el más rápido, pero cada proceso del servidor tiene el suyo.
+#   - AlmacenSQLite: archivo SQLite local, compartido entre procesos y persistente entre reinicios.
+#     El estado se guarda con pickle (lleva los participantes como bytes); el archivo es del servidor.
+#
+# Se elige con la variable de entorno SIMULADOR_ESTADO=memoria|sqlite (SIMULADOR_SQLITE = ruta del archivo).
+
+MAX_JUEGOS = 1000
+TTL_SEGUNDOS = 6 * 60 * 60
+
+
+def nuevo_id():
+    return uuid.uuid4().hex
+
+
+class AlmacenMemoria:
+    def __init__(self, max_juegos=MAX_JUEGOS, ttl=TTL_SEGUNDOS):
+        self.max_juegos = max_juegos
+        self.ttl = ttl
+        self.juegos = OrderedDict()  # id -> (vence, estado); el más reciente al final
+        self.candado = threading.RLock()
+
+    def cargar(self, juego_id):
+        with self.candado:
+            entrada = self.juegos.get(juego_id)
+            if entrada is None:
+                return None
+            vence, estado = entrada
+            if vence < time.time():
+                del self.juegos[juego_id]
+                return None
+            self.juegos.move_to_end(juego_id)
+            return estado
+
+    def guardar(self, juego_id, estado):
+        with self.candado:
+            self.juegos[juego_id] = (time.time() + self.ttl, estado)
+            self.juegos.move_to_end(juego_id)
+            while len(self.juegos) > self.max_juegos:
+                self.juegos.popitem(last=False)
+
+    def actualizar(self, juego_id, funcion):
+        """Carga, aplica funcion(estado) y guarda sin que otra petición se intercale.
+
+        Devuelve (antes, después), o None si el juego no existe; si funcion falla no se guarda nada.
+        """
+        with self.candado:
+            estado = self.cargar(juego_id)
+            if estado is None:
+                return None
+            nuevo = funcion(estado)
+            self.guardar(juego_id, nuevo)
+            return estado, nuevo
+
+    def borrar(self, juego_id):
+        with self.candado:
+            self.juegos.pop(juego_id, None)
+
+
+class AlmacenSQLite:
+    def __init__(self, ruta, max_juegos=MAX_JUEGOS, ttl=TTL_SEGUNDOS):
+        self.ruta = ruta
+        self.max_juegos = max_juegos
+        self.ttl = ttl
+        self.local = threading.local()  # una conexión por hilo
+        with self.conexion() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS juegos ("
+                        "id TEXT PRIMARY KEY, estado BLOB NOT NULL, vence REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS juegos_vence ON juegos (vence)")
+
+    def conexion(self):
+        if getattr(self.local, 'con', None) is None:
+            self.local.con = sqlite3.connect(self.ruta, timeout=10)
+            self.local.con.execute("PRAGMA journal_mode=WAL")
+        return self.local.con
+
+    def cargar(self, juego_id):
+        fila = self.conexion().execute("SELECT estado FROM juegos WHERE id = ? AND vence >= ?",
+                                       (juego_id, time.time())).fetchone()
+        return None if fila is None else pickle.loads(fila[0])
+
+    def guardar(self, juego_id, estado):
+        ahora = time.time()
+        with self.conexion() as con:
+            con.execute("INSERT OR REPLACE INTO juegos (id, estado, vence) VALUES (?, ?, ?)",
+                        (juego_id, pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL), ahora + self.ttl))
+            # Vencidos y, si sobran, los usados hace más tiempo (vence crece con cada guardado)
+            con.execute("DELETE FROM juegos WHERE vence < ?", (ahora,))
+            con.execute("DELETE FROM juegos WHERE id IN (SELECT id FROM juegos ORDER BY vence DESC LIMIT -1 OFFSET ?)",
+                        (self.max_juegos,))
+
+    def actualizar(self, juego_id, funcion):
+        # BEGIN IMMEDIATE bloquea la escritura desde la lectura: otros procesos esperan su turno
+        con = self.conexion()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            fila = con.execute("SELECT estado FROM juegos WHERE id = ? AND vence >= ?",
+                               (juego_id, time.time())).fetchone()
+            if fila is None:
+                return None
+            estado = pickle.loads(fila[0])
+            nuevo = funcion(estado)
+            con.execute("UPDATE juegos SET estado = ?, vence = ? WHERE id = ?",
+                        (pickle.dumps(nuevo, protocol=pickle.HIGHEST_PROTOCOL), time.time() + self.ttl, juego_id))
+            return estado, nuevo
+
+    def borrar(self, juego_id):
+        with self.conexion() as con:
+            con.execute("DELETE FROM juegos WHERE id = ?", (juego_id,))
+
+
+def crear_almacen(tipo=None, ruta=None):
+    tipo = tipo or os.environ.get('SIMULADOR_ESTADO', 'memoria')
+    if tipo == 'memoria':
+        return AlmacenMemoria()
+    if tipo == 'sqlite':
+        ruta = ruta or os.environ.get('SIMULADOR_SQLITE',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'juegos.sqlite3'))
+        return AlmacenSQLite(ruta)
+    raise ValueError(f"Backend de estado desconocido: {tipo}")
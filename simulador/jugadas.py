@@ -0,0 +1,136 @@
+from collections import Counter
+
+from reglas import DULCES, manos_reparto, repartir_dulces, totales_reparto, valida_combinacion
+
+# Jugadas del juego como funciones puras: reciben el estado de un juego (el diccionario que se
+# guarda en estado.py) y devuelven el estado siguiente sin modificar el original. Las usan el
+# formulario de app.py y la API JSON por lotes (api.py).
+
+MENSAJES_COMBINACION = {
+    3: "Para 3 dulces debe ser: 1 de cada tipo (1 limón + 1 pera + 1 huevo).",
+    4: "Para 4 dulces debe ser: 2 pares iguales (ej: 2 limón + 2 pera).",
+    6: "Para 6 dulces debe ser: 2 de cada tipo (2 limón + 2 pera + 2 huevo).",
+    9: "Para 9 dulces debe ser: 3 de cada tipo (3 limón + 3 pera + 3 huevo).",
+}
+
+
+class JugadaInvalida(ValueError):
+    pass
+
+
+def crear_juego(num, dulces_para_cambiar, dulces_extra, dulces_recibidos):
+    # Dar 2 dulces aleatorios a cada participante (códigos uint8, de una vez)
+    participantes = repartir_dulces(num)
+    return {
+        'num': num,
+        'dulces_para_cambiar': dulces_para_cambiar,
+        'dulces_extra': dulces_extra,
+        'dulces_recibidos': dulces_recibidos,
+        'participantes': participantes.tobytes(),
+        'manos': manos_reparto(participantes),
+        'dulces_totales': totales_reparto(participantes),
+        'chupetines': 0,
+        'cambios_dulces_a_chupetin': 0,
+        'cambios_chupetin_a_dulces': 0,
+    }
+
+
+def contar_dulces(cantidades, total, mensaje):
+    """{'limon': 2, 'pera': '1'} -> Counter validado; la suma debe ser exactamente `total`.
+
+    Las cantidades vienen del formulario (texto) o del JSON de la API: se validan antes de usarlas,
+    así un número enorme no reserva memoria.
+    """
+    conteo = Counter()
+    for d in DULCES:
+        valor = cantidades.get(d, 0)
+        try:
+            if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+                raise ValueError(valor)
+            cantidad = int(valor)
+        except (TypeError, ValueError):
+            raise JugadaInvalida("Las cantidades de dulces deben ser números enteros.") from None
+        if cantidad < 0:
+            raise JugadaInvalida("Las cantidades de dulces no pueden ser negativas.")
+        conteo[d] = cantidad
+    if sum(conteo.values()) != total:
+        raise JugadaInvalida(mensaje)
+    return conteo
+
+
+def cambiar_dulces_a_chupetin(juego, dulces, extra):
+    dulces_para_cambiar = juego['dulces_para_cambiar']
+    dulces_extra = juego['dulces_extra']
+    # Usuario debe elegir dulces exactos dulces_para_cambiar
+    dulces_elegidos = contar_dulces(dulces, dulces_para_cambiar,
+                                    f"Debes elegir exactamente {dulces_para_cambiar} dulces para cambiar por un chupetín.")
+    extra_elegidos = contar_dulces(extra, dulces_extra, f"Debes elegir exactamente {dulces_extra} dulces extra.")
+    if not valida_combinacion(dulces_elegidos, dulces_para_cambiar):
+        raise JugadaInvalida(MENSAJES_COMBINACION.get(dulces_para_cambiar, "Combinación inválida. Revisa las reglas."))
+    dulces_totales = Counter(juego['dulces_totales'])
+    if any(dulces_elegidos[d] > dulces_totales.get(d, 0) for d in DULCES):
+        raise JugadaInvalida("No tienes suficientes dulces para esa combinación.")
+
+    dulces_totales.subtract(dulces_elegidos)
+    dulces_totales.update(extra_elegidos)
+    return {**juego,
+            'dulces_totales': dict(dulces_totales),
+            'chupetines': juego['chupetines'] + 1,
+            'cambios_dulces_a_chupetin': juego['cambios_dulces_a_chupetin'] + 1}
+
+
+def cambiar_chupetin_a_dulces(juego, dulces):
+    if juego['chupetines'] == 0:
+        raise JugadaInvalida("No tienes chupetines para cambiar.")
+    # Usuario debe elegir dulces para recibir exactamente dulces_recibidos
+    dulces_elegidos = contar_dulces(dulces, juego['dulces_recibidos'],
+                                    f"Debes elegir exactamente {juego['dulces_recibidos']} dulces al cambiar un chupetín.")
+
+    dulces_totales = Counter(juego['dulces_totales'])
+    dulces_totales.update(dulces_elegidos)
+    return {**juego,
+            'dulces_totales': dict(dulces_totales),
+            'chupetines': juego['chupetines'] - 1,
+            'cambios_chupetin_a_dulces': juego['cambios_chupetin_a_dulces'] + 1}
+
+
+def aplicar_jugada(juego, jugada):
+    """Una jugada con el formato de la API: {'accion': ..., 'dulces': {...}, 'extra': {...}}."""
+    accion = jugada.get('accion')
+    if accion == 'cambiar_dulces_a_chupetin':
+        return cambiar_dulces_a_chupetin(juego, jugada.get('dulces', {}), jugada.get('extra', {}))
+    if accion == 'cambiar_chupetin_a_dulces':
+        return cambiar_chupetin_a_dulces(juego, jugada.get('dulces', {}))
+    raise JugadaInvalida(f"Acción desconocida: {accion}")
+
+
+def aplicar_jugadas(juego, jugadas):
+    """Aplica todas las jugadas en orden; si una falla no se aplica ninguna (JugadaInvalida con su número)."""
+    for i, jugada in enumerate(jugadas, start=1):
+        try:
+            juego = aplicar_jugada(juego, jugada)
+        except (JugadaInvalida, TypeError, ValueError, AttributeError) as e:
+            error = JugadaInvalida(f"Jugada {i}: {e}")
+            error.jugada = i
+            raise error from e
+    return juego
+
+
+def estado_publico(juego):
+    # Todo menos el reparto inicial (que puede ocupar megabytes)
+    return {**{k: v for k, v in juego.items() if k != 'participantes'},
+            'salvados': juego['chupetines'] >= juego['num']}
+
+
+def diferencias(antes, despues):
+    """Solo lo que cambió entre dos estados (de dulces_totales, solo los tipos que cambiaron)."""
+    antes, despues = estado_publico(antes), estado_publico(despues)
+    cambios = {}
+    for clave, valor in despues.items():
+        if clave == 'dulces_totales':
+            dulces = {d: n for d, n in valor.items() if antes['dulces_totales'].get(d) != n}
+            if dulces:
+                cambios[clave] = dulces
+        elif antes.get(clave) != valor:
+            cambios[clave] = valor
+    return cambios
@@ -0,0 +1,172 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from reglas import DULCES, valida_combinaciones
+
+# Simulación Monte Carlo del juego de los dulces: ¿con qué parámetros se puede salvar a todos?
+#
+# Cada juego reparte 2 dulces al azar por participante (una multinomial de 2·participantes dulces
+# entre los tipos, igual que random.choices en app.py) y se juega con una política codiciosa:
+#   - si los dulces permiten una combinación válida, se cambian por un chupetín y los dulces
+#     extra se eligen para equilibrar los tipos;
+#   - si no, y cambiar un chupetín por dulces deja ganancia neta (recibidos + extra > para_cambiar),
+#     se cambia un chupetín por dulces, también equilibrando;
+#   - el juego termina cuando hay un chupetín por participante (salvados) o no queda jugada útil.
+# La política es determinista y no depende del nombre de cada dulce: el resultado de un juego solo
+# depende de sus conteos iniciales ordenados. Por eso cada lote se reduce a las combinaciones
+# iniciales distintas (unos cientos aunque el lote tenga cientos de miles de juegos) con su número
+# de apariciones, y todas avanzan juntas, una ronda (una jugada) a la vez, con NumPy.
+#
+# Uso:
+#   python montecarlo.py --participantes 10 20 50 --para-cambiar 3 4 6 --extra 1 2 --recibidos 3 6 --juegos 1000000
+
+TAMANO_LOTE = 250_000
+Z_95 = 1.959963984540054
+
+
+def conteos_iniciales(rng, juegos, participantes):
+    return rng.multinomial(2 * participantes, [1 / len(DULCES)] * len(DULCES), size=juegos)
+
+
+def combinaciones_distintas(conteos, total):
+    # Filas ordenadas, codificadas como un entero (base total + 1) para un np.unique rápido
+    base = total + 1
+    ordenados = np.sort(conteos, axis=1)
+    codigos = (ordenados[:, 0] * base + ordenados[:, 1]) * base + ordenados[:, 2]
+    unicos, repeticiones = np.unique(codigos, return_counts=True)
+    distintos = np.stack([unicos // (base * base), unicos // base % base, unicos % base], axis=1)
+    return distintos, repeticiones
+
+
+def quitar_combinacion(conteos, cantidad):
+    # Dulces entregados por un chupetín: la combinación válida que menos desequilibra lo que queda
+    filas = np.arange(len(conteos))
+    if cantidad in (3, 6, 9):
+        conteos -= cantidad // 3
+    elif cantidad == 4:
+        for _ in range(2):
+            conteos[filas, conteos.argmax(axis=1)] -= 2
+    else:
+        for _ in range(cantidad):
+            conteos[filas, conteos.argmax(axis=1)] -= 1
+    return conteos
+
+
+def agregar_equilibrado(conteos, cantidad):
+    # Dulces elegidos libremente (extra o recibidos): uno a uno al tipo del que hay menos
+    filas = np.arange(len(conteos))
+    for _ in range(cantidad):
+        conteos[filas, conteos.argmin(axis=1)] += 1
+    return conteos
+
+
+def simular_lote(participantes, para_cambiar, extra, recibidos, juegos, semilla, max_rondas=None):
+    """Juega `juegos` partidas a la vez; devuelve cuántas salvaron a todos y cuántas no terminaron."""
+    rng = np.random.default_rng(semilla)
+    conteos, repeticiones = combinaciones_distintas(conteos_iniciales(rng, juegos, participantes), 2 * participantes)
+    chupetines = np.zeros(len(conteos), dtype=np.int64)
+    ciclo_util = recibidos + extra > para_cambiar
+    # Con ganancia neta y recibidos >= para_cambiar, un chupetín basta: se cambia por dulces,
+    # se vuelve a cambiar por otro y sobran dulces, hasta juntar uno por participante
+    ciclo_seguro = ciclo_util and recibidos >= para_cambiar
+    max_rondas = max_rondas or 20 * participantes + 100
+
+    salvados = 0
+    for _ in range(max_rondas):
+        if len(conteos) == 0:
+            break
+        puede = valida_combinaciones(conteos, para_cambiar)
+        conteos[puede] = agregar_equilibrado(quitar_combinacion(conteos[puede], para_cambiar), extra)
+        chupetines[puede] += 1
+        if ciclo_util:
+            cambia = ~puede & (chupetines > 0)
+            conteos[cambia] = agregar_equilibrado(conteos[cambia], recibidos)
+            chupetines[cambia] -= 1
+
+        terminado = chupetines >= participantes
+        if ciclo_seguro:
+            terminado |= chupetines >= 1
+        salvados += int(repeticiones[terminado].sum())
+        sigue = ~terminado & (valida_combinaciones(conteos, para_cambiar) | (ciclo_util & (chupetines > 0)))
+        conteos, chupetines, repeticiones = conteos[sigue], chupetines[sigue], repeticiones[sigue]
+    return salvados, int(repeticiones.sum())
+
+
+def intervalo_wilson(exitos, total, z=Z_95):
+    if total == 0:
+        return (float('nan'), float('nan'))
+    p = exitos / total
+    centro = (p + z * z / (2 * total)) / (1 + z * z / total)
+    margen = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / (1 + z * z / total)
+    bajo = 0.0 if exitos == 0 else max(0.0, centro - margen)
+    alto = 1.0 if exitos == total else min(1.0, centro + margen)
+    return (bajo, alto)
+
+
+def simular(participantes, para_cambiar, extra, recibidos, juegos=1_000_000, semilla=None, workers=None,
+            tamano_lote=TAMANO_LOTE):
+    """Probabilidad de salvar a todos con intervalo de confianza del 95% (Wilson).
+
+    Los juegos se reparten en lotes con semillas independientes, en paralelo si workers > 1.
+    """
+    if participantes < 1 or para_cambiar < 1 or extra < 0 or recibidos < 0 or juegos < 1:
+        raise ValueError("Parámetros inválidos: participantes, para_cambiar y juegos deben ser positivos")
+    inicio = time.perf_counter()
+    lotes = [min(tamano_lote, juegos - i) for i in range(0, juegos, tamano_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(lotes))
+    workers = min(workers or os.cpu_count() or 1, len(lotes))
+    argumentos = [(participantes, para_cambiar, extra, recibidos, n, s) for n, s in zip(lotes, semillas)]
+    if workers <= 1:
+        resultados = [simular_lote(*a) for a in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(simular_lote, *zip(*argumentos)))
+
+    salvados = sum(r[0] for r in resultados)
+    sin_terminar = sum(r[1] for r in resultados)
+    return {
+        'participantes': participantes,
+        'dulces_para_cambiar': para_cambiar,
+        'dulces_extra': extra,
+        'dulces_recibidos': recibidos,
+        'juegos': juegos,
+        'salvados': salvados,
+        'sin_terminar': sin_terminar,
+        'probabilidad': salvados / juegos,
+        'intervalo_95': list(intervalo_wilson(salvados, juegos)),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def main(args):
+    resultados = []
+    for combinacion in itertools.product(args.participantes, args.para_cambiar, args.extra, args.recibidos):
+        r = simular(*combinacion, juegos=args.juegos, semilla=args.semilla, workers=args.workers)
+        resultados.append(r)
+        bajo, alto = r['intervalo_95']
+        print(f"participantes={r['participantes']:>4} para_cambiar={r['dulces_para_cambiar']} "
+              f"extra={r['dulces_extra']} recibidos={r['dulces_recibidos']}: "
+              f"P(salvar a todos) = {r['probabilidad']:.4f} [{bajo:.4f}, {alto:.4f}] ({r['segundos']:.1f} s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Monte Carlo del juego de los dulces.")
+    parser.add_argument('--participantes', type=int, nargs='+', default=[10])
+    parser.add_argument('--para-cambiar', type=int, nargs='+', default=[6], help="Dulces por un chupetín")
+    parser.add_argument('--extra', type=int, nargs='+', default=[2], help="Dulces extra al cambiar por un chupetín")
+    parser.add_argument('--recibidos', type=int, nargs='+', default=[6], help="Dulces al cambiar un chupetín")
+    parser.add_argument('--juegos', type=int, default=1_000_000, help="Juegos simulados por combinación")
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument('--json', default=None, help="Guardar los resultados en este archivo JSON")
+    main(parser.parse_args())
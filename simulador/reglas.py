@@ -0,0 +1,53 @@
+import numpy as np
+
+# Reglas del juego de los dulces, compartidas por la app y la simulación Monte Carlo.
+
+DULCES = ['limon', 'pera', 'huevo']
+
+# Reparto inicial: 2 dulces al azar por participante, guardados como códigos uint8 (índice en DULCES).
+# Un millón de participantes ocupa 2 MB y se genera de una vez.
+def repartir_dulces(num, rng=None):
+    rng = rng or np.random.default_rng()
+    return rng.integers(0, len(DULCES), size=(num, 2), dtype=np.uint8)
+
+def totales_reparto(codigos):
+    return dict(zip(DULCES, np.bincount(codigos.ravel(), minlength=len(DULCES)).tolist()))
+
+def manos_reparto(codigos):
+    # Cuántos participantes recibieron cada par de dulces (sin importar el orden)
+    pares = np.sort(codigos, axis=1).astype(np.intp)
+    conteos = np.bincount(pares[:, 0] * len(DULCES) + pares[:, 1], minlength=len(DULCES) ** 2)
+    return [(f"{DULCES[i]}, {DULCES[j]}", int(conteos[i * len(DULCES) + j]))
+            for i in range(len(DULCES)) for j in range(i, len(DULCES))]
+
+def nombres_reparto(codigos):
+    return [[DULCES[c] for c in fila] for fila in codigos.tolist()]
+
+# Función para validar combinaciones permitidas
+def valida_combinacion(dulces_totales, cantidad):
+    c = dulces_totales
+    if cantidad == 3:
+        # 1 de cada tipo
+        return all(c[d] >= 1 for d in DULCES)
+    elif cantidad == 4:
+        # 2 pares iguales (ej: 2 limon + 2 pera)
+        pares = [c[d] // 2 for d in DULCES]
+        return sum(pares) >= 2
+    elif cantidad == 6:
+        # 2 de cada tipo
+        return all(c[d] >= 2 for d in DULCES)
+    elif cantidad == 9:
+        # 3 de cada tipo
+        return all(c[d] >= 3 for d in DULCES)
+    else:
+        # Para otros casos, solo checamos que haya suficientes dulces en total
+        return sum(c.values()) >= cantidad
+
+# Misma regla para muchos juegos a la vez: conteos es una matriz juegos × DULCES
+def valida_combinaciones(conteos, cantidad):
+    if cantidad in (3, 6, 9):
+        return (conteos >= cantidad // 3).all(axis=1)
+    elif cantidad == 4:
+        return (conteos // 2).sum(axis=1) >= 2
+    else:
+        return conteos.sum(axis=1) >= cantidad
@@ -0,0 +1,338 @@
+import argparse
+import heapq
+import itertools
+import json
+import random
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from reglas import DULCES, valida_combinacion
+
+# Solucionador del juego de los dulces: desde un estado (dulces de cada tipo + chupetines),
+# ¿se puede salvar a todos los participantes y con cuántos cambios como mínimo?
+#
+# - Simetría: las reglas no distinguen los tipos de dulce, así que un estado se guarda con sus
+#   conteos ordenados (limón=3, pera=1 es el mismo estado que pera=3, limón=1).
+# - Búsqueda A* con una cota inferior que mira cuántos dulces faltan (ver cota_cambios).
+# - Tabla de transposición acotada (LRU) compartida entre consultas: guarda, para cada estado de un
+#   plan óptimo ya encontrado, cuántos cambios faltan y la jugada siguiente, así las pistas de los
+#   turnos siguientes salen sin buscar.
+#
+# Uso offline:
+#   python solucionador.py --participantes 20 --para-cambiar 6 --extra 2 --recibidos 6 --aleatorios 1000
+#   python solucionador.py --participantes 20 --estados estados.json --salida resultados.json
+
+MAX_NODOS = 200_000
+MAX_TABLA = 200_000
+
+
+class TablaTransposicion:
+    """Diccionario con tamaño máximo; al llenarse descarta lo usado hace más tiempo."""
+
+    def __init__(self, max_entradas=MAX_TABLA):
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()
+
+    def get(self, clave):
+        valor = self.entradas.get(clave)
+        if valor is not None:
+            self.entradas.move_to_end(clave)
+        return valor
+
+    def put(self, clave, valor):
+        self.entradas[clave] = valor
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.max_entradas:
+            self.entradas.popitem(last=False)
+
+
+TABLA = TablaTransposicion()
+
+
+@lru_cache(maxsize=None)
+def repartos(cantidad):
+    # Todas las formas de repartir `cantidad` dulces entre los tipos; primero las que dan más al tipo
+    # con menos dulces (posición 0 del estado canónico), que suelen ser las mejores
+    return sorted((r for r in itertools.product(range(cantidad + 1), repeat=len(DULCES)) if sum(r) == cantidad),
+                  reverse=True)
+
+
+@lru_cache(maxsize=None)
+def combinaciones_validas(cantidad):
+    # Repartos de `cantidad` que valida_combinacion acepta como pago de un chupetín
+    return [r for r in repartos(cantidad) if valida_combinacion(dict(zip(DULCES, r)), cantidad)]
+
+
+def canonico(conteos):
+    return tuple(sorted(conteos))
+
+
+def cota_cambios(conteos, chupetines, num, para_cambiar, extra, recibidos):
+    """Cota inferior de los cambios que faltan para llegar a num chupetines (None si es imposible).
+
+    Faltan N chupetines. Si además se cambian m chupetines por dulces, hacen falta N + m cambios por
+    chupetín, que consumen (N + m)·para_cambiar dulces (con 3, 6 o 9, la tercera parte de cada tipo),
+    y antes del último solo se pueden conseguir (N + m - 1)·extra + m·recibidos dulces elegidos.
+    Se toma el m mínimo que alcanza, sin mirar el orden de las jugadas: N + 2m es admisible para A*.
+    """
+    faltan = num - chupetines
+    if faltan <= 0:
+        return 0
+    por_tipo = para_cambiar // 3 if para_cambiar in (3, 6, 9) else None
+    total = sum(conteos)
+
+    def faltan_dulces(m):
+        cambios = faltan + m
+        if por_tipo:
+            demanda = sum(max(0, cambios * por_tipo - c) for c in conteos)
+        else:
+            demanda = max(0, cambios * para_cambiar - total)
+        return demanda - (cambios - 1) * extra - m * recibidos
+
+    if faltan_dulces(0) <= 0:
+        return faltan
+    # faltan_dulces es convexa: baja mientras sobran dulces de algún tipo y, cuando todos los tipos
+    # hacen falta (m_lleno), cambia a razón de para_cambiar - extra - recibidos por m
+    m_lleno = max(0, -(-max(conteos) // por_tipo) - faltan) if por_tipo else 0
+    if faltan_dulces(m_lleno) <= 0:
+        alto = max(m_lleno, 1)
+    elif para_cambiar - extra - recibidos >= 0:
+        # Cambiar chupetines por dulces no deja ganancia: lo que falta no se recupera nunca
+        return None
+    else:
+        alto = max(m_lleno, 1)
+        while faltan_dulces(alto) > 0:
+            alto *= 2
+    # Búsqueda binaria del primer m que alcanza
+    bajo = alto // 2
+    while bajo + 1 < alto:
+        medio = (bajo + alto) // 2
+        if faltan_dulces(medio) > 0:
+            bajo = medio
+        else:
+            alto = medio
+    return faltan + 2 * alto
+
+
+def sucesores(estado, para_cambiar, extra, recibidos):
+    # (jugada, estado canónico siguiente); las jugadas usan las posiciones del estado canónico
+    conteos, chupetines = estado
+    for pago in combinaciones_validas(para_cambiar):
+        if all(p <= c for p, c in zip(pago, conteos)):
+            restantes = [c - p for c, p in zip(conteos, pago)]
+            for adicionales in repartos(extra):
+                nuevo = canonico(r + a for r, a in zip(restantes, adicionales))
+                yield ('dulces_a_chupetin', pago, adicionales), (nuevo, chupetines + 1)
+    if chupetines > 0:
+        for pedidos in repartos(recibidos):
+            nuevo = canonico(c + p for c, p in zip(conteos, pedidos))
+            yield ('chupetin_a_dulces', None, pedidos), (nuevo, chupetines - 1)
+
+
+def ciclo_seguro(dulces_totales, chupetines, para_cambiar, extra, recibidos):
+    # Con ganancia neta y recibidos >= para_cambiar, un chupetín basta: se cambia por dulces (elegidos
+    # para formar la combinación), se vuelve a cambiar por otro y sobran dulces, hasta salvar a todos.
+    # Sin chupetines alcanza con poder hacer el primer cambio.
+    if recibidos < para_cambiar or recibidos + extra <= para_cambiar:
+        return False
+    return chupetines > 0 or valida_combinacion(Counter({d: int(dulces_totales.get(d, 0)) for d in DULCES}), para_cambiar)
+
+
+def buscar(inicio, num, para_cambiar, extra, recibidos, max_nodos=MAX_NODOS, max_segundos=None):
+    """A* desde un estado canónico; devuelve (lista de (estado, jugada) o None, nodos, agotado).
+
+    La lista es None si no hay solución o si se agotó el límite de nodos o de tiempo sin decidir
+    (agotado=True).
+    """
+    reglas = (para_cambiar, extra, recibidos)
+    h = cota_cambios(inicio[0], inicio[1], num, *reglas)
+    if h is None:
+        return None, 0, False
+    limite = time.perf_counter() + max_segundos if max_segundos else None
+    orden = itertools.count()
+    # A igual f se expande primero el más profundo: los planes de puros cambios por chupetín llegan rápido
+    abiertos = [(h, 0, next(orden), inicio)]
+    mejor_g = {inicio: 0}
+    padres = {inicio: None}
+    nodos = 0
+    while abiertos:
+        _, menos_g, _, estado = heapq.heappop(abiertos)
+        g = -menos_g
+        if g > mejor_g[estado]:
+            continue
+        if estado[1] >= num:
+            camino = []
+            while padres[estado] is not None:
+                anterior, jugada = padres[estado]
+                camino.append((anterior, jugada))
+                estado = anterior
+            return camino[::-1], nodos, False
+        nodos += 1
+        if nodos > max_nodos or (limite and nodos % 64 == 0 and time.perf_counter() > limite):
+            return None, nodos, True
+        for jugada, siguiente in sucesores(estado, *reglas):
+            if g + 1 >= mejor_g.get(siguiente, g + 2):
+                continue
+            h = cota_cambios(siguiente[0], siguiente[1], num, *reglas)
+            if h is None:
+                continue
+            mejor_g[siguiente] = g + 1
+            padres[siguiente] = (estado, jugada)
+            heapq.heappush(abiertos, (g + 1 + h, -(g + 1), next(orden), siguiente))
+    return None, nodos, False
+
+
+def jugada_codiciosa(estado, num, para_cambiar, extra, recibidos):
+    # La jugada que deja la menor cota (el primer paso de A* sin mirar más allá); None si no hay
+    mejor = None
+    for jugada, siguiente in sucesores(estado, para_cambiar, extra, recibidos):
+        h = cota_cambios(siguiente[0], siguiente[1], num, para_cambiar, extra, recibidos)
+        if h is not None and (mejor is None or h < mejor[0]):
+            mejor = (h, jugada, siguiente)
+    return None if mejor is None else (estado, mejor[1])
+
+
+def resolver_canonico(inicio, num, para_cambiar, extra, recibidos, max_nodos=MAX_NODOS, tabla=TABLA,
+                      max_segundos=None):
+    """Plan óptimo [(estado, jugada), ...] desde un estado canónico, usando y llenando la tabla.
+
+    Devuelve (plan, nodos, agotado); plan es None si no hay solución o se agotó el límite (agotado).
+    """
+    reglas = (num, para_cambiar, extra, recibidos)
+    guardado = tabla.get((reglas, inicio))
+    if guardado is None:
+        camino, nodos, agotado = buscar(inicio, num, para_cambiar, extra, recibidos, max_nodos, max_segundos)
+        if camino is None:
+            if not agotado:
+                tabla.put((reglas, inicio), (None, None, None))
+            return None, nodos, agotado
+        # Cada sufijo de un plan óptimo también es óptimo: se guardan todos los estados del plan
+        for i, (estado, jugada) in enumerate(camino):
+            siguiente = camino[i + 1][0] if i + 1 < len(camino) else None
+            tabla.put((reglas, estado), (len(camino) - i, jugada, siguiente))
+        if not camino:
+            tabla.put((reglas, inicio), (0, None, None))
+        return camino, nodos, False
+
+    faltan, _, _ = guardado
+    if faltan is None:
+        return None, 0, False
+    camino, estado = [], inicio
+    while faltan:
+        _, jugada, siguiente = tabla.get((reglas, estado))
+        camino.append((estado, jugada))
+        if siguiente is None:
+            break
+        estado = siguiente
+        guardado = tabla.get((reglas, estado))
+        if guardado is None:
+            # La tabla descartó parte del plan: se busca de nuevo desde aquí
+            resto, nodos, agotado = resolver_canonico(estado, num, para_cambiar, extra, recibidos, max_nodos, tabla,
+                                                      max_segundos)
+            return (None, nodos, agotado) if resto is None else (camino + resto, nodos, False)
+        faltan = guardado[0]
+    return camino, 0, False
+
+
+def traducir(dulces_totales, plan):
+    """Jugadas del plan (posiciones canónicas) con los nombres de los dulces del juego real."""
+    actuales = {d: int(dulces_totales.get(d, 0)) for d in DULCES}
+    jugadas = []
+    for _, (accion, pago, pedidos) in plan:
+        orden = sorted(DULCES, key=lambda d: actuales[d])  # posición canónica -> dulce
+        if accion == 'dulces_a_chupetin':
+            jugada = {'accion': 'cambiar_dulces_a_chupetin',
+                      'dulces': {orden[i]: pago[i] for i in range(len(DULCES)) if pago[i]},
+                      'extra': {orden[i]: pedidos[i] for i in range(len(DULCES)) if pedidos[i]}}
+            for i, d in enumerate(orden):
+                actuales[d] += pedidos[i] - pago[i]
+        else:
+            jugada = {'accion': 'cambiar_chupetin_a_dulces',
+                      'dulces': {orden[i]: pedidos[i] for i in range(len(DULCES)) if pedidos[i]}}
+            for i, d in enumerate(orden):
+                actuales[d] += pedidos[i]
+        jugadas.append(jugada)
+    return jugadas
+
+
+def pista(dulces_totales, chupetines, num, para_cambiar, extra, recibidos, max_nodos=MAX_NODOS, tabla=TABLA,
+          max_segundos=None):
+    """¿Se puede salvar a todos desde este estado? Cambios mínimos y jugadas, listo para JSON.
+
+    resoluble es None si la búsqueda agotó max_nodos o max_segundos sin decidir. Si el ciclo de un
+    chupetín ya asegura la solución (ciclo_seguro), resoluble es True aunque la búsqueda se agote (o ni
+    se intente, si la cota ya supera max_nodos): cambios es None y siguiente es la jugada que deja la
+    menor cota.
+    """
+    inicio_reloj = time.perf_counter()
+    inicio = (canonico(int(dulces_totales.get(d, 0)) for d in DULCES), chupetines)
+    seguro = chupetines >= num or ciclo_seguro(dulces_totales, chupetines, para_cambiar, extra, recibidos)
+    if seguro and cota_cambios(inicio[0], chupetines, num, para_cambiar, extra, recibidos) > max_nodos:
+        # El plan tiene al menos tantos cambios como la cota y cada uno expande un nodo: no se busca
+        plan, nodos, agotado = None, 0, True
+    else:
+        plan, nodos, agotado = resolver_canonico(inicio, num, para_cambiar, extra, recibidos, max_nodos, tabla,
+                                                 max_segundos)
+    if plan is not None:
+        jugadas = traducir(dulces_totales, plan)
+    elif seguro and agotado:
+        primera = jugada_codiciosa(inicio, num, para_cambiar, extra, recibidos)
+        jugadas = traducir(dulces_totales, [primera]) if primera else []
+    else:
+        jugadas = []
+    return {
+        'resoluble': True if seguro else (None if agotado else plan is not None),
+        'cambios': len(plan) if plan is not None else None,
+        'siguiente': jugadas[0] if jugadas else None,
+        'plan': jugadas if plan is not None else [],
+        'nodos': nodos,
+        'segundos': round(time.perf_counter() - inicio_reloj, 4),
+    }
+
+
+def main(args):
+    if args.estados:
+        with open(args.estados, encoding='utf-8') as f:
+            estados = json.load(f)
+    else:
+        rng = random.Random(args.semilla)
+        estados = []
+        for _ in range(args.aleatorios):
+            dulces = rng.choices(DULCES, k=2 * args.participantes)
+            estados.append({**{d: dulces.count(d) for d in DULCES}, 'chupetines': 0})
+
+    inicio = time.perf_counter()
+    resultados = []
+    for estado in estados:
+        num = estado.get('participantes', args.participantes)
+        r = pista({d: estado.get(d, 0) for d in DULCES}, estado.get('chupetines', 0), num,
+                  estado.get('dulces_para_cambiar', args.para_cambiar), estado.get('dulces_extra', args.extra),
+                  estado.get('dulces_recibidos', args.recibidos), args.max_nodos)
+        resultados.append({'estado': estado, **r})
+
+    resolubles = [r for r in resultados if r['resoluble']]
+    sin_decidir = sum(r['resoluble'] is None for r in resultados)
+    print(f"{len(resultados)} estados en {time.perf_counter() - inicio:.2f} s: {len(resolubles)} resolubles, "
+          f"{len(resultados) - len(resolubles) - sin_decidir} sin solución, {sin_decidir} sin decidir")
+    if resolubles:
+        cambios = sorted(r['cambios'] for r in resolubles)
+        print(f"Cambios mínimos: {cambios[0]} a {cambios[-1]} (mediana {cambios[len(cambios) // 2]})")
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solucionador del juego de los dulces (A* con simetrías).")
+    parser.add_argument('--participantes', type=int, default=10)
+    parser.add_argument('--para-cambiar', type=int, default=6, help="Dulces por un chupetín")
+    parser.add_argument('--extra', type=int, default=2, help="Dulces extra al cambiar por un chupetín")
+    parser.add_argument('--recibidos', type=int, default=6, help="Dulces al cambiar un chupetín")
+    parser.add_argument('--estados', default=None,
+                        help="JSON con una lista de estados {limon, pera, huevo, chupetines[, participantes...]}")
+    parser.add_argument('--aleatorios', type=int, default=100, help="Sin --estados: repartos iniciales al azar")
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--max-nodos', type=int, default=MAX_NODOS, help="Límite de estados expandidos por búsqueda")
+    parser.add_argument('--salida', default=None, help="Guardar los resultados en este archivo JSON")
+    main(parser.parse_args())